@@ -1,12 +1,12 @@
 from langchain.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
-from games.models import Game
+from games.models import Game, Genre, Platform, Store
+from games.tags import contains_any
 import os
 from dotenv import load_dotenv
 import re
 from django.db.models import Q
 import ast
-from functools import reduce
 
 
 
@@ -28,10 +28,11 @@ def get_all_unique_values():
     """
     platforms, esrb_ratings, stores, genres의 고유 값을 가져옵니다.
     """
-    unique_platforms = Game.objects.values_list('platforms', flat=True).distinct()
+    # 리스트 컬럼(platforms, stores, genres)은 정규화된 태그 테이블에서 개별 값을 가져옴
+    unique_platforms = Platform.objects.order_by('name').values_list('name', flat=True)
     unique_esrb_ratings = Game.objects.values_list('esrb_rating', flat=True).distinct()
-    unique_stores = Game.objects.values_list('stores', flat=True).distinct()
-    unique_genres = Game.objects.values_list('genres', flat=True).distinct()
+    unique_stores = Store.objects.order_by('name').values_list('name', flat=True)
+    unique_genres = Genre.objects.order_by('name').values_list('name', flat=True)
 
 
     return {
@@ -208,17 +209,17 @@ def filter_games(answer):
 
         # ORM 필터링 후 metacritic_score 기준으로 정렬
         queryset = Game.objects.filter(
-            # 장르 필터 (OR 조건으로 변경, 부분 일치)
-            Q() if not genre else reduce(lambda q, g: q | Q(genres__icontains=g), genre, Q()),
+            # 장르 필터 (OR 조건, JSON 리스트 포함 여부)
+            contains_any('genres', genre),
 
             # 연령제한 필터 (전체 선택 가능)
             Q() if not age_limits else Q(esrb_rating__in=age_limits),
 
-            # 플랫폼 필터 (OR 조건으로 변경, 부분 일치)
-            Q() if not platforms else reduce(lambda q, p: q | Q(platforms__contains=[p]), platforms, Q()),
+            # 플랫폼 필터 (OR 조건, JSON 리스트 포함 여부)
+            contains_any('platforms', platforms),
 
-            # 스토어 필터 (OR 조건으로 변경, 부분 일치)
-            Q() if not stores else reduce(lambda q, s: q | Q(stores__contains=[s]), stores, Q())
+            # 스토어 필터 (OR 조건, JSON 리스트 포함 여부)
+            contains_any('stores', stores)
         ).order_by('-metacritic_score')  # metacritic_score를 기준으로 내림차순 정렬
 
         # 상위 3개 결과만 반환
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -155,6 +156,43 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 
+# In-process catalog index used by the game list endpoint (games.catalog_index)
+GAME_CATALOG_INDEX_ENABLED = True
+GAME_CATALOG_INDEX_MAX_GAMES = 1_000_000  # above this the list endpoint stays on SQL
+GAME_CATALOG_INDEX_MIN_TOMBSTONES = 1000  # deleted games (and at least 10% of the index) before it is rebuilt compacted
+GAME_CATALOG_VERSION_CHECK_INTERVAL = 2.0  # seconds between catalog version reads
+
+# Response cache for the POST game list endpoint (games.cache)
+GAME_LIST_CACHE_MAX_ENTRIES = 512
+GAME_LIST_CACHE_TTL = 300  # seconds
+
+# Resume checkpoint of enrich_game_details (kept outside the source tree)
+GAME_ENRICH_CHECKPOINT = os.getenv(
+    'GAME_ENRICH_CHECKPOINT', str(Path(tempfile.gettempdir()) / 'game_buddy' / 'enrich_game_details.checkpoint.json')
+)
+
+# Upper bound for items_per_page on the POST game list endpoint
+GAME_LIST_MAX_PAGE_SIZE = 100
+
+# Maximum number of IDs accepted by GET /games/batch/
+GAME_BATCH_MAX_IDS = 100
+
+# RAWG API (override the base URL to point commands at a local stub, see games.rawg_stub)
+RAWG_API_BASE_URL = os.getenv('RAWG_API_BASE_URL', 'https://api.rawg.io/api').rstrip('/')
+RAWG_CONNECT_TIMEOUT = 3.05  # seconds
+RAWG_REQUEST_TIMEOUT = 10  # seconds (read timeout)
+RAWG_MAX_RETRIES = 3  # retries on 429/5xx and network errors, with exponential backoff
+RAWG_RATE_LIMIT = 5  # requests per second for the web process client (games.rawg)
+
+# Background RAWG description backfill for the game detail endpoint (games.enrichment)
+GAME_DESCRIPTION_BACKFILL_WORKERS = 2
+
+# Negative cache for empty/failed RAWG detail lookups (games.negative_cache)
+RAWG_MISS_EMPTY_TTL = 7 * 24 * 3600  # seconds before re-asking RAWG for a game it had no description for
+RAWG_MISS_ERROR_TTL = 300  # seconds after a first failure, doubled per consecutive failure
+RAWG_MISS_MAX_TTL = 24 * 3600  # cap on the failure backoff
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -193,6 +231,15 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "if-none-match",
+    "if-modified-since",
+]
+
+# 조건부 요청(ETag/Last-Modified)과 목록 캐시 상태를 프론트엔드에서 읽을 수 있도록 노출
+CORS_EXPOSE_HEADERS = [
+    "etag",
+    "last-modified",
+    "x-cache",
 ]
 
 REST_FRAMEWORK = {
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'game_buddy.settings')
 
 application = get_wsgi_application()
+
+# 카탈로그 인덱스를 첫 목록 요청 전에 백그라운드에서 미리 구축
+from games.catalog_index import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,81 @@
+"""
+On-disk archive of raw RAWG list pages.
+
+`fetch_game_data --archive DIR` writes every page it fetched, as RAWG
+returned it, to DIR/run-<id>-<time>/ in gzip-compressed JSONL segments
+(one {"page", "fetched_at", "data"} line per page, segment_pages pages
+per file) next to a manifest.json describing the run. `--replay PATH`
+re-parses such segments in a process pool and writes them to the
+database without touching the network, so a change to the parsing or a
+full rebuild does not need a new crawl.
+"""
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+
+from django.utils import timezone
+
+SEGMENT_PATTERN = 'pages-*.jsonl.gz'
+DEFAULT_SEGMENT_PAGES = 200
+
+
+class PageArchive:
+    """Append-only writer of one run's pages"""
+
+    def __init__(self, root, run_id, segment_pages=DEFAULT_SEGMENT_PAGES, **manifest):
+        started = timezone.now()
+        self.directory = Path(root) / f"run-{run_id:05d}-{started:%Y%m%d%H%M%S}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_pages = segment_pages
+        self.pages = 0
+        self.segments = 0
+        self._file = None
+        self._in_segment = 0
+        self._lock = threading.Lock()
+        manifest = {'run': run_id, 'started_at': started.isoformat(), 'segment_pages': segment_pages, **manifest}
+        (self.directory / 'manifest.json').write_text(json.dumps(manifest, indent=2, default=str))
+
+    def write(self, page, data):
+        line = json.dumps({'page': page, 'fetched_at': timezone.now().isoformat(), 'data': data},
+                          separators=(',', ':'))
+        with self._lock:
+            if self._file is None or self._in_segment >= self.segment_pages:
+                self._rotate()
+            self._file.write(line + '\n')
+            self._in_segment += 1
+            self.pages += 1
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self.segments += 1
+        self._in_segment = 0
+        path = self.directory / f"pages-{self.segments:05d}.jsonl.gz"
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def size_bytes(self):
+        return sum(path.stat().st_size for path in self.directory.glob(SEGMENT_PATTERN))
+
+
+def find_segments(path):
+    """
+    Segment files under `path` (one run directory, an archive root with
+    several runs, or a single segment), oldest run first so that replaying
+    a root applies newer data last.
+    """
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(path.rglob(SEGMENT_PATTERN), key=lambda segment: (str(segment.parent), segment.name))
+
+
+def segments_size(segments):
+    return sum(os.path.getsize(segment) for segment in segments)
@@ -0,0 +1,407 @@
+"""
+In-process bitmap index of the game catalog for the game list endpoint.
+
+Every game gets a position; each genre/platform/store/ESRB value maps to a
+Python int used as a bitset over those positions, so a filter is a handful
+of big-int ANDs and the total count is a popcount. Sort orders are arrays
+of positions kept sorted by (value, id) with NULL as the lowest value,
+the same order the SQL path produces.
+
+The index is built in a background thread when the web process starts
+(warm_up(), called from the WSGI entry point) or on first use, and answers
+only while its build version matches the shared catalog version
+(games.versioning); until then the view falls back to SQL. Committed saves
+and deletes in this process are applied incrementally through
+games.signals, and changes made elsewhere (fetch_game_data) bump the
+version and trigger a rebuild. Deleted games leave tombstones, which a
+background rebuild compacts once there are enough of them.
+"""
+import logging
+import math
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from .facets import matching_names
+from .models import Game
+from .versioning import get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('genres', 'platforms', 'stores', 'esrb_rating')
+SORT_FIELDS = ('metacritic_score', 'rating')
+BUILD_CHUNK_SIZE = 5000
+INDEX_FIELDS = ('id', 'metacritic_score', 'rating', 'genres', 'platforms', 'stores', 'esrb_rating')
+
+
+def _names(values):
+    return {name for name in values or () if isinstance(name, str) and name}
+
+
+def facet_values(genres, platforms, stores, esrb_rating):
+    """Facet name -> set of values for one game's raw column values"""
+    return {
+        'genres': _names(genres),
+        'platforms': _names(platforms),
+        'stores': _names(stores),
+        'esrb_rating': {esrb_rating} if esrb_rating else set(),
+    }
+
+
+def _sort_value(value):
+    return math.nan if value is None else float(value)
+
+
+class CatalogIndex:
+    def __init__(self, version):
+        self.version = version
+        self.lock = threading.RLock()
+        self.ids = array('q')        # position -> game id
+        self.id_keys = array('q')    # live game ids, sorted (id -> position lookup)
+        self.id_positions = array('q')  # position of id_keys[i]
+        self.alive = 0               # bitset of positions holding a live game
+        self.dead_count = 0          # tombstoned positions (deleted games)
+        self.facets = {facet: {} for facet in FACETS}  # facet -> value -> bitset
+        self.values = {field: array('d') for field in SORT_FIELDS}  # NaN = NULL
+        self.orders = {}             # field -> positions sorted ascending by (value, id)
+        # facet values held by each position, so a save clears only the game's old bits:
+        # value_ids[value_start[pos]:value_start[pos] + value_count[pos]] index value_keys
+        self.value_keys = []         # value id -> (facet, name)
+        self.value_key_ids = {}      # (facet, name) -> value id
+        self.value_start = array('q')
+        self.value_count = array('H')
+        self.value_ids = array('I')  # append-only; rewritten values leave garbage until a rebuild
+        self.garbage_values = 0      # entries of value_ids no position points at any more
+
+    # ---- build -----------------------------------------------------------
+
+    @classmethod
+    def build(cls, version):
+        """Build an index of every Game row, or return None if the catalog is too big"""
+        max_games = getattr(settings, 'GAME_CATALOG_INDEX_MAX_GAMES', 1_000_000)
+        total = Game.objects.count()
+        if total > max_games:
+            logger.warning("Catalog index disabled: %d games exceeds GAME_CATALOG_INDEX_MAX_GAMES=%d",
+                           total, max_games)
+            return None
+
+        start_time = time.time()
+        index = cls(version)
+        value_positions = {facet: {} for facet in FACETS}
+        rows = Game.objects.values_list(*INDEX_FIELDS).iterator(chunk_size=BUILD_CHUNK_SIZE)
+
+        for game_id, metacritic_score, rating, genres, platforms, stores, esrb_rating in rows:
+            pos = len(index.ids)
+            index.ids.append(game_id)
+            index.values['metacritic_score'].append(_sort_value(metacritic_score))
+            index.values['rating'].append(_sort_value(rating))
+            names_by_facet = facet_values(genres, platforms, stores, esrb_rating)
+            index._record_values(pos, names_by_facet)
+            for facet, names in names_by_facet.items():
+                for name in names:
+                    value_positions[facet].setdefault(name, []).append(pos)
+
+        # Set bits through a bytearray; OR-ing 1 << pos per game would be quadratic
+        size = len(index.ids)
+        nbytes = (size + 7) // 8
+        for facet, by_value in value_positions.items():
+            for name, positions in by_value.items():
+                buf = bytearray(nbytes)
+                for pos in positions:
+                    buf[pos >> 3] |= 1 << (pos & 7)
+                index.facets[facet][name] = int.from_bytes(buf, 'little')
+        index.alive = (1 << size) - 1
+        by_id = sorted(range(size), key=index.ids.__getitem__)
+        index.id_keys = array('q', (index.ids[pos] for pos in by_id))
+        index.id_positions = array('q', by_id)
+        for field in SORT_FIELDS:
+            index.orders[field] = array('q', sorted(range(size), key=index._sort_key(field)))
+
+        logger.info("Catalog index built: %d games, %.1f MB, %.2fs (version %s)",
+                    size, index.memory_usage() / 1024 / 1024, time.time() - start_time, version)
+        return index
+
+    def _sort_key(self, field):
+        values, ids = self.values[field], self.ids
+
+        def key(pos):
+            value = values[pos]
+            has_value = value == value  # False for NaN (NULL)
+            return (has_value, value if has_value else 0.0, ids[pos])
+        return key
+
+    # ---- incremental updates ---------------------------------------------
+
+    def _find(self, game_id):
+        """Index into id_keys/id_positions for a live game id, or None"""
+        i = bisect_left(self.id_keys, game_id)
+        if i < len(self.id_keys) and self.id_keys[i] == game_id:
+            return i
+        return None
+
+    def _record_values(self, pos, names_by_facet):
+        """Remember the facet values of a position (appended for a new position, repointed otherwise)"""
+        start = len(self.value_ids)
+        for facet, names in names_by_facet.items():
+            for name in names:
+                key = (facet, name)
+                value_id = self.value_key_ids.get(key)
+                if value_id is None:
+                    value_id = self.value_key_ids[key] = len(self.value_keys)
+                    self.value_keys.append(key)
+                self.value_ids.append(value_id)
+        if pos == len(self.value_start):
+            self.value_start.append(start)
+            self.value_count.append(len(self.value_ids) - start)
+        else:
+            self.value_start[pos] = start
+            self.value_count[pos] = len(self.value_ids) - start
+
+    def _clear_position(self, pos):
+        bit = 1 << pos
+        start = self.value_start[pos]
+        for value_id in self.value_ids[start:start + self.value_count[pos]]:
+            facet, name = self.value_keys[value_id]
+            self.facets[facet][name] &= ~bit
+        self.garbage_values += self.value_count[pos]
+        self.value_count[pos] = 0
+        for field, order in self.orders.items():
+            key = self._sort_key(field)
+            i = bisect_left(order, key(pos), key=key)
+            if i < len(order) and order[i] == pos:
+                del order[i]
+
+    def upsert(self, game):
+        """Add or refresh one Game instance"""
+        with self.lock:
+            i = self._find(game.id)
+            if i is None:
+                pos = len(self.ids)
+                self.ids.append(game.id)
+                i = bisect_left(self.id_keys, game.id)
+                self.id_keys.insert(i, game.id)
+                self.id_positions.insert(i, pos)
+                for field in SORT_FIELDS:
+                    self.values[field].append(math.nan)
+            else:
+                pos = self.id_positions[i]
+                self._clear_position(pos)
+
+            for field in SORT_FIELDS:
+                self.values[field][pos] = _sort_value(getattr(game, field))
+            bit = 1 << pos
+            names_by_facet = facet_values(game.genres, game.platforms, game.stores, game.esrb_rating)
+            self._record_values(pos, names_by_facet)
+            for facet, names in names_by_facet.items():
+                by_value = self.facets[facet]
+                for name in names:
+                    by_value[name] = by_value.get(name, 0) | bit
+            for field, order in self.orders.items():
+                insort(order, pos, key=self._sort_key(field))
+            self.alive |= bit
+
+    def remove(self, game_id):
+        """Tombstone a deleted game (positions are compacted by a rebuild, see needs_compaction)"""
+        with self.lock:
+            i = self._find(game_id)
+            if i is None:
+                return
+            pos = self.id_positions[i]
+            del self.id_keys[i]
+            del self.id_positions[i]
+            self._clear_position(pos)
+            self.alive &= ~(1 << pos)
+            self.dead_count += 1
+
+    # ---- queries -----------------------------------------------------------
+
+    def filter_mask(self, filters):
+        """Bitset of games matching every {facet: value} filter (tag values as in the SQL path)"""
+        mask = self.alive
+        for facet, value in filters.items():
+            by_value = self.facets[facet]
+            if facet == 'esrb_rating':
+                mask &= by_value.get(value, 0)
+            else:
+                # same name matching as the SQL path (games.facets.matching_names)
+                selected = 0
+                for name in matching_names(facet, value, by_value):
+                    selected |= by_value[name]
+                mask &= selected
+            if not mask:
+                break
+        return mask
+
+    def query(self, filters, ordering, offset, limit):
+        """
+        Return (game ids of the requested page, total matches), or None
+        if the ordering is not indexed.
+        """
+        field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        if field not in self.orders:
+            return None
+
+        with self.lock:
+            mask = self.filter_mask(filters)
+            total = mask.bit_count()
+            if not total or offset >= total:
+                return [], total
+
+            order, ids = self.orders[field], self.ids
+            if not filters:
+                # Unfiltered: the page is a plain slice of the sort order (it holds live positions only)
+                if descending:
+                    end = len(order) - offset
+                    page = order[max(end - limit, 0):end][::-1]
+                else:
+                    page = order[offset:offset + limit]
+                return [ids[pos] for pos in page], total
+
+            bits = mask.to_bytes((len(ids) + 7) // 8, 'little')
+            page = []
+            skipped = 0
+            for pos in (reversed(order) if descending else order):
+                if bits[pos >> 3] >> (pos & 7) & 1:
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    page.append(ids[pos])
+                    if len(page) >= limit:
+                        break
+            return page, total
+
+    def facet_counts(self, filters):
+        """Per-value match counts for every facet under the given filters"""
+        with self.lock:
+            mask = self.filter_mask(filters)
+            counts = {}
+            for facet, by_value in self.facets.items():
+                facet_counts = {}
+                if mask:
+                    for name, bitset in by_value.items():
+                        count = (mask & bitset).bit_count()
+                        if count:
+                            facet_counts[name] = count
+                counts[facet] = dict(sorted(facet_counts.items(), key=lambda item: (-item[1], item[0])))
+            return counts
+
+    def needs_compaction(self):
+        """True once tombstones and rewritten values waste enough space to rebuild the index"""
+        threshold = max(getattr(settings, 'GAME_CATALOG_INDEX_MIN_TOMBSTONES', 1000), len(self.id_keys) // 10)
+        return self.dead_count > threshold or self.garbage_values > 8 * threshold
+
+    # ---- measurement -----------------------------------------------------
+
+    def memory_usage(self):
+        """Approximate bytes held by the index"""
+        with self.lock:
+            size = sys.getsizeof(self.ids) + sys.getsizeof(self.alive)
+            size += sys.getsizeof(self.id_keys) + sys.getsizeof(self.id_positions)
+            size += sum(sys.getsizeof(values) for values in self.values.values())
+            size += sum(sys.getsizeof(order) for order in self.orders.values())
+            size += sys.getsizeof(self.value_start) + sys.getsizeof(self.value_count) + sys.getsizeof(self.value_ids)
+            for by_value in self.facets.values():
+                size += sys.getsizeof(by_value)
+                size += sum(sys.getsizeof(name) + sys.getsizeof(bitset) for name, bitset in by_value.items())
+            return size
+
+    def stats(self):
+        with self.lock:
+            return {
+                'version': self.version,
+                'games': len(self.id_keys),
+                'tombstones': self.dead_count,
+                'facet_values': {facet: len(by_value) for facet, by_value in self.facets.items()},
+                'memory_bytes': self.memory_usage(),
+            }
+
+
+# ---- per-process singleton -------------------------------------------------
+
+_index = None
+_built_version = None
+_building = False
+_state_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'GAME_CATALOG_INDEX_ENABLED', True)
+
+
+def _build(version):
+    global _index, _built_version, _building
+    try:
+        _index = CatalogIndex.build(version)
+        _built_version = version
+    except Exception:
+        logger.exception("Catalog index build failed")
+    finally:
+        _building = False
+        connection.close()  # this thread's DB connection
+
+
+def _start_build(version):
+    """Start a background build unless one is running; returns False if one was"""
+    global _building
+    with _state_lock:
+        if _building:
+            return False
+        _building = True
+    threading.Thread(target=_build, args=(version,), name='catalog-index-build', daemon=True).start()
+    return True
+
+
+def get_catalog_index():
+    """
+    Return the index if it is current, otherwise start a background
+    (re)build and return None so the caller falls back to SQL. A current
+    index with too many tombstones keeps answering while its compacted
+    replacement is built.
+    """
+    if not is_enabled():
+        return None
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        if index.needs_compaction():
+            _start_build(version)
+        return index
+
+    if _built_version != version:  # otherwise the catalog is too big for this version
+        _start_build(version)
+    return None
+
+
+def games_changed(game_ids, version):
+    """
+    Apply the committed saves and deletes of one transaction in this
+    process; `version` is its single catalog version bump. The games are
+    re-read, so ids whose change was rolled back settle to the stored row.
+    """
+    index = _index
+    if index is None:
+        return
+    stored = {}
+    game_ids = list(game_ids)
+    for start in range(0, len(game_ids), BUILD_CHUNK_SIZE // 10):
+        batch = game_ids[start:start + BUILD_CHUNK_SIZE // 10]
+        stored.update(Game.objects.only(*INDEX_FIELDS).in_bulk(batch))
+    for game_id in game_ids:
+        game = stored.get(game_id)
+        if game is None:
+            index.remove(game_id)
+        else:
+            index.upsert(game)
+    if index.version == version - 1:
+        index.version = version
+
+
+def warm_up():
+    """Start building the index when a web process starts (see game_buddy.wsgi)"""
+    get_catalog_index()
@@ -0,0 +1,44 @@
+"""
+Persisted checkpoints of incremental RAWG syncs.
+
+fetch_game_data --incremental asks RAWG only for games updated since the
+stored high-water mark (the highest `updated` it has stored), newest
+first, and stops at the first game it has already seen. The mark only
+advances after a run that reached that point without failed pages, so an
+interrupted run is simply repeated next time.
+"""
+from datetime import datetime
+
+from django.utils import timezone
+
+from .models import SyncCheckpoint
+
+
+def parse_updated(value):
+    """RAWG `updated` timestamp ("2019-09-17T11:58:57", UTC) as an aware datetime, or None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def get_checkpoint(name):
+    """The checkpoint of job `name`, or None before its first completed run"""
+    return SyncCheckpoint.objects.filter(name=name).first()
+
+
+def save_checkpoint(name, run_started, last_updated):
+    """Record a completed run; the high-water mark never moves backwards"""
+    checkpoint = get_checkpoint(name)
+    if checkpoint and checkpoint.last_updated and (last_updated is None or last_updated < checkpoint.last_updated):
+        last_updated = checkpoint.last_updated
+    SyncCheckpoint.objects.update_or_create(
+        name=name,
+        defaults={'last_run_at': run_started, 'last_updated': last_updated},
+    )
+    return last_updated
@@ -0,0 +1,38 @@
+"""
+HTTP validators (ETag / Last-Modified) for the game endpoints.
+
+Django's get_conditional_response answers a matching If-None-Match on a
+POST with 412, but the game list is a read-only query sent as POST, so
+both endpoints use not_modified(), which applies the GET rules: a matching
+If-None-Match, or (without one) an If-Modified-Since no older than
+Last-Modified, means the client copy is current.
+"""
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+
+def make_etag(*parts):
+    return quote_etag('-'.join(str(part) for part in parts))
+
+
+def not_modified(request, etag, last_modified=None):
+    """True if the request's validators show the client already has this representation"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags or f'W/{etag}' in etags
+    if last_modified is not None:
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return if_modified_since is not None and int(last_modified.timestamp()) <= if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return set_validators(HttpResponseNotModified(), etag, last_modified)
@@ -0,0 +1,92 @@
+"""
+Background backfill of Game.description from the RAWG API.
+
+GameDetailView answers from local data and queues games without a
+description here. A small thread pool fetches them off the request path;
+each game is queued at most once while its fetch is in flight, so
+concurrent detail requests for the same game share one RAWG call.
+Clients see `description_status: "pending"` and re-fetch the detail
+endpoint until the description lands. Empty or failed lookups go to the
+negative cache (games.negative_cache) so they are not repeated per view.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Game, RawgLookupMiss
+from .negative_cache import clear_misses, record_miss
+from .rawg import get_client
+
+logger = logging.getLogger(__name__)
+
+
+class DescriptionBackfill:
+    """Deduplicating thread pool that fills in missing game descriptions"""
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='description-backfill')
+        return self._executor
+
+    def enqueue(self, game_id):
+        """Queue a backfill for `game_id`; returns False if one is already in flight"""
+        with self._lock:
+            if game_id in self._pending:
+                return False
+            self._pending.add(game_id)
+            self._get_executor().submit(self._run, game_id)
+            return True
+
+    def _run(self, game_id):
+        try:
+            self.backfill(game_id)
+        except Exception:
+            logger.exception("Description backfill failed for game %s", game_id)
+        finally:
+            with self._lock:
+                self._pending.discard(game_id)
+            connection.close()  # this worker thread's DB connection
+
+    def backfill(self, game_id):
+        """Fetch and store the description of one game; returns True if it was saved"""
+        client = get_client()
+        if not client.api_key:
+            return False
+
+        # 실패/빈 응답은 네거티브 캐시에 기록해 retry_after 전까지 다시 묻지 않음
+        details = client.game_details(game_id)
+        if details is None:
+            record_miss(game_id, RawgLookupMiss.REASON_ERROR)
+            return False
+        description = details.get('description')
+        if not description:
+            record_miss(game_id, RawgLookupMiss.REASON_EMPTY)
+            return False
+
+        game = Game.objects.filter(id=game_id).first()
+        if game is None or game.description:
+            return False
+        game.description = description
+        # description only: skips the catalog version bump and search reindex (games.signals)
+        game.save(update_fields=['description', 'updated_at'])
+        clear_misses([game_id])
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'workers': self.max_workers}
+
+
+description_backfill = DescriptionBackfill(
+    max_workers=getattr(settings, 'GAME_DESCRIPTION_BACKFILL_WORKERS', 2),
+)
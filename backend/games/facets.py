@@ -0,0 +1,69 @@
+"""Per-value game counts for the list filters (genres, platforms, stores, ESRB rating)"""
+from django.db.models import Count
+
+from .models import Game, Genre, Platform, Store
+
+# facet -> (Game link table, tag name path)
+TAG_FACETS = {
+    'genres': (Game.genre_tags.through, 'genre__name'),
+    'platforms': (Game.platform_tags.through, 'platform__name'),
+    'stores': (Game.store_tags.through, 'store__name'),
+}
+TAG_MODELS = {'genres': Genre, 'platforms': Platform, 'stores': Store}
+
+# Filter labels of the frontend that RAWG spells differently
+FACET_ALIASES = {
+    'genres': {
+        'FPS': ['Shooter'],
+    },
+    'platforms': {
+        'PS5': ['PlayStation 5'],
+        'Xbox Series X': ['Xbox Series S/X'],
+        'Switch': ['Nintendo Switch'],
+        'Mobile': ['iOS', 'Android'],
+    },
+}
+
+
+def matching_names(facet, value, names):
+    """
+    Stored tag names a filter value selects: every name containing it
+    (as the old `value in game.genres` string test did) plus the RAWG
+    names of a frontend label. Used by both the SQL and the index path.
+    """
+    aliases = FACET_ALIASES.get(facet, {}).get(value, ())
+    return sorted({name for name in names if value in name or name in aliases})
+
+
+def tag_names(facet, value):
+    """matching_names() over the tag table of `facet`"""
+    return matching_names(facet, value, TAG_MODELS[facet].objects.values_list('name', flat=True))
+
+
+def count_facets(games):
+    """
+    Count matches per facet value over a filtered Game queryset.
+    Each facet is one grouped query over the filtered ids, however
+    many values it has.
+    """
+    game_ids = games.order_by().values('id')
+    counts = {}
+    for facet, (through, name_path) in TAG_FACETS.items():
+        rows = (
+            through.objects.filter(game_id__in=game_ids)
+            .values_list(name_path)
+            .annotate(count=Count('game_id'))
+            .order_by('-count', name_path)
+        )
+        counts[facet] = dict(rows)
+
+    rows = (
+        Game.objects.filter(id__in=game_ids)
+        .exclude(esrb_rating__isnull=True)
+        .exclude(esrb_rating='')
+        .values_list('esrb_rating')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'esrb_rating')
+    )
+    counts['esrb_rating'] = dict(rows)
+    return counts
@@ -0,0 +1,16 @@
+from django.db import models
+from django.db.models import Lookup
+
+
+class FullTextField(models.TextField):
+    """Text column of a full-text index; supports the `match` lookup"""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
@@ -0,0 +1,50 @@
+"""
+Bulk upsert of games fetched from the RAWG list endpoint.
+
+One INSERT ... ON CONFLICT (id) DO UPDATE per batch replaces the old
+per-game exists() + save() round trips and also refreshes games that are
+already stored (ratings, metacritic scores, tags). bulk_create sends no
+post_save signals, so the search index and the tag tables are updated
+here for the whole batch; callers bump the catalog version once when
+they are done writing.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import search
+from .models import Game
+from .tags import sync_game_tags
+
+# Columns refreshed when a game already exists. screenshots is left out:
+# the list endpoint only carries a few short screenshots, and
+# enrich_game_details may have stored the full set.
+UPSERT_FIELDS = [
+    'name', 'released', 'background_image', 'rating', 'metacritic_score', 'playtime',
+    'platforms', 'genres', 'stores', 'esrb_rating', 'updated_at',
+]
+
+
+def upsert_games(games_data):
+    """
+    Insert or refresh the given game dicts (fields of Game, including id)
+    and return (inserted, updated).
+    """
+    # the same game can appear on two pages while RAWG reorders its list;
+    # keep the last copy so one statement never touches a row twice
+    by_id = {data['id']: data for data in games_data if data}
+    if not by_id:
+        return 0, 0
+    now = timezone.now()
+    games = [Game(**data, updated_at=now) for data in by_id.values()]
+
+    with transaction.atomic():
+        existing = set(Game.objects.filter(id__in=by_id).values_list('id', flat=True))
+        Game.objects.bulk_create(
+            games,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=UPSERT_FIELDS,
+        )
+        sync_game_tags(games)
+        search.index_games(games)
+    return len(games) - len(existing), len(existing)
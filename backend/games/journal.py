@@ -0,0 +1,89 @@
+"""
+Page journal of fetch_game_data runs.
+
+Every run is a FetchRun row with its page range (and `since` for
+incremental runs); each page it stored or failed is a FetchRunPage row.
+`fetch_game_data --resume <run>` fetches only the pages of that run that
+are not done, and a run retries its own failed pages before finishing.
+Pages after the run's stop page (the end of the list, or data that was
+already synced) are not needed and never count as missing.
+
+Page numbers of an incremental run (ordered by -updated) shift when RAWG
+games are updated in between, so a much later resume can miss a game
+that moved across a page boundary; the next incremental run from an
+earlier --since picks it up.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FetchRun, FetchRunPage
+
+
+def start_run(first_page, last_page, since=None):
+    return FetchRun.objects.create(first_page=first_page, last_page=last_page, since=since)
+
+
+def get_run(run_id):
+    """The FetchRun with this id, or None"""
+    return FetchRun.objects.filter(pk=run_id).first()
+
+
+def record_pages(run, done, failed):
+    """Journal {page: games stored} as done and `failed` pages as failed"""
+    entries = [
+        FetchRunPage(run=run, page=page, status=FetchRunPage.STATUS_DONE, games=games)
+        for page, games in done.items()
+    ] + [
+        FetchRunPage(run=run, page=page, status=FetchRunPage.STATUS_FAILED)
+        for page in failed
+    ]
+    if not entries:
+        return
+    pages = [entry.page for entry in entries]
+    # attempts counts every report of a page, so a first report leaves it at 1
+    FetchRunPage.objects.filter(run=run, page__in=pages).update(attempts=F('attempts') + 1)
+    FetchRunPage.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['run', 'page'],
+        update_fields=['status', 'games', 'updated_at'],
+    )
+
+
+def set_stop_page(run, page):
+    """Remember the earliest page after which nothing more is needed"""
+    if page is not None and (run.stop_page is None or page < run.stop_page):
+        run.stop_page = page
+        run.save(update_fields=['stop_page'])
+
+
+def needed_pages(run):
+    """Pages of the run's range, up to its stop page, that are not done yet"""
+    last = run.last_page if run.stop_page is None else min(run.last_page, run.stop_page)
+    done = set(
+        run.pages.filter(status=FetchRunPage.STATUS_DONE, page__lte=last).values_list('page', flat=True)
+    )
+    return [page for page in range(run.first_page, last + 1) if page not in done]
+
+
+def failed_pages(run):
+    """Needed pages that were attempted and failed"""
+    needed = needed_pages(run)
+    return sorted(
+        run.pages.filter(status=FetchRunPage.STATUS_FAILED, page__in=needed).values_list('page', flat=True)
+    ) if needed else []
+
+
+def finish_run(run, max_updated=None):
+    """
+    Close the run: completed when no needed page is missing. Failures past
+    the stop page (e.g. 404s beyond the end of the list) are dropped.
+    """
+    if run.stop_page is not None:
+        run.pages.filter(page__gt=run.stop_page).delete()
+    if max_updated and (run.max_updated is None or max_updated > run.max_updated):
+        run.max_updated = max_updated
+    run.status = FetchRun.STATUS_INCOMPLETE if needed_pages(run) else FetchRun.STATUS_COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=['max_updated', 'status', 'finished_at'])
+    return run
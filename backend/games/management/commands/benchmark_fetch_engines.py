@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from games.pipeline import FetchPipeline
+from games.rawg import RawgClient
+from games.rawg_async import AdaptiveConcurrency, AsyncRawgClient
+from games.rawg_stub import start_stub_server
+
+
+def parse_page(page, data):
+    return data['results'], data['next'] is None
+
+
+class Command(BaseCommand):
+    help = 'Compare page throughput of the thread and async fetch engines against a local RAWG stub (nothing is saved)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=100,
+                           help='Pages to fetch per run (default: 100)')
+        parser.add_argument('--page-size', type=int, default=40,
+                           help='Games per page (default: 40)')
+        parser.add_argument('--workers', type=int, default=16,
+                           help='Threads, or the most in-flight requests of the async engine (default: 16)')
+        parser.add_argument('--latency', type=float, default=0.1,
+                           help='Stub latency per request in seconds (default: 0.1)')
+        parser.add_argument('--server-concurrency', type=int, default=0,
+                           help='Stub answers 429 above this many in-flight requests, 0 for no limit (default: 0)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                           help='Fraction of stub requests failing with 503 (default: 0)')
+
+    def handle(self, *args, **kwargs):
+        pages, page_size, workers = kwargs['pages'], kwargs['page_size'], kwargs['workers']
+        self.stdout.write(f"페이지 {pages}개 x {page_size}개, 작업자 {workers}, 스텁 지연 {kwargs['latency']}초, "
+                          f"스텁 동시 요청 제한 {kwargs['server_concurrency'] or '없음'}, 오류율 {kwargs['error_rate']}")
+
+        for engine in ('threads', 'async'):
+            server = start_stub_server(
+                latency=kwargs['latency'],
+                error_rate=kwargs['error_rate'],
+                catalog_size=pages * page_size,
+                max_concurrency=kwargs['server_concurrency'],
+                seed=0,
+            )
+            try:
+                summary, client_stats = self.run_engine(engine, server.base_url, pages, page_size, workers)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            fetch = summary['stages'][0]
+            self.stdout.write(self.style.SUCCESS(
+                f"{engine}: {fetch['items']}페이지 {summary['wall_seconds']}초, "
+                f"{fetch['per_second']} 페이지/초 ({summary['stages'][1]['per_second']} 게임/초), "
+                f"실패 {fetch['errors']}개, 재시도 {client_stats['retries']}회, 응답 {client_stats['statuses']}"
+            ))
+            if 'concurrency' in client_stats:
+                self.stdout.write(f"  동시 요청 수: {client_stats['concurrency']}")
+
+    def run_engine(self, engine, base_url, pages, page_size, workers):
+        if engine == 'async':
+            client = AsyncRawgClient(
+                base_url=base_url, api_key='benchmark', rate_limit=0,
+                concurrency=AdaptiveConcurrency(initial=min(4, workers), maximum=workers),
+            )
+
+            async def fetch_page(page):
+                return await client.games_page(page, page_size=page_size)
+            options = {
+                'fetch_page': fetch_page,
+                'fetch_concurrency': lambda: client.concurrency.current,
+                'fetch_cleanup': client.close,
+            }
+        else:
+            client = RawgClient(base_url=base_url, api_key='benchmark', rate_limit=0, pool_size=workers)
+            options = {'fetch_page': lambda page: client.games_page(page, page_size=page_size)}
+
+        pipeline = FetchPipeline(
+            parse_page=parse_page,
+            write_batch=lambda games: True,
+            pages=range(1, pages + 1),
+            workers=workers,
+            queue_size=workers * 2,
+            **options,
+        )
+        summary = pipeline.run()
+        if engine == 'threads':
+            client.close()
+        return summary, client.stats()
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from games.rawg_stub import DEFAULT_PAGE_SIZE, start_stub_server
+import io
+import itertools
+import json
+import math
+import os
+import shutil
+import tempfile
+
+
+@contextmanager
+def throwaway_database():
+    """Point the default connection at a new, migrated test database and destroy it afterwards"""
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    directory = tempfile.mkdtemp(prefix='benchmark_fetch_game_data_')
+    if connection.vendor == 'sqlite':
+        # a file rather than the in-memory default, shared by the fetch pipeline's writer thread
+        test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class Command(BaseCommand):
+    help = ('Run fetch_game_data against a local RAWG stub over a matrix of --workers and --batch-size values '
+            'and report per-stage metrics (every run writes into its own throwaway test database)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16],
+                           help='--workers values to try (default: 4 8 16)')
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[50, 100, 500],
+                           help='--batch-size values to try (default: 50 100 500)')
+        parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                           help='fetch_game_data engine (default: threads)')
+        parser.add_argument('--repeat', type=int, default=1,
+                           help='Runs per combination (default: 1)')
+        parser.add_argument('--catalog-size', type=int, default=4000,
+                           help=f'Games served by the stub, {DEFAULT_PAGE_SIZE} per page (default: 4000)')
+        parser.add_argument('--latency', type=float, default=0.05,
+                           help='Stub latency per request in seconds (default: 0.05)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                           help='Fraction of stub requests failing with 503 (default: 0)')
+        parser.add_argument('--server-concurrency', type=int, default=0,
+                           help='Stub answers 429 above this many in-flight requests, 0 for no limit (default: 0)')
+        parser.add_argument('--output', metavar='PATH',
+                           help='Write the metrics of every run to PATH as a JSON list')
+
+    def handle(self, *args, **kwargs):
+        catalog_size = kwargs['catalog_size']
+        self.stdout.write(f"합성 게임 {catalog_size}개 (페이지 {math.ceil(catalog_size / DEFAULT_PAGE_SIZE)}개), "
+                          f"엔진 {kwargs['engine']}, 스텁 지연 {kwargs['latency']}초, 오류율 {kwargs['error_rate']}, "
+                          f"스텁 동시 요청 제한 {kwargs['server_concurrency'] or '없음'}")
+        self.stdout.write("workers batch  games/s   fetch p50/p95 ms  parse ms/page  write p50/p95 ms  "
+                          "raw/parsed queue avg  retries")
+
+        results = []
+        combinations = itertools.product(kwargs['workers'], kwargs['batch_sizes'], range(kwargs['repeat']))
+        for workers, batch_size, _ in combinations:
+            metrics = self.run_once(workers, batch_size, kwargs)
+            results.append(metrics)
+            self.stdout.write(self.format_row(metrics))
+
+        best = max(results, key=lambda metrics: metrics['games']['per_second'])
+        self.stdout.write(self.style.SUCCESS(
+            f"최고 처리량: --workers {best['workers']} --batch-size {best['batch_size']} "
+            f"({best['games']['per_second']} 게임/초)"
+        ))
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"실행 지표 저장: {kwargs['output']}")
+
+    def run_once(self, workers, batch_size, kwargs):
+        """One fetch_game_data run into an empty throwaway database; the live database is never touched"""
+        catalog_size = kwargs['catalog_size']
+        server = start_stub_server(
+            latency=kwargs['latency'],
+            error_rate=kwargs['error_rate'],
+            catalog_size=catalog_size,
+            max_concurrency=kwargs['server_concurrency'],
+            seed=0,
+        )
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            with throwaway_database(), override_settings(RAWG_API_BASE_URL=server.base_url):
+                call_command(
+                    'fetch_game_data',
+                    workers=workers,
+                    batch_size=batch_size,
+                    engine=kwargs['engine'],
+                    max_pages=math.ceil(catalog_size / DEFAULT_PAGE_SIZE),
+                    rate_limit=0,
+                    metrics_json=path,
+                    stdout=io.StringIO(),
+                )
+            with open(path) as f:
+                metrics = json.load(f)
+        finally:
+            os.remove(path)
+            server.shutdown()
+            server.server_close()
+        metrics['stub'] = {'requests': server.request_count, 'errors': server.error_count,
+                           'throttled': server.throttled_count}
+        return metrics
+
+    def format_row(self, metrics):
+        stages = {stage['stage']: stage for stage in metrics['rounds'][0]['stages']}
+        queues = metrics['rounds'][0]['queues']
+        fetch, parse, write = (stages[name]['timings'] for name in ('fetch', 'parse', 'write'))
+        return (f"{metrics['workers']:>7} {metrics['batch_size']:>5} {metrics['games']['per_second']:>8.1f}"
+                f"   {fetch.get('p50_ms', '-'):>7}/{fetch.get('p95_ms', '-'):<8}"
+                f"  {parse.get('avg_ms', '-'):>13}"
+                f"  {write.get('p50_ms', '-'):>7}/{write.get('p95_ms', '-'):<8}"
+                f"  {queues['raw_pages']['avg']:>9}/{queues['parsed_pages']['avg']:<10}"
+                f"  {metrics['rawg']['retries']:>7}")
@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.signals import post_save
+from games import search, signals
+from games.ingest import upsert_games
+from games.management.commands.fetch_game_data import Command as FetchCommand
+from games.models import Game
+from games.rawg_stub import list_game
+from games.tags import sync_game_tags
+import time
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def game_save_signals_disconnected():
+    """Game.save() without the games.signals receivers, which the previous write path did not have"""
+    receivers = [signals.index_game_on_save, signals.sync_tags_on_save, signals.bump_catalog_on_save]
+    for receiver in receivers:
+        post_save.disconnect(receiver, sender=Game)
+    try:
+        yield
+    finally:
+        for receiver in receivers:
+            post_save.connect(receiver, sender=Game)
+
+
+def save_per_row(games_data):
+    """
+    The previous fetch_game_data write path: exists() + save() per game.
+    Tags and the search index are updated once per batch, as upsert_games does.
+    """
+    saved_games = []
+    with transaction.atomic(), game_save_signals_disconnected():
+        for game_data in games_data:
+            if not Game.objects.filter(id=game_data['id']).exists():
+                game = Game(**game_data)
+                game.save()
+                saved_games.append(game)
+        sync_game_tags(saved_games)
+        search.index_games(saved_games)
+
+
+class Command(BaseCommand):
+    help = 'Compare games/sec of the per-row save and the bulk upsert used by fetch_game_data (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=5000,
+                           help='Number of synthetic games to write (default: 5000)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                           help='Games per batch, as in fetch_game_data (default: 100)')
+        parser.add_argument('--first-id', type=int, default=900000000,
+                           help='First synthetic game id, away from real RAWG ids (default: 900000000)')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        parser = FetchCommand()
+        games = [
+            parser.process_game(list_game(game_id))
+            for game_id in range(kwargs['first_id'], kwargs['first_id'] + kwargs['games'])
+        ]
+        batches = [games[i:i + batch_size] for i in range(0, len(games), batch_size)]
+        self.stdout.write(f"합성 게임 {len(games)}개, 배치 크기 {batch_size}")
+
+        # 새 게임 삽입과 같은 게임 재수집 두 경우를 각각 측정
+        # (per-row 방식은 기존 게임을 건너뛰고, upsert는 갱신함)
+        for label, save in (('per-row exists()+save()', save_per_row), ('bulk upsert', upsert_games)):
+            insert_rate, update_rate = self.measure(save, batches, len(games))
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: 삽입 {insert_rate:.0f} 게임/초, 재실행 {update_rate:.0f} 게임/초"
+            ))
+
+    def measure(self, save, batches, total):
+        rates = []
+        try:
+            with transaction.atomic():
+                for _ in range(2):  # 1회차: 모두 새 게임, 2회차: 모두 기존 게임
+                    start_time = time.perf_counter()
+                    for batch in batches:
+                        save(batch)
+                    rates.append(total / (time.perf_counter() - start_time))
+                raise Rollback
+        except Rollback:
+            pass
+        return rates
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from games import similarity
+
+
+class Command(BaseCommand):
+    help = 'Precompute the top-K similar games of every game (genre/platform/store overlap)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=similarity.DEFAULT_TOP_K,
+                           help=f'Neighbours stored per game (default: {similarity.DEFAULT_TOP_K})')
+        parser.add_argument('--block-size', type=int, default=None,
+                           help='Distinct tag profiles scored per block (default: derived from --memory-mb)')
+        parser.add_argument('--memory-mb', type=int, default=similarity.DEFAULT_MEMORY_MB,
+                           help=f'Memory budget for one score block in MB (default: {similarity.DEFAULT_MEMORY_MB})')
+
+    def handle(self, *args, **kwargs):
+        last_percent = [-1]
+
+        def progress(done, total):
+            percent = done * 100 // total
+            if percent // 10 != last_percent[0] // 10:
+                last_percent[0] = percent
+                self.stdout.write(f"진행 상황: {done}/{total} ({percent}%)")
+
+        try:
+            stats = similarity.rebuild_similar_games(
+                top_k=kwargs['top_k'],
+                block_size=kwargs['block_size'],
+                memory_mb=kwargs['memory_mb'],
+                progress=progress,
+            )
+        except similarity.MemoryBudgetError as e:
+            raise CommandError(f"메모리 예산 부족: {e} (--memory-mb를 늘리세요)")
+        self.stdout.write(self.style.SUCCESS(
+            f"유사 게임 계산 완료: 게임 {stats['games']}개, 고유 태그 조합 {stats['profiles']}개, 특성 {stats['features']}개, "
+            f"저장 {stats['rows']}행, 블록 크기 {stats['block_size']} "
+            f"(특성 행렬 {stats['feature_seconds']:.2f}초, 점수 계산 {stats['score_seconds']:.2f}초, "
+            f"저장 {stats['write_seconds']:.2f}초, 전체 {stats['total_seconds']:.2f}초)"
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from games.catalog_index import CatalogIndex
+from games.versioning import get_catalog_version
+import time
+
+
+class Command(BaseCommand):
+    help = 'Build the in-process catalog index once and report its size and query latency'
+
+    def handle(self, *args, **kwargs):
+        start_time = time.time()
+        index = CatalogIndex.build(get_catalog_version())
+        if index is None:
+            self.stdout.write(self.style.WARNING("게임 수가 GAME_CATALOG_INDEX_MAX_GAMES를 초과하여 인덱스를 만들지 않았습니다"))
+            return
+        build_elapsed = time.time() - start_time
+
+        stats = index.stats()
+        self.stdout.write(self.style.SUCCESS(f"인덱스 구축: 게임 {stats['games']}개 ({build_elapsed:.2f}초)"))
+        self.stdout.write(self.style.SUCCESS(f"메모리 사용량: {stats['memory_bytes'] / 1024 / 1024:.1f} MB"))
+        for facet, count in stats['facet_values'].items():
+            self.stdout.write(f"  {facet}: 값 {count}개")
+
+        # 대표 쿼리 지연 시간 (필터 없음 / 가장 흔한 장르)
+        queries = [({}, 0)]
+        if index.facets['genres']:
+            top_genre = max(index.facets['genres'], key=lambda name: index.facets['genres'][name].bit_count())
+            queries.append(({'genres': top_genre}, 0))
+            queries.append(({'genres': top_genre}, 5000))
+        for filters, offset in queries:
+            start_time = time.perf_counter()
+            _, total = index.query(filters, '-metacritic_score', offset, 50)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            self.stdout.write(f"  query {filters} offset={offset}: {total}개 일치, {elapsed_ms:.3f}ms")
@@ -0,0 +1,215 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from games.models import Game, RawgLookupMiss
+from games.negative_cache import active_misses, clear_misses, purge_resolved, record_misses
+from games.rawg import RawgClient
+import os
+from dotenv import load_dotenv
+import concurrent.futures
+import datetime
+import json
+import threading
+import time
+
+load_dotenv()
+
+
+class Command(BaseCommand):
+    help = 'Fetch missing game descriptions (and screenshots) from the RAWG detail API in bulk, resumably'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=5,
+                           help='Number of worker threads to use (default: 5)')
+        parser.add_argument('--rate-limit', type=float, default=5.0,
+                           help='Maximum RAWG requests per second, 0 for no limit (default: 5)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                           help='Games fetched and written per bulk update (default: 100)')
+        parser.add_argument('--limit', type=int, default=None,
+                           help='Stop after this many games (default: all)')
+        parser.add_argument('--screenshots', action='store_true',
+                           help='Also fetch screenshots for games that have none')
+        parser.add_argument('--checkpoint', default=settings.GAME_ENRICH_CHECKPOINT,
+                           help='Checkpoint file used to resume an interrupted run (default: GAME_ENRICH_CHECKPOINT)')
+        parser.add_argument('--restart', action='store_true',
+                           help='Ignore the existing checkpoint and start from the first game')
+
+    def log_info(self, message):
+        """로그 메시지 출력 (시간 포함)"""
+        current_time = datetime.datetime.now().strftime('%H:%M:%S')
+        thread_id = threading.current_thread().name
+        self.stdout.write(self.style.SUCCESS(f"[{current_time}][{thread_id}] {message}"))
+
+    def log_warning(self, message):
+        """경고 로그 메시지 출력"""
+        current_time = datetime.datetime.now().strftime('%H:%M:%S')
+        thread_id = threading.current_thread().name
+        self.stdout.write(self.style.WARNING(f"[{current_time}][{thread_id}] {message}"))
+
+    def log_error(self, message):
+        """에러 로그 메시지 출력"""
+        current_time = datetime.datetime.now().strftime('%H:%M:%S')
+        thread_id = threading.current_thread().name
+        self.stdout.write(self.style.ERROR(f"[{current_time}][{thread_id}] {message}"))
+
+    # ---- checkpoint ------------------------------------------------------
+
+    def load_checkpoint(self, path):
+        """체크포인트 파일 읽기 (없으면 처음부터)"""
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self.new_checkpoint()
+
+    def new_checkpoint(self):
+        return {'last_id': 0, 'failed_ids': [], 'processed': 0, 'updated': 0,
+                'screenshots': self.fetch_screenshots}
+
+    def save_checkpoint(self, path, checkpoint):
+        """체크포인트 파일 원자적 저장 (임시 파일 작성 후 교체)"""
+        checkpoint['saved_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+    # ---- fetching ----------------------------------------------------------
+
+    def fetch_game(self, game):
+        """게임 하나의 description (및 screenshots) 조회 (쓰레드에서 실행)"""
+        result = {'id': game.id, 'description': None, 'screenshots': None, 'ok': True, 'miss': None}
+        if not game.description:
+            details = self.client.game_details(game.id)
+            if details is None:
+                result['ok'] = False
+                result['miss'] = RawgLookupMiss.REASON_ERROR
+            else:
+                result['description'] = details.get('description') or None
+                if not result['description']:
+                    result['miss'] = RawgLookupMiss.REASON_EMPTY
+        if self.fetch_screenshots and not game.screenshots:
+            screenshots = self.client.game_screenshots(game.id)
+            if screenshots is None:
+                result['ok'] = False
+            else:
+                result['screenshots'] = screenshots or None
+        return result
+
+    def save_results(self, results):
+        """조회 결과를 필드별 bulk_update로 저장 (설명/스크린샷만 변경, 카탈로그 버전 갱신 불필요)"""
+        # bulk_update는 auto_now를 적용하지 않으므로 updated_at을 직접 지정 (ETag/Last-Modified 갱신)
+        now = timezone.now()
+        descriptions = [Game(id=r['id'], description=r['description'], updated_at=now)
+                        for r in results if r['description']]
+        screenshots = [Game(id=r['id'], screenshots=r['screenshots'], updated_at=now)
+                       for r in results if r['screenshots']]
+        with transaction.atomic():
+            if descriptions:
+                Game.objects.bulk_update(descriptions, ['description', 'updated_at'])
+            if screenshots:
+                Game.objects.bulk_update(screenshots, ['screenshots', 'updated_at'])
+            # 상세 페이지 백필과 같은 네거티브 캐시 갱신 (빈 응답/실패 기록, 성공 시 제거)
+            record_misses({r['id']: r['miss'] for r in results if r['miss']})
+            clear_misses(game.id for game in descriptions)
+        return len({game.id for game in descriptions + screenshots})
+
+    # ---- main ----------------------------------------------------------------
+
+    def missing_details(self):
+        """description(옵션: screenshots)이 비어 있는 게임 쿼리셋"""
+        missing = Q(description__isnull=True) | Q(description='')
+        if self.fetch_screenshots:
+            missing |= Q(screenshots__isnull=True) | Q(screenshots=[])
+        # 네거티브 캐시의 retry_after가 지나지 않은 게임은 제외
+        return (Game.objects.filter(missing).exclude(id__in=active_misses())
+                .only('id', 'description', 'screenshots').order_by('id'))
+
+    def handle(self, *args, **kwargs):
+        start_time = time.time()
+        workers = kwargs['workers']
+        batch_size = kwargs['batch_size']
+        limit = kwargs['limit']
+        checkpoint_path = kwargs['checkpoint']
+        self.fetch_screenshots = kwargs['screenshots']
+        # 작업자 수만큼 연결을 유지하는 공유 RAWG 클라이언트 (토큰 버킷 속도 제한, 재시도)
+        self.client = RawgClient(pool_size=workers, rate_limit=kwargs['rate_limit'])
+
+        if not self.client.api_key:
+            self.log_error("RAWG_API_KEY가 설정되지 않았습니다")
+            return
+
+        if kwargs['restart'] and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        checkpoint = self.load_checkpoint(checkpoint_path)
+        if checkpoint.get('screenshots') != self.fetch_screenshots:
+            # 조회 대상 조건이 달라지면 이전 진행 위치는 의미가 없으므로 처음부터
+            self.log_warning("체크포인트의 --screenshots 설정이 달라 처음부터 시작합니다")
+            checkpoint = self.new_checkpoint()
+
+        self.log_info(f"==== 게임 상세 정보 보강 시작 ====")
+        self.log_info(f"API: {self.client.base_url}, 작업자 수: {workers}, "
+                      f"초당 요청 제한: {kwargs['rate_limit']}, 배치 크기: {batch_size}")
+        if checkpoint['last_id']:
+            self.log_info(f"체크포인트에서 재개: 게임 ID {checkpoint['last_id']} 이후, "
+                          f"이전 실패 {len(checkpoint['failed_ids'])}개 재시도")
+
+        # 만료된 항목은 시도 횟수(백오프)를 유지하도록 남기고, 이미 설명이 채워진 게임의 항목만 삭제
+        purged = purge_resolved()
+        if purged:
+            self.log_info(f"해결된 네거티브 캐시 항목 {purged}개 삭제")
+
+        missing = self.missing_details()
+        retry_ids = checkpoint['failed_ids']
+        checkpoint['failed_ids'] = []
+        processed = updated = failed = 0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            while limit is None or processed < limit:
+                size = batch_size if limit is None else min(batch_size, limit - processed)
+                if retry_ids:
+                    # 이전 실행에서 실패한 게임 먼저 재시도
+                    batch = list(missing.filter(id__in=retry_ids[:size]))
+                    retry_ids = retry_ids[size:]
+                    from_checkpoint = False
+                else:
+                    batch = list(missing.filter(id__gt=checkpoint['last_id'])[:size])
+                    from_checkpoint = True
+                    if not batch:
+                        break
+                if not batch:
+                    continue
+
+                results = list(executor.map(self.fetch_game, batch))
+                batch_updated = self.save_results(results)
+                batch_failed = [r['id'] for r in results if not r['ok']]
+
+                processed += len(batch)
+                updated += batch_updated
+                failed += len(batch_failed)
+                checkpoint['failed_ids'].extend(batch_failed)
+                if from_checkpoint:
+                    checkpoint['last_id'] = batch[-1].id
+                checkpoint['processed'] += len(batch)
+                checkpoint['updated'] += batch_updated
+                self.save_checkpoint(checkpoint_path, checkpoint)
+
+                elapsed = time.time() - start_time
+                self.log_info(f"{processed}개 처리 (갱신 {updated}, 실패 {failed}) - "
+                              f"마지막 ID {checkpoint['last_id']}, {processed / elapsed:.1f} 게임/초")
+
+        # 남은 재시도 대상은 다음 실행으로 넘김
+        checkpoint['failed_ids'].extend(retry_ids)
+        self.save_checkpoint(checkpoint_path, checkpoint)
+
+        elapsed = time.time() - start_time
+        self.log_info(f"==== 게임 상세 정보 보강 완료 ====")
+        self.log_info(f"처리 {processed}개, 갱신 {updated}개, 실패 {failed}개 ({elapsed:.2f}초)")
+        self.log_info(f"RAWG 요청 통계: {self.client.stats()}")
+        self.client.close()
+        if checkpoint['failed_ids']:
+            self.log_warning(f"실패한 게임 {len(checkpoint['failed_ids'])}개는 다음 실행에서 재시도됩니다")
+        self.log_info(f"남은 보강 대상: {self.missing_details().count()}개")
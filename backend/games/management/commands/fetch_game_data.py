@@ -1,20 +1,29 @@
-from django.core.management.base import BaseCommand
-import requests
-from games.models import Game
-import os
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from games.checkpoints import get_checkpoint, parse_updated, save_checkpoint
+from games.models import FetchRun, Game
+from games.rawg import RawgClient
+from games.rawg_async import AdaptiveConcurrency, AsyncRawgClient
+from games import journal, reload
+from games.archive import DEFAULT_SEGMENT_PAGES, PageArchive, find_segments, segments_size
+from games.ingest import upsert_games
+from games.parsing import parse_game, parse_segment
+from games.pipeline import FetchPipeline, StageStats
+from games.versioning import bump_catalog_version
 from dotenv import load_dotenv
-import concurrent.futures
-import json
-from django.db import transaction
 import time
+import concurrent.futures
 import datetime
+import itertools
+import json
+import math
+from collections import deque
 import threading
-import sys
-from queue import Queue
-import random
 
 load_dotenv()
 
+SYNC_NAME = 'fetch_game_data'
+
 class Command(BaseCommand):
     help = 'Fetch and save game data from API using threads for faster processing'
 
@@ -22,11 +31,41 @@ class Command(BaseCommand):
         parser.add_argument('--max-pages', type=int, default=1000,
                            help='Maximum number of pages to fetch (default: 1000)')
         parser.add_argument('--workers', type=int, default=10,
-                           help='Number of worker threads to use (default: 10)')
+                           help='Number of fetch threads, or the most in-flight requests with --engine async (default: 10)')
+        parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                           help='threads: one blocking request per thread; async: one event loop whose '
+                                'in-flight requests adapt to RAWG latency and 429s (default: threads)')
         parser.add_argument('--batch-size', type=int, default=100,
                            help='Batch size for saving games (default: 100)')
+        parser.add_argument('--flush-interval', type=float, default=2.0,
+                           help='Save a partial batch once its oldest game waited this many seconds (default: 2)')
+        parser.add_argument('--queue-size', type=int, default=None,
+                           help='Pages buffered between pipeline stages (default: 2 x --workers)')
         parser.add_argument('--start-page', type=int, default=1,
                            help='Start page number (default: 1)')
+        parser.add_argument('--rate-limit', type=float, default=10.0,
+                           help='Maximum RAWG requests per second across all threads, 0 for no limit (default: 10)')
+        parser.add_argument('--incremental', action='store_true',
+                           help='Fetch only games updated since the stored sync checkpoint, newest first')
+        parser.add_argument('--since',
+                           help='Incremental sync from this ISO date/time instead of the checkpoint (implies --incremental)')
+        parser.add_argument('--resume', type=int, metavar='RUN',
+                           help='Continue run RUN: fetch only its pages not yet stored, with its page range and --since')
+        parser.add_argument('--retry-rounds', type=int, default=2,
+                           help='Times failed pages are fetched again before the run ends (default: 2)')
+        parser.add_argument('--archive', metavar='DIR',
+                           help='Also write every fetched page, as received, to gzip-compressed JSONL segments under DIR')
+        parser.add_argument('--archive-segment-pages', type=int, default=DEFAULT_SEGMENT_PAGES,
+                           help=f'Pages per archive segment file (default: {DEFAULT_SEGMENT_PAGES})')
+        parser.add_argument('--replay', metavar='PATH',
+                           help='Parse and save archived pages from PATH (a run directory or an archive root) '
+                                'with --workers processes, without calling RAWG')
+        parser.add_argument('--full-reload', action='store_true',
+                           help='Load the whole catalog into a staging table and swap it in at the end (SQLite); '
+                                'games no longer listed are removed unless a review or wishlist entry refers to them')
+        parser.add_argument('--metrics-json', metavar='PATH',
+                           help='Write the run summary with per-stage timings, latency histograms and queue depths '
+                                'to PATH as JSON')
 
     def log_info(self, message):
         """로그 메시지 출력 (시간 포함)"""
@@ -34,6 +73,11 @@ class Command(BaseCommand):
         thread_id = threading.current_thread().name
         self.stdout.write(self.style.SUCCESS(f"[{current_time}][{thread_id}] {message}"))
 
+    def log_debug(self, message):
+        """페이지/배치 단위 상세 로그 (-v 2 이상에서만 출력)"""
+        if self.verbosity >= 2:
+            self.log_info(message)
+
     def log_warning(self, message):
         """경고 로그 메시지 출력"""
         current_time = datetime.datetime.now().strftime('%H:%M:%S')
@@ -50,24 +94,21 @@ class Command(BaseCommand):
         """Fetch a single page of game data"""
         try:
             thread_name = threading.current_thread().name
-            self.log_info(f"쓰레드 {thread_name}가 페이지 {page_index if page_index is not None else '?'} 요청 중: {url}")
-            
-            # 쓰레드별 요청 간 약간의 무작위 지연을 추가하여 API 서버 부하 분산
-            time.sleep(random.uniform(0.1, 0.5))
+            self.log_debug(f"쓰레드 {thread_name}가 페이지 {page_index if page_index is not None else '?'} 요청 중: {url}")
             
+            # 공유 RAWG 클라이언트 (연결 재사용, 토큰 버킷 속도 제한, 429/5xx 재시도)
             start_time = time.time()
-            response = requests.get(url)
+            response = self.client.get(url)
             elapsed = time.time() - start_time
             
+            if response is None:
+                self.log_error(f"API 요청 실패 (응답 없음) for URL: {url}")
+                return None
             if response.status_code == 200:
                 data = response.json()
                 result_count = len(data['results'])
-                self.log_info(f"페이지 {page_index if page_index is not None else '?'} 데이터 {result_count}개 수신 완료 ({elapsed:.2f}초)")
-                return {
-                    'results': data['results'],
-                    'next': data.get('next'),
-                    'page_index': page_index
-                }
+                self.log_debug(f"페이지 {page_index if page_index is not None else '?'} 데이터 {result_count}개 수신 완료 ({elapsed:.2f}초)")
+                return data  # RAWG 원본 응답 그대로 (count, next, results; --archive에 그대로 기록)
             else:
                 self.log_error(f"API 요청 실패: {response.status_code} for URL: {url}")
                 return None
@@ -75,194 +116,384 @@ class Command(BaseCommand):
             self.log_error(f"Error fetching page {url}: {str(e)}")
             return None
 
+    async def fetch_page_async(self, page_index):
+        """Fetch a single page of game data on the event loop (--engine async)"""
+        url = self.page_url(page_index)
+        self.log_debug(f"페이지 {page_index} 비동기 요청 중 (동시 요청 한도 {self.client.concurrency.current}): {url}")
+        start_time = time.time()
+        data = await self.client.get_json(url)
+        elapsed = time.time() - start_time
+        if data is None:
+            self.log_error(f"API 요청 실패 for URL: {url}")
+            return None
+        self.log_debug(f"페이지 {page_index} 데이터 {len(data['results'])}개 수신 완료 ({elapsed:.2f}초)")
+        return data
+
     def process_game(self, game_data):
-        """Process a single game data and return a Game model instance"""
+        """Process a single game data and return the Game fields (see games.parsing)"""
         try:
-            # 게임 ID 가져오기
-            game_id = game_data.get('id')
-            if not game_id:
+            processed_game = parse_game(game_data)
+            if processed_game is None:
                 self.log_warning(f"Game without ID: {game_data.get('name', 'unknown')}")
-                return None
-
-            # genres에서 name만 추출, 기본값은 빈 문자열
-            genres = [genre.get('name', '') for genre in game_data.get('genres', [])]
-
-            # platforms에서 name만 추출, 기본값은 빈 문자열
-            platforms = [platform.get('platform', {}).get('name', '') for platform in game_data.get('platforms', [])]
-
-            # stores에서 name만 추출, 기본값은 빈 문자열
-            store_names = [store_data.get('store', {}).get('name', '') for store_data in game_data.get('stores', [])]
-
-            # short_screenshots에서 image만 추출, 기본값은 빈 문자열
-            screenshots = [screenshot.get('image', '') for screenshot in game_data.get('short_screenshots', [])]
-            
-            # esrb_rating 처리: 없으면 빈 문자열로 설정
-            esrb_rating = game_data.get('esrb_rating')
-            esrb_rating = esrb_rating.get('name', '') if esrb_rating else ''
-
-            # Game 데이터 생성 (아직 저장하지 않음)
-            return {
-                'id': game_id,  # API에서 제공하는 ID 사용
-                'name': game_data.get('name', ''),
-                'released': game_data.get('released', ''),
-                'background_image': game_data.get('background_image', ''),
-                'rating': game_data.get('rating', 0),
-                'metacritic_score': game_data.get('metacritic', 0),
-                'playtime': game_data.get('playtime', 0),
-                'platforms': json.dumps(platforms),  # JSON 문자열로 저장
-                'genres': json.dumps(genres),        # JSON 문자열로 저장
-                'stores': ','.join(store_names),     # 쉼표로 구분된 문자열로 저장
-                'esrb_rating': esrb_rating,
-                'screenshots': json.dumps(screenshots)  # JSON 문자열로 저장
-            }
+            return processed_game
         except Exception as e:
             self.log_error(f"Error processing game {game_data.get('name', 'unknown')}: {str(e)}")
             return None
 
     def save_games_batch(self, games_data, batch_index=None):
-        """Save a batch of games to the database with transaction"""
-        saved_count = 0
+        """Upsert a batch of games and return (inserted, updated), or None if it failed"""
         start_time = time.time()
         try:
-            new_games = 0
-            existing_games = 0
-            with transaction.atomic():
-                for game_data in games_data:
-                    if game_data:
-                        game_id = game_data['id']
-                        if not Game.objects.filter(id=game_id).exists():
-                            game = Game(**game_data)
-                            game.save()
-                            saved_count += 1
-                            new_games += 1
-                        else:
-                            existing_games += 1
-            
+            # 한 번의 INSERT ... ON CONFLICT로 새 게임 추가 및 기존 게임 갱신 (--full-reload면 스테이징 테이블에)
+            inserted, updated = self.reload.load(games_data) if self.reload else upsert_games(games_data)
+
             elapsed = time.time() - start_time
-            self.log_info(f"배치 {batch_index if batch_index is not None else '?'} 저장 완료: "
-                         f"새 게임 {new_games}개, 이미 존재하는 게임 {existing_games}개 ({elapsed:.2f}초)")
-            return saved_count
+            self.log_debug(f"배치 {batch_index if batch_index is not None else '?'} 저장 완료: "
+                         f"새 게임 {inserted}개, 갱신된 게임 {updated}개 ({elapsed:.2f}초)")
+            return inserted, updated
         except Exception as e:
             self.log_error(f"Error saving batch: {str(e)}")
-            return 0
-    
-    def fetch_and_process_page(self, page_info):
-        """페이지를 가져와서 처리하는 통합 함수 (쓰레드에서 실행)"""
-        url = page_info['url']
-        page_index = page_info['page_index']
-        
-        page_data = self.fetch_page(url, page_index)
-        if not page_data:
             return None
-            
-        result = {'page_index': page_index, 'processed_games': []}
-        
-        # 게임 데이터 처리
+    
+    def page_url(self, page_index):
+        separator = '&' if '?' in self.base_url else '?'
+        return f"{self.base_url}{separator}page={page_index}" if page_index > 1 else self.base_url
+
+    def parse_page(self, page_index, page_data):
+        """페이지를 게임 데이터로 변환 (파싱 단계 쓰레드에서 실행): (게임 목록, 마지막 페이지 여부)"""
+        if self.archive:
+            self.archive.write(page_index, page_data)
+        processed_games = []
+        reached_seen = False
         for game_data in page_data['results']:
+            updated = parse_updated(game_data.get('updated'))
+            if self.since and updated and updated <= self.since:
+                # updated 내림차순이므로 이후는 모두 이미 동기화된 데이터
+                reached_seen = True
+                continue
+            if updated and (self.max_updated is None or updated > self.max_updated):
+                self.max_updated = updated
             processed_game = self.process_game(game_data)
             if processed_game:
-                result['processed_games'].append(processed_game)
-                
-        return result
+                processed_games.append(processed_game)
 
-    def handle(self, *args, **kwargs):
+        self.log_debug(f"페이지 {page_index}에서 {len(processed_games)}개 게임 처리 완료")
+        if reached_seen:
+            self.log_info(f"페이지 {page_index}에서 이미 동기화된 데이터에 도달, 이후 페이지는 요청하지 않음")
+        return processed_games, reached_seen or page_data['next'] is None or not page_data['results']
+
+    def page_count(self, page_index, page_data):
+        """첫 응답의 count와 페이지 크기로 마지막 페이지 번호 계산 (모르면 None)"""
+        if page_data['next'] is None or not page_data['results']:
+            return page_index
+        count = page_data.get('count')
+        if not count:
+            return None
+        page_size = len(page_data['results'])  # 마지막이 아닌 페이지이므로 전체 페이지 크기
+        return math.ceil(count / page_size)
+
+    def write_batch(self, games):
+        """배치 저장 (저장 단계 쓰레드에서 실행)"""
+        self.batch_count += 1
+        result = self.save_games_batch(games, self.batch_count)
+        if result is None:
+            return False
+        inserted, updated = result
+        self.inserted_count += inserted
+        self.updated_count += updated
+        return True
+
+    def log_progress(self, pipeline):
+        stats = pipeline.stats
+        elapsed_time = time.time() - self.start_time
+        saved_count = stats['write'].items
+        games_per_second = saved_count / elapsed_time if elapsed_time > 0 else 0
+        self.log_info(f"진행 상황: 페이지 {stats['fetch'].items}개 수신, 게임 {stats['parse'].items}개 처리, "
+                      f"{saved_count}개 저장 (평균 속도: {games_per_second:.1f} 게임/초), "
+                      f"대기 큐 {pipeline.queue_depths()}")
+
+    def resolve_since(self, kwargs):
+        """증분 동기화 기준 시각 (전체 수집이면 None)"""
+        if kwargs['since']:
+            since = parse_updated(kwargs['since'])
+            if since is None:
+                raise CommandError(f"--since 형식이 올바르지 않습니다: {kwargs['since']} (예: 2024-05-01 또는 2024-05-01T12:00:00)")
+            return since
+        if kwargs['incremental']:
+            checkpoint = get_checkpoint(SYNC_NAME)
+            if checkpoint is None or checkpoint.last_updated is None:
+                raise CommandError("저장된 동기화 체크포인트가 없습니다. --since로 시작 시각을 지정하세요")
+            return checkpoint.last_updated
+        return None
+
+    def run_pipeline(self, pages, fetch_options, kwargs):
+        """주어진 페이지들을 수집 -> 파싱 -> 저장 파이프라인으로 처리하고 결과를 실행 기록에 남김"""
+        workers = kwargs['workers']
+        # 단계 사이 큐는 크기 제한으로 역압 적용
+        pipeline = FetchPipeline(
+            **fetch_options,
+            parse_page=self.parse_page,
+            write_batch=self.write_batch,
+            pages=pages,
+            workers=workers,
+            queue_size=kwargs['queue_size'] or workers * 2,
+            batch_size=kwargs['batch_size'],
+            flush_interval=kwargs['flush_interval'],
+            on_pages=lambda done, failed: journal.record_pages(self.run, done, failed),
+            page_count=self.page_count,
+        )
+        summary = pipeline.run(progress=self.log_progress)
+        self.rounds.append(summary)
+        self.pages_fetched += pipeline.stats['fetch'].items
+        page_stats = summary['pages']
+        for key in self.page_totals:
+            self.page_totals[key] += page_stats[key]
+        self.log_info(f"페이지 요청 {page_stats['requested']}/{page_stats['planned']}개 "
+                      f"(조기 종료로 절약 {page_stats['avoided']}개, 목록 끝 이후 요청 {page_stats['past_stop']}개, "
+                      f"취소 {page_stats['cancelled']}개)")
+        if pipeline.feeder.stop_page is not None:
+            journal.set_stop_page(self.run, pipeline.feeder.stop_page)
+            self.log_info(f"페이지 {pipeline.feeder.stop_page}에서 목록 끝(또는 이미 동기화된 데이터)에 도달하여 수집 중단")
+        return summary
+
+    def check_full_reload(self, kwargs):
+        """--full-reload는 처음부터 끝까지 새로 받는 실행에만 사용 가능"""
+        if not reload.is_supported():
+            raise CommandError("--full-reload는 SQLite 데이터베이스에서만 지원됩니다")
+        for option in ('incremental', 'since', 'resume', 'replay'):
+            if kwargs[option]:
+                raise CommandError(f"--full-reload는 --{option}과 함께 사용할 수 없습니다")
+        if kwargs['start_page'] != 1:
+            raise CommandError("--full-reload는 1페이지부터 수집해야 합니다")
+
+    def finish_full_reload(self, complete):
+        """스테이징 테이블 마무리 후 교체 (빠진 페이지가 있으면 버리고 기존 카탈로그 유지)"""
+        if not complete:
+            self.reload.drop()
+            self.log_warning("목록 끝까지 빠짐없이 받지 못해 스테이징 테이블을 버리고 기존 카탈로그를 유지합니다")
+            return False
+        self.log_info("스테이징 테이블 인덱스/검색 색인 생성 중...")
+        stats = self.reload.prepare()
+        self.log_info(f"스테이징 준비 완료: 게임 {stats['loaded']}개 (새 게임 {stats['new']}개), {stats['prepare_seconds']}초")
+        stats = self.reload.swap()
+        self.log_info(f"카탈로그 테이블 교체 완료 ({stats['swap_seconds']}초): 목록에서 사라진 게임 {stats['removed']}개 삭제, "
+                      f"리뷰/위시리스트가 참조하는 게임 {stats['carried_over']}개 유지, "
+                      f"태그가 바뀐 게임 {stats['tags_changed']}개의 태그 연결 갱신")
+        # 교체가 커밋되자마자 카탈로그 버전 갱신 (웹 프로세스가 새 테이블 기준으로 인덱스 재구축)
+        catalog_version = bump_catalog_version()
+        self.log_info(f"카탈로그 버전 갱신: {catalog_version}")
+        self.inserted_count = stats['new']
+        self.updated_count = stats['loaded'] - stats['new']
+        return True
+
+    def replay(self, kwargs):
+        """--replay: 보관된 페이지를 프로세스 풀에서 파싱하고 DB에 저장 (네트워크 사용 없음)"""
+        segments = find_segments(kwargs['replay'])
+        if not segments:
+            raise CommandError(f"보관된 페이지 세그먼트가 없습니다: {kwargs['replay']}")
+        workers = kwargs['workers']
+        batch_size = kwargs['batch_size']
+        self.log_info(f"==== 보관 데이터 재처리 시작 ====")
+        self.log_info(f"세그먼트 {len(segments)}개 ({segments_size(segments) / 1024 / 1024:.1f} MB), "
+                      f"파싱 프로세스 {workers}개, 배치 크기 {batch_size}")
+
+        started_at = datetime.datetime.now()
         start_time = time.time()
+        pages = games = errors = failed_batches = 0
+        write_seconds = 0.0
+        # 수집 경로와 같은 형식의 단계별 지표 (parse: 다음 세그먼트 결과를 기다린 시간, write: 배치 저장 시간)
+        parse_stats = StageStats('parse', 'pages', 'segment')
+        write_stats = StageStats('write', 'games', 'batch')
+        # 세그먼트 단위로 프로세스에 분배하되, 저장은 세그먼트 순서대로 (나중 데이터가 마지막에 반영)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            segment_iter = iter(segments)
+            for segment in itertools.islice(segment_iter, workers * 2):
+                pending.append(pool.submit(parse_segment, str(segment)))
+            while pending:
+                wait_started = time.time()
+                segment_pages, segment_games, segment_errors = pending.popleft().result()
+                waited = time.time() - wait_started
+                parse_stats.add(items=segment_pages, busy=waited, errors=segment_errors, batches=1, timing=waited)
+                next_segment = next(segment_iter, None)
+                if next_segment is not None:
+                    pending.append(pool.submit(parse_segment, str(next_segment)))
+                pages += segment_pages
+                errors += segment_errors
+
+                write_started = time.time()
+                for start in range(0, len(segment_games), batch_size):
+                    batch = segment_games[start:start + batch_size]
+                    batch_started = time.time()
+                    saved = self.write_batch(batch)
+                    batch_seconds = time.time() - batch_started
+                    write_stats.add(items=len(batch), busy=batch_seconds, errors=0 if saved else 1,
+                                    batches=1, timing=batch_seconds)
+                    if not saved:
+                        failed_batches += 1
+                write_seconds += time.time() - write_started
+                games += len(segment_games)
+                elapsed = time.time() - start_time
+                self.log_info(f"페이지 {pages}개, 게임 {games}개 처리 ({games / elapsed if elapsed else 0:.1f} 게임/초)")
+
+        elapsed = time.time() - start_time
+        self.log_info(f"==== 보관 데이터 재처리 완료 ====")
+        self.log_info(f"페이지 {pages}개, 게임 {games}개 (파싱 오류 {errors}개), "
+                      f"새 게임 {self.inserted_count}개, 갱신된 게임 {self.updated_count}개")
+        self.log_info(f"총 {elapsed:.2f}초 (저장 {write_seconds:.2f}초), 처리 속도: {games / elapsed if elapsed else 0:.2f} 게임/초")
+        if failed_batches:
+            self.log_warning(f"저장에 실패한 배치 {failed_batches}개")
+
+        catalog_version = bump_catalog_version()
+        self.log_info(f"카탈로그 버전 갱신: {catalog_version}")
+
+        if kwargs['metrics_json']:
+            saved_count = self.inserted_count + self.updated_count
+            page_stats = {'fetched': 0, 'missing': 0, 'replayed': pages, 'parse_errors': errors}
+            self.write_metrics(kwargs['metrics_json'], {
+                'run': None,
+                'status': FetchRun.STATUS_INCOMPLETE if failed_batches else FetchRun.STATUS_COMPLETED,
+                'engine': 'replay',
+                'workers': workers,
+                'batch_size': batch_size,
+                'queue_size': workers * 2,  # 미리 파싱을 맡겨 두는 세그먼트 수
+                'flush_interval': None,
+                'rate_limit': None,
+                'since': None,
+                'replay': str(kwargs['replay']),
+                'segments': len(segments),
+                'started_at': started_at.isoformat(),
+                'wall_seconds': round(elapsed, 3),
+                'games': {
+                    'saved': saved_count,
+                    'inserted': self.inserted_count,
+                    'updated': self.updated_count,
+                    'per_second': round(saved_count / elapsed, 2) if elapsed > 0 else 0.0,
+                },
+                'pages': page_stats,
+                'rounds': [{
+                    'wall_seconds': round(elapsed, 3),
+                    'pages': page_stats,
+                    'stages': [parse_stats.as_dict(elapsed), write_stats.as_dict(elapsed)],
+                    'queues': {},
+                }],
+                'rawg': None,
+                'full_reload': None,
+            })
+
+    def write_metrics(self, path, metrics):
+        """--metrics-json: 실행 지표를 JSON 파일로 저장"""
+        with open(path, 'w') as f:
+            json.dump(metrics, f, indent=2)
+        self.log_info(f"실행 지표 저장: {path}")
+
+    def handle(self, *args, **kwargs):
+        self.start_time = time.time()
+        self.verbosity = kwargs['verbosity']
         total_start_time = datetime.datetime.now()
         
         max_pages = kwargs['max_pages']
         workers = kwargs['workers']
         batch_size = kwargs['batch_size']
         start_page = kwargs['start_page']
+        self.max_updated = None
+        self.batch_count = 0
+        self.inserted_count = 0
+        self.updated_count = 0
+        self.pages_fetched = 0
+        self.archive = None
+        self.reload = None
+        if kwargs['full_reload']:
+            self.check_full_reload(kwargs)
+        if kwargs['replay']:
+            return self.replay(kwargs)
+        self.page_totals = {'planned': 0, 'requested': 0, 'avoided': 0, 'past_stop': 0, 'cancelled': 0}
+        self.rounds = []  # 파이프라인 실행별 요약 (첫 실행 + 재시도)
+
+        # 실행 기록: 새 실행을 만들거나, --resume이면 이전 실행의 범위와 기준 시각을 그대로 사용
+        if kwargs['resume']:
+            self.run = journal.get_run(kwargs['resume'])
+            if self.run is None:
+                raise CommandError(f"실행 ID {kwargs['resume']}를 찾을 수 없습니다")
+            start_page, end_page, self.since = self.run.first_page, self.run.last_page, self.run.since
+        else:
+            self.since = self.resolve_since(kwargs)
+            end_page = start_page + max_pages - 1
+            self.run = journal.start_run(start_page, end_page, self.since)
+        pages = journal.needed_pages(self.run)
         
         self.log_info(f"==== 데이터 수집 시작 ====")
-        self.log_info(f"최대 페이지 수: {max_pages}, 작업자 수: {workers}, 배치 크기: {batch_size}, 시작 페이지: {start_page}")
+        self.log_info(f"최대 페이지 수: {end_page - start_page + 1}, 작업자 수: {workers}, 배치 크기: {batch_size}, 시작 페이지: {start_page}")
         self.log_info(f"시작 시간: {total_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        if kwargs['resume']:
+            self.log_info(f"실행 ID {self.run.id} 재개: 남은 페이지 {len(pages)}개만 수집 (--start-page/--max-pages/--since 무시)")
+        else:
+            self.log_info(f"실행 ID {self.run.id} (중단되면 --resume {self.run.id}로 이어서 수집)")
+        if self.since:
+            self.log_info(f"증분 동기화: {self.since.isoformat()} 이후 갱신된 게임만 수집")
+        if kwargs['archive']:
+            self.archive = PageArchive(
+                kwargs['archive'], self.run.id, kwargs['archive_segment_pages'],
+                since=self.since, first_page=start_page, last_page=end_page, resumed=bool(kwargs['resume']),
+            )
+            self.log_info(f"원본 페이지 보관: {self.archive.directory}")
+        if kwargs['full_reload']:
+            self.reload = reload.StagingCatalog()
+            self.reload.create()
+            self.log_info(f"전체 재적재: {reload.STAGING_TABLE} 테이블에 적재한 뒤 마지막에 교체 (그동안 기존 카탈로그 유지)")
 
-        # 공유 데이터 구조
-        result_queue = Queue()  # 처리된 게임 데이터를 저장할 큐
-        api_key = os.getenv('RAWG_API_KEY')
+        engine = kwargs['engine']
+        if engine == 'async':
+            # 이벤트 루프 하나로 요청을 동시에 보내고, 지연/429에 따라 동시 요청 수를 AIMD로 조절 (최대 --workers)
+            self.client = AsyncRawgClient(
+                concurrency=AdaptiveConcurrency(initial=min(4, workers), maximum=workers),
+                rate_limit=kwargs['rate_limit'],
+            )
+            fetch_options = {
+                'fetch_page': self.fetch_page_async,
+                'fetch_concurrency': lambda: self.client.concurrency.current,
+                'fetch_cleanup': self.client.close,
+            }
+        else:
+            # 작업자 수만큼 연결을 유지하는 공유 RAWG 클라이언트 (API 키는 요청 시 추가)
+            self.client = RawgClient(pool_size=workers, rate_limit=kwargs['rate_limit'])
+            fetch_options = {
+                'fetch_page': lambda page_index: self.fetch_page(self.page_url(page_index), page_index),
+            }
         
         # API 요청 URL 템플릿
-        base_url = f"https://api.rawg.io/api/games?key={api_key}"
-        
-        # 간단히 처리: 페이지 번호만 바꿔서 URL 생성
-        urls_to_fetch = []
-        end_page = start_page + max_pages - 1
-        
-        for page_index in range(start_page, end_page + 1):
-            page_url = f"{base_url}&page={page_index}" if page_index > 1 else base_url
-            urls_to_fetch.append({
-                'url': page_url,
-                'page_index': page_index
-            })
-        
-        total_pages = len(urls_to_fetch)
-        self.log_info(f"총 {total_pages}개 페이지 URL 준비 완료")
-        self.log_info(f"병렬 데이터 수집 시작...")
-
-        saved_count = 0
-        games_to_save = []
-        batch_count = 0
-        completed_count = 0
-
-        # 병렬 처리 시작
-        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-            # 작업 제출 (임의의 순서로 섞어서 처리)
-            page_infos = list(urls_to_fetch)  # 복사본 생성
-            random.shuffle(page_infos)  # 페이지 순서 무작위화 (API 서버 부하 분산)
-            
-            self.log_info(f"총 {len(page_infos)}개 페이지 작업을 {workers}개 쓰레드에 할당")
-            
-            # 실제 쓰레드 풀에 작업 제출
-            future_to_page = {
-                executor.submit(self.fetch_and_process_page, page_info): page_info 
-                for page_info in page_infos
-            }
-            
-            # 작업 완료 상태 확인 로그
-            self.log_info(f"총 {len(future_to_page)}개 작업 제출 완료, 결과 수집 시작")
-            
-            # 완료된 작업 결과 수집
-            for future in concurrent.futures.as_completed(future_to_page):
-                page_info = future_to_page[future]
-                completed_count += 1
-                
-                # 진행 상황 표시
-                progress_percentage = (completed_count / total_pages) * 100
-                self.log_info(f"페이지 처리 진행 상황: {completed_count}/{total_pages} ({progress_percentage:.1f}%)")
-                
-                try:
-                    result = future.result()
-                    if result:
-                        processed_games = result['processed_games']
-                        page_idx = result['page_index']
-                        
-                        self.log_info(f"페이지 {page_idx}에서 {len(processed_games)}개 게임 처리 완료")
-                        
-                        # 처리된 게임 데이터 저장 목록에 추가
-                        games_to_save.extend(processed_games)
-                        
-                        # 배치 크기에 도달하면 저장
-                        while len(games_to_save) >= batch_size:
-                            batch_count += 1
-                            batch_to_save = games_to_save[:batch_size]
-                            games_to_save = games_to_save[batch_size:]
-                            
-                            batch_saved = self.save_games_batch(batch_to_save, batch_count)
-                            saved_count += batch_saved
-                            
-                            # 현재까지의 통계 출력
-                            elapsed_time = time.time() - start_time
-                            games_per_second = saved_count / elapsed_time if elapsed_time > 0 else 0
-                            self.log_info(f"현재까지 {saved_count}개 게임 저장 완료 (평균 속도: {games_per_second:.1f} 게임/초)")
-                except Exception as e:
-                    self.log_error(f"페이지 {page_info['page_index']} 처리 중 오류 발생: {str(e)}")
-
-        # 남은 게임 데이터 저장
-        if games_to_save:
-            batch_count += 1
-            batch_saved = self.save_games_batch(games_to_save, batch_count)
-            saved_count += batch_saved
+        self.base_url = f"{self.client.base_url}/games"
+        if self.since:
+            # updated 날짜 범위로 거르고 최신순으로 받아 이미 본 데이터에서 멈춤
+            until = (timezone.now() + datetime.timedelta(days=1)).date()
+            self.base_url += f"?ordering=-updated&updated={self.since.date()},{until}"
+
+        if engine == 'async':
+            self.log_info(f"페이지 {len(pages)}개 파이프라인 시작 (비동기 수집 최대 {workers}개 동시 요청, 파싱 1개, 저장 1개)")
+        else:
+            self.log_info(f"페이지 {len(pages)}개 파이프라인 시작 (수집 쓰레드 {workers}개, 파싱 1개, 저장 1개)")
+        summary = self.run_pipeline(pages, fetch_options, kwargs)
+
+        # 실패한 페이지 자동 재시도
+        for retry_round in range(1, kwargs['retry_rounds'] + 1):
+            failed = journal.failed_pages(self.run)
+            if not failed:
+                break
+            self.log_warning(f"실패한 페이지 {len(failed)}개 재시도 ({retry_round}/{kwargs['retry_rounds']}): {failed[:20]}")
+            self.run_pipeline(failed, fetch_options, kwargs)
+
+        journal.finish_run(self.run, self.max_updated)
+        if self.archive:
+            self.archive.close()
+            self.log_info(f"원본 페이지 {self.archive.pages}개 보관 완료: {self.archive.directory} "
+                          f"(세그먼트 {self.archive.segments}개, {self.archive.size_bytes() / 1024 / 1024:.1f} MB)")
+        missing = journal.needed_pages(self.run)
+        # 목록 끝(또는 이미 본 데이터)까지 빠진 페이지 없이 도달했는지
+        # (첫 페이지의 count로 정한 마지막 페이지가 --max-pages 범위 밖이면 끝까지 받은 것이 아님)
+        covered = (self.run.stop_page is not None and self.run.stop_page <= self.run.last_page
+                   and (self.since is not None or self.run.first_page == 1))
+        swapped = self.reload is not None and self.finish_full_reload(covered and not missing)
+        saved_count = self.inserted_count + self.updated_count
 
         # 최종 결과 출력
         total_end_time = datetime.datetime.now()
@@ -270,7 +501,11 @@ class Command(BaseCommand):
         total_elapsed_seconds = total_elapsed.total_seconds()
         
         self.log_info(f"==== 데이터 수집 완료 ====")
-        self.log_info(f"총 {saved_count}개 게임 데이터 저장 (총 {total_pages}개 페이지에서)")
+        self.log_info(f"총 {saved_count}개 게임 데이터 저장 (총 {self.pages_fetched}개 페이지에서)")
+        self.log_info(f"새 게임 {self.inserted_count}개, 갱신된 게임 {self.updated_count}개")
+        self.log_info(f"페이지 요청 {self.page_totals['requested']}개, 실제 페이지 수 확인/조기 종료로 절약한 요청 "
+                      f"{self.page_totals['avoided']}개 (목록 끝 이후 요청 {self.page_totals['past_stop']}개, "
+                      f"취소 {self.page_totals['cancelled']}개)")
         self.log_info(f"시작 시간: {total_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         self.log_info(f"종료 시간: {total_end_time.strftime('%Y-%m-%d %H:%M:%S')}")
         self.log_info(f"총 소요 시간: {total_elapsed}")
@@ -278,7 +513,73 @@ class Command(BaseCommand):
         if total_elapsed_seconds > 0:
             games_per_second = saved_count / total_elapsed_seconds
             self.log_info(f"처리 속도: {games_per_second:.2f} 게임/초")
+
+        # 단계별 처리량 (busy: 작업 시간, blocked: 다음 단계 큐가 가득 차서 기다린 시간)
+        self.log_info("단계별 처리량 (재시도 제외):")
+        for stage in summary['stages']:
+            timings = stage['timings']
+            self.log_info(f"  {stage['stage']}: {stage['items']} {stage['unit']}, {stage['per_second']}/초, "
+                          f"작업 {stage['busy_seconds']}초, 대기 {stage['blocked_seconds']}초, 오류 {stage['errors']}개, "
+                          f"{'배치' if stage['timing_unit'] == 'batch' else '페이지'}당 p50 {timings.get('p50_ms', '-')}ms "
+                          f"/ p95 {timings.get('p95_ms', '-')}ms")
+        for name, depth in summary['queues'].items():
+            self.log_info(f"  큐 {name}: 평균 {depth['avg']}/{depth['capacity']}, 최대 {depth['max']}, "
+                          f"가득 찬 비율 {depth['full_ratio']:.0%}")
+        client_stats = self.client.stats()
+        self.log_info(f"RAWG 요청 통계: {client_stats}")
+        if engine == 'threads':
+            self.client.close()  # 비동기 클라이언트는 수집 단계가 끝날 때 이벤트 루프 안에서 닫힘
+
+        if missing:
+            self.log_warning(f"실행 ID {self.run.id}: 저장되지 않은 페이지 {len(missing)}개 남음 "
+                             f"(예: {missing[:20]}), --resume {self.run.id}로 이어서 수집하세요")
+        else:
+            self.log_info(f"실행 ID {self.run.id}: 모든 페이지 저장 완료")
+
+        # 동기화 체크포인트: 목록 끝(또는 이미 본 데이터)까지 빠진 페이지 없이 도달한 경우에만 전진
+        if covered and not missing:
+            high_water = save_checkpoint(SYNC_NAME, self.run.started_at, self.run.max_updated or self.since)
+            self.log_info(f"동기화 체크포인트 저장: {high_water.isoformat() if high_water else '-'}")
+        elif self.since or missing:
+            self.log_warning(f"동기화 체크포인트를 갱신하지 않음 (남은 페이지 {len(missing)}개, "
+                             f"{'목록 끝 도달' if covered else '최대 페이지 수에서 중단'})")
         
+        # 카탈로그 버전 갱신 (웹 프로세스의 인메모리 인덱스 재구축 트리거, 테이블 교체 시에는 교체 직후 이미 갱신함)
+        if not swapped:
+            catalog_version = bump_catalog_version()
+            self.log_info(f"카탈로그 버전 갱신: {catalog_version}")
+
+        if kwargs['metrics_json']:
+            metrics = {
+                'run': self.run.id,
+                'status': self.run.status,
+                'engine': engine,
+                'workers': workers,
+                'batch_size': batch_size,
+                'queue_size': kwargs['queue_size'] or workers * 2,
+                'flush_interval': kwargs['flush_interval'],
+                'rate_limit': kwargs['rate_limit'],
+                'since': self.since.isoformat() if self.since else None,
+                'started_at': total_start_time.isoformat(),
+                'wall_seconds': round(total_elapsed_seconds, 3),
+                'games': {
+                    'saved': saved_count,
+                    'inserted': self.inserted_count,
+                    'updated': self.updated_count,
+                    'per_second': round(saved_count / total_elapsed_seconds, 2) if total_elapsed_seconds > 0 else 0.0,
+                },
+                'pages': {**self.page_totals, 'fetched': self.pages_fetched, 'missing': len(missing)},
+                'rounds': self.rounds,  # 첫 파이프라인 실행, 이후 재시도 라운드
+                'rawg': client_stats,
+                'full_reload': self.reload.stats if self.reload else None,
+            }
+            self.write_metrics(kwargs['metrics_json'], metrics)
+
+        if swapped:
+            # 교체된 이전 테이블 삭제, 인덱스 이름을 모델과 같게 (그동안은 스테이징 인덱스 사용)
+            self.reload.cleanup()
+            self.log_info(f"이전 카탈로그 테이블 삭제 및 인덱스 정리 완료 ({self.reload.stats['cleanup_seconds']}초)")
+
         # DB 상태 요약
         total_games = Game.objects.count()
-        self.log_info(f"데이터베이스 내 총 게임 수: {total_games}개")
\ No newline at end of file
+        self.log_info(f"데이터베이스 내 총 게임 수: {total_games}개")
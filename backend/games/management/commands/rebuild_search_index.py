@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from games import search
+from games.versioning import bump_catalog_version
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for game names from the games table'
+
+    def handle(self, *args, **kwargs):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING("현재 데이터베이스는 전문 검색 인덱스를 지원하지 않습니다 (icontains 검색 사용)"))
+            return
+
+        start_time = time.time()
+        indexed_count = search.rebuild_index()
+        elapsed = time.time() - start_time
+        self.stdout.write(self.style.SUCCESS(f"검색 인덱스 재구축 완료: 게임 {indexed_count}개 ({elapsed:.2f}초)"))
+        # 검색 결과가 바뀌었을 수 있으므로 캐시된 목록 응답 무효화
+        self.stdout.write(f"카탈로그 버전 갱신: {bump_catalog_version()}")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from games.rawg_stub import RawgStubServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local stub of the RAWG API for testing the RAWG commands offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1',
+                           help='Host to bind (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8001,
+                           help='Port to bind (default: 8001)')
+        parser.add_argument('--latency', type=float, default=0.0,
+                           help='Seconds to wait before each response (default: 0)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                           help='Fraction of requests answered with --error-status (default: 0)')
+        parser.add_argument('--error-status', type=int, default=503,
+                           help='HTTP status of injected failures, e.g. 429 (default: 503)')
+        parser.add_argument('--catalog-size', type=int, default=10000,
+                           help='Number of games served by the list endpoint (default: 10000)')
+        parser.add_argument('--first-id', type=int, default=1,
+                           help='Id of the first game in the list (default: 1)')
+        parser.add_argument('--max-concurrency', type=int, default=0,
+                           help='Answer 429 (Retry-After: 1) above this many in-flight requests, 0 for no limit (default: 0)')
+        parser.add_argument('--seed', type=int, default=None,
+                           help='Random seed for error injection')
+
+    def handle(self, *args, **kwargs):
+        server = RawgStubServer(
+            (kwargs['host'], kwargs['port']),
+            latency=kwargs['latency'],
+            error_rate=kwargs['error_rate'],
+            error_status=kwargs['error_status'],
+            catalog_size=kwargs['catalog_size'],
+            seed=kwargs['seed'],
+            max_concurrency=kwargs['max_concurrency'],
+            first_id=kwargs['first_id'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"RAWG 스텁 서버 실행 중: {server.base_url} (RAWG_API_BASE_URL로 지정하세요)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"요청 {server.request_count}개 처리 (오류 주입 {server.error_count}개, 동시 요청 제한 429 {server.throttled_count}개)")
@@ -0,0 +1,110 @@
+# Generated by Django 4.2 on 2026-10-18 10:13
+
+import json
+
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _json_names(value):
+    # Columns hold json.dumps() output; tolerate empty or malformed rows
+    try:
+        names = json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return []
+    return [name for name in names if isinstance(name, str) and name]
+
+
+def _comma_names(value):
+    return [name for name in value.split(',') if name] if value else []
+
+
+def backfill_game_tags(apps, schema_editor):
+    """Populate Genre/Platform/Store and their links from the string columns"""
+    Game = apps.get_model('games', 'Game')
+    specs = [
+        # (tag model, through model, tag FK column, parser, source column)
+        (apps.get_model('games', 'Genre'), Game.genre_tags.through, 'genre_id', _json_names, 'genres'),
+        (apps.get_model('games', 'Platform'), Game.platform_tags.through, 'platform_id', _json_names, 'platforms'),
+        (apps.get_model('games', 'Store'), Game.store_tags.through, 'store_id', _comma_names, 'stores'),
+    ]
+    tag_ids = {spec[0]: {} for spec in specs}
+
+    def flush(rows):
+        for model, through, column, parse, source in specs:
+            ids = tag_ids[model]
+            names_by_game = {row['id']: set(parse(row[source])) for row in rows}
+            missing = {name for names in names_by_game.values() for name in names} - ids.keys()
+            if missing:
+                model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+                ids.update(model.objects.filter(name__in=missing).values_list('name', 'id'))
+            through.objects.bulk_create(
+                [
+                    through(game_id=game_id, **{column: ids[name]})
+                    for game_id, names in names_by_game.items()
+                    for name in names
+                ],
+                ignore_conflicts=True,
+            )
+
+    rows = []
+    for row in Game.objects.values('id', 'genres', 'platforms', 'stores').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        rows.append(row)
+        if len(rows) >= BACKFILL_BATCH_SIZE:
+            flush(rows)
+            rows = []
+    if rows:
+        flush(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0003_alter_game_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Platform',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Store',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['metacritic_score', 'id'], name='game_metacritic_idx'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='genre_tags',
+            field=models.ManyToManyField(blank=True, related_name='games', to='games.genre'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='platform_tags',
+            field=models.ManyToManyField(blank=True, related_name='games', to='games.platform'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='store_tags',
+            field=models.ManyToManyField(blank=True, related_name='games', to='games.store'),
+        ),
+        migrations.RunPython(backfill_game_tags, migrations.RunPython.noop),
+    ]
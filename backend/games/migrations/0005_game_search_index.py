@@ -0,0 +1,50 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import games.fields
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # rowid mirrors Game.id; prefix indexes make "term*" queries cheap
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS games_game_fts USING fts5("
+            "name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        schema_editor.execute('INSERT INTO games_game_fts(rowid, name) SELECT id, name FROM games_game')
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS game_name_fts_idx "
+            "ON games_game USING GIN (to_tsvector('simple', name))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS games_game_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS game_name_fts_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0004_game_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSearchEntry',
+            fields=[
+                ('game', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='games.game')),
+                ('name', games.fields.FullTextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'games_game_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 4.2 on 2026-10-18 14:02
+
+import json
+
+from django.db import migrations, models
+
+
+CONVERT_BATCH_SIZE = 1000
+JSON_COLUMNS = ('platforms', 'genres', 'screenshots')
+
+
+def _json_list(value):
+    # Columns hold json.dumps() output; empty or malformed rows become NULL
+    try:
+        items = json.loads(value) if value else None
+    except (TypeError, ValueError):
+        return None
+    return items if isinstance(items, list) else None
+
+
+def _comma_list(value):
+    return [name for name in value.split(',') if name] if value else None
+
+
+def _dumps(items):
+    return None if items is None else json.dumps(items)
+
+
+def _convert(apps, convert_row, fields):
+    Game = apps.get_model('games', 'Game')
+    batch = []
+    for game in Game.objects.only('id', *fields).iterator(chunk_size=CONVERT_BATCH_SIZE):
+        if convert_row(game):
+            batch.append(game)
+        if len(batch) >= CONVERT_BATCH_SIZE:
+            Game.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Game.objects.bulk_update(batch, fields)
+
+
+def text_to_json(apps, schema_editor):
+    """
+    Rewrite every row as valid JSON text before the columns change type:
+    comma-separated stores become a JSON list, blank or malformed values NULL.
+    """
+    fields = JSON_COLUMNS + ('stores',)
+
+    def convert_row(game):
+        old = [getattr(game, field) for field in fields]
+        for field in JSON_COLUMNS:
+            setattr(game, field, _dumps(_json_list(getattr(game, field))))
+        game.stores = _dumps(_comma_list(game.stores))
+        return old != [getattr(game, field) for field in fields]
+
+    _convert(apps, convert_row, fields)
+
+
+def json_to_text(apps, schema_editor):
+    """Turn the stores JSON list back into a comma-separated string"""
+    def convert_row(game):
+        stores = _json_list(game.stores)
+        game.stores = ','.join(stores) if stores else None
+        return True
+
+    _convert(apps, convert_row, ('stores',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_catalogversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(text_to_json, json_to_text),
+        migrations.AlterField(
+            model_name='game',
+            name='genres',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='platforms',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='screenshots',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='stores',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_game_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawgLookupMiss',
+            fields=[
+                ('game_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('reason', models.CharField(choices=[('empty', 'No description'), ('error', 'Request failed')], max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=1)),
+                ('retry_after', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 16:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_game_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='games.game')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='games.game')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='similargame',
+            constraint=models.UniqueConstraint(fields=('game', 'rank'), name='similar_game_rank_unique'),
+        ),
+    ]
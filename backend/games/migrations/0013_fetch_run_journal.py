@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0012_synccheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('incomplete', 'Incomplete')], default='running', max_length=10)),
+                ('first_page', models.PositiveIntegerField()),
+                ('last_page', models.PositiveIntegerField()),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('stop_page', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_updated', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FetchRunPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('done', 'Done'), ('failed', 'Failed')], max_length=10)),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='games.fetchrun')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='fetchrunpage',
+            constraint=models.UniqueConstraint(fields=('run', 'page'), name='fetch_run_page_unique'),
+        ),
+    ]
@@ -1,9 +1,34 @@
 from django.db import models
-import json
+
+from .fields import FullTextField
 
 # Create your models here.
 
 
+class Genre(models.Model):
+    """Normalized genre name, linked to games for DB-side filtering"""
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Platform(models.Model):
+    """Normalized platform name, linked to games for DB-side filtering"""
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Store(models.Model):
+    """Normalized store name, linked to games for DB-side filtering"""
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Game(models.Model):
     id = models.IntegerField(primary_key=True)  # ID field that doesn't auto-increment
     name = models.CharField(max_length=255)
@@ -12,36 +37,180 @@ class Game(models.Model):
     rating = models.FloatField(default=0, null=True, blank=True)  # rating allows NULL
     metacritic_score = models.IntegerField(default=0, null=True, blank=True)  # metacritic_score allows NULL
     playtime = models.IntegerField(default=0, null=True, blank=True)  # playtime allows NULL
-    platforms = models.TextField(null=True, blank=True)  # platforms stored as string
-    genres = models.TextField(null=True, blank=True)  # genres stored as string
-    stores = models.CharField(max_length=255, null=True, blank=True)  # stores allows NULL
+    platforms = models.JSONField(null=True, blank=True)  # list of platform names
+    genres = models.JSONField(null=True, blank=True)  # list of genre names
+    stores = models.JSONField(null=True, blank=True)  # list of store names
     esrb_rating = models.CharField(max_length=255, null=True, blank=True)  # esrb_rating allows NULL
     description = models.TextField(null=True, blank=True)  # description allows NULL
-    screenshots = models.TextField(null=True, blank=True)  # screenshots stored as string
+    screenshots = models.JSONField(null=True, blank=True)  # list of screenshot URLs
+    updated_at = models.DateTimeField(auto_now=True)  # last modification (Last-Modified/ETag of the detail endpoint)
+
+    # Normalized copies of genres/platforms/stores (kept in sync by games.tags)
+    genre_tags = models.ManyToManyField(Genre, related_name='games', blank=True)
+    platform_tags = models.ManyToManyField(Platform, related_name='games', blank=True)
+    store_tags = models.ManyToManyField(Store, related_name='games', blank=True)
+
+    class Meta:
+        indexes = [
+            # Catalog sort keys, each with id as the tiebreaker (see games.views.ORDERINGS);
+            # every index also serves the descending order via a backward scan
+            models.Index(fields=['metacritic_score', 'id'], name='game_metacritic_idx'),
+            models.Index(fields=['rating', 'id'], name='game_rating_idx'),
+            models.Index(fields=['released', 'id'], name='game_released_idx'),
+            models.Index(fields=['playtime', 'id'], name='game_playtime_idx'),
+            models.Index(fields=['name', 'id'], name='game_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     def get_platforms(self):
-        # Parse JSON string into a list
-        return json.loads(self.platforms) if self.platforms else []
+        # NULL is returned as an empty list
+        return self.platforms or []
 
     def set_platforms(self, platforms):
-        # Convert list to JSON string for storage
-        self.platforms = json.dumps(platforms)
+        self.platforms = list(platforms)
 
     def get_genres(self):
-        # Parse JSON string into a list
-        return json.loads(self.genres) if self.genres else []
+        # NULL is returned as an empty list
+        return self.genres or []
 
     def set_genres(self, genres):
-        # Convert list to JSON string for storage
-        self.genres = json.dumps(genres)
+        self.genres = list(genres)
+
+    def get_stores(self):
+        # NULL is returned as an empty list
+        return self.stores or []
+
+    def set_stores(self, stores):
+        self.stores = list(stores)
 
     def get_screenshots(self):
-        # Parse JSON string into a list
-        return json.loads(self.screenshots) if self.screenshots else []
+        # NULL is returned as an empty list
+        return self.screenshots or []
 
     def set_screenshots(self, screenshots):
-        # Convert list to JSON string for storage
-        self.screenshots = json.dumps(screenshots)
+        self.screenshots = list(screenshots)
+
+
+class CatalogVersion(models.Model):
+    """Single-row counter bumped whenever the game catalog changes (see games.versioning)"""
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catalog version {self.version}"
+
+
+class SimilarGame(models.Model):
+    """Precomputed top-K neighbour of a game by genre/platform/store overlap (see games.similarity)"""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='similar_entries')
+    similar = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()  # 1 = most similar
+    score = models.FloatField()  # cosine similarity of the weighted tag vectors
+
+    class Meta:
+        constraints = [
+            # Also the index behind GET /games/<id>/similar/ (game_id = ? ORDER BY rank)
+            models.UniqueConstraint(fields=['game', 'rank'], name='similar_game_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.game_id} -> {self.similar_id} ({self.score:.3f})"
+
+
+class RawgLookupMiss(models.Model):
+    """Failed or empty RAWG detail lookup of a game, not retried before retry_after (see games.negative_cache)"""
+    REASON_EMPTY = 'empty'
+    REASON_ERROR = 'error'
+    REASON_CHOICES = [
+        (REASON_EMPTY, 'No description'),
+        (REASON_ERROR, 'Request failed'),
+    ]
+
+    game_id = models.IntegerField(primary_key=True)  # no FK: misses may outlive or precede the Game row
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    attempts = models.PositiveIntegerField(default=1)
+    retry_after = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Game {self.game_id}: {self.reason} (retry after {self.retry_after})"
+
+
+class SyncCheckpoint(models.Model):
+    """Progress of an incremental RAWG sync, keyed by the job name (see fetch_game_data --incremental)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)  # start of the last completed run
+    last_updated = models.DateTimeField(null=True, blank=True)  # highest RAWG `updated` stored so far
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: updated through {self.last_updated}"
+
+
+class FetchRun(models.Model):
+    """One fetch_game_data run and the page range it covers (see games.journal)"""
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_INCOMPLETE = 'incomplete'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_INCOMPLETE, 'Incomplete'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    first_page = models.PositiveIntegerField()
+    last_page = models.PositiveIntegerField()
+    since = models.DateTimeField(null=True, blank=True)  # incremental runs only
+    stop_page = models.PositiveIntegerField(null=True, blank=True)  # end of list / already synced data
+    max_updated = models.DateTimeField(null=True, blank=True)  # highest RAWG `updated` parsed
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Fetch run {self.id} (pages {self.first_page}-{self.last_page}, {self.status})"
+
+
+class FetchRunPage(models.Model):
+    """Journal entry of one page of a FetchRun: stored, or failed (and retried)"""
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run = models.ForeignKey(FetchRun, on_delete=models.CASCADE, related_name='pages')
+    page = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    games = models.PositiveIntegerField(default=0)  # games stored from the page
+    attempts = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'page'], name='fetch_run_page_unique'),
+        ]
+
+    def __str__(self):
+        return f"Run {self.run_id} page {self.page}: {self.status}"
+
+
+class GameSearchEntry(models.Model):
+    """Row of the SQLite FTS5 table behind game name search (see games.search)"""
+    game = models.OneToOneField(
+        Game,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_entry',
+    )
+    name = FullTextField()
+    rank = models.FloatField()  # FTS5 hidden column (bm25, lower is better)
+
+    class Meta:
+        managed = False
+        db_table = 'games_game_fts'
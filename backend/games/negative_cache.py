@@ -0,0 +1,90 @@
+"""
+Persisted negative cache for RAWG detail lookups.
+
+A lookup that finds no description, or fails, is stored as a
+RawgLookupMiss with a retry_after time, so views of a game RAWG cannot
+describe stop triggering an outbound call each. Empty answers are
+retried after RAWG_MISS_EMPTY_TTL; failures back off exponentially from
+RAWG_MISS_ERROR_TTL up to RAWG_MISS_MAX_TTL. An expired entry stays
+until a lookup succeeds, so repeated failures keep counting attempts; a
+successful lookup drops it.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Game, RawgLookupMiss
+
+
+def _ttl(reason, attempts):
+    if reason == RawgLookupMiss.REASON_EMPTY:
+        return settings.RAWG_MISS_EMPTY_TTL
+    return min(settings.RAWG_MISS_ERROR_TTL * 2 ** (attempts - 1), settings.RAWG_MISS_MAX_TTL)
+
+
+def active_misses():
+    """game_id values with a miss that has not reached its retry time, for queryset exclusion"""
+    return RawgLookupMiss.objects.filter(retry_after__gt=timezone.now()).values('game_id')
+
+
+def is_blocked(game_id):
+    """True while a recorded miss for `game_id` has not reached its retry time"""
+    return RawgLookupMiss.objects.filter(game_id=game_id, retry_after__gt=timezone.now()).exists()
+
+
+def record_miss(game_id, reason):
+    """Store (or extend) a miss and return its retry time"""
+    miss = RawgLookupMiss.objects.filter(game_id=game_id).first()
+    attempts = miss.attempts + 1 if miss else 1
+    retry_after = timezone.now() + timedelta(seconds=_ttl(reason, attempts))
+    RawgLookupMiss.objects.update_or_create(
+        game_id=game_id,
+        defaults={'reason': reason, 'attempts': attempts, 'retry_after': retry_after},
+    )
+    return retry_after
+
+
+def record_misses(misses):
+    """Bulk version of record_miss for {game_id: reason}"""
+    if not misses:
+        return
+    now = timezone.now()
+    previous = dict(RawgLookupMiss.objects.filter(game_id__in=misses).values_list('game_id', 'attempts'))
+    entries = []
+    for game_id, reason in misses.items():
+        attempts = previous.get(game_id, 0) + 1
+        entries.append(RawgLookupMiss(
+            game_id=game_id, reason=reason, attempts=attempts, updated_at=now,
+            retry_after=now + timedelta(seconds=_ttl(reason, attempts)),
+        ))
+    RawgLookupMiss.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['game_id'],
+        update_fields=['reason', 'attempts', 'retry_after', 'updated_at'],
+    )
+
+
+def clear_misses(game_ids):
+    """Forget misses of games whose lookup succeeded"""
+    RawgLookupMiss.objects.filter(game_id__in=list(game_ids)).delete()
+
+
+def purge_resolved():
+    """
+    Delete entries of games that got a description some other way (e.g. a
+    sync) and return how many were removed. Expired entries of games still
+    without one are kept: their attempts drive the backoff of the next miss.
+    """
+    described = Game.objects.exclude(description__isnull=True).exclude(description='').values('id')
+    deleted, _ = RawgLookupMiss.objects.filter(game_id__in=described).delete()
+    return deleted
+
+
+def stats():
+    now = timezone.now()
+    return {
+        'entries': RawgLookupMiss.objects.count(),
+        'active': RawgLookupMiss.objects.filter(retry_after__gt=now).count(),
+    }
@@ -0,0 +1,151 @@
+"""
+Keyset (cursor) pagination for the game catalog.
+
+Pages are addressed by the (sort value, id) of the row at the page edge
+instead of an OFFSET, so every page costs O(page size) on the
+(field, id) index and does not shift while new rows are inserted.
+NULL sort values are treated as the lowest value, which matches the
+order of SQLite's index (DESC puts them last, ASC puts them first).
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .versioning import get_catalog_version
+
+COUNT_CACHE_TIMEOUT = 60  # seconds
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, ValueError, UnicodeError):
+        raise InvalidCursor('Malformed cursor')
+    if not isinstance(payload, dict) or payload.get('d') not in ('next', 'prev') or 'id' not in payload:
+        raise InvalidCursor('Malformed cursor')
+    if not isinstance(payload['id'], int) or isinstance(payload['id'], bool):
+        raise InvalidCursor('Malformed cursor')
+    return payload
+
+
+def cached_count(queryset, key_data, timeout=COUNT_CACHE_TIMEOUT):
+    """COUNT(*) of a filtered queryset, cached per filter combination and catalog version"""
+    digest = hashlib.md5(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+    cache_key = f'games:count:{get_catalog_version()}:{digest}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout)
+    return count
+
+
+class KeysetPaginator:
+    """Cursor paginator over a queryset ordered on (field, id)"""
+
+    def __init__(self, field, descending=True, page_size=50):
+        self.field = field
+        self.descending = descending
+        self.page_size = page_size
+
+    @property
+    def ordering(self):
+        return f"-{self.field}" if self.descending else self.field
+
+    def _segments(self, toward_lower, value, pk, has_cursor):
+        """
+        Return [(filter, order_by), ...] to read in sequence. The non-NULL
+        and NULL parts are queried separately so each one is a plain range
+        seek on the (field, id) index instead of an OR across both.
+        """
+        field = self.field
+        not_null = Q(**{f'{field}__isnull': False})
+        is_null = Q(**{f'{field}__isnull': True})
+
+        if toward_lower:
+            order_by = (f'-{field}', '-id')
+            if not has_cursor:
+                return [(not_null, order_by), (is_null, order_by)]
+            if value is None:
+                return [(is_null & Q(id__lt=pk), order_by)]
+            after = Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | Q(id__lt=pk))
+            return [(after, order_by), (is_null, order_by)]
+
+        order_by = (field, 'id')
+        if not has_cursor:
+            return [(is_null, order_by), (not_null, order_by)]
+        if value is None:
+            return [(is_null & Q(id__gt=pk), order_by), (not_null, order_by)]
+        after = Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | Q(id__gt=pk))
+        return [(after, order_by)]
+
+    def _cursor_value(self, model, value):
+        """Coerce a decoded sort value to the ordering field's type (None stays NULL)"""
+        if value is None:
+            return None
+        field = model._meta.get_field(self.field)
+        is_text = field.get_internal_type() == 'CharField'
+        if isinstance(value, (dict, list, bool)) or (is_text and not isinstance(value, str)):
+            raise InvalidCursor('Cursor value does not match the ordering field')
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor('Cursor value does not match the ordering field')
+
+    def _cursor(self, row, direction):
+        return encode_cursor({
+            'o': self.ordering,
+            'v': getattr(row, self.field),
+            'id': row.pk,
+            'd': direction,
+        })
+
+    def paginate(self, queryset, token=None):
+        """Return (rows, next_cursor, prev_cursor) for the page after/before `token`"""
+        direction = 'next'
+        value = pk = None
+        if token:
+            payload = decode_cursor(token)
+            if payload.get('o') != self.ordering:
+                raise InvalidCursor('Cursor does not match the requested ordering')
+            direction, value, pk = payload['d'], payload.get('v'), payload['id']
+            value = self._cursor_value(queryset.model, value)
+
+        toward_lower = (direction == 'next') == self.descending
+        limit = self.page_size + 1  # one extra row tells whether more pages exist
+
+        rows = []
+        for condition, order_by in self._segments(toward_lower, value, pk, bool(token)):
+            remaining = limit - len(rows)
+            if remaining <= 0:
+                break
+            rows.extend(queryset.filter(condition).order_by(*order_by)[:remaining])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if direction == 'prev':
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+        if direction == 'next':
+            next_cursor = self._cursor(rows[-1], 'next') if has_more else None
+            prev_cursor = self._cursor(rows[0], 'prev') if token else None
+        else:
+            next_cursor = self._cursor(rows[-1], 'next')
+            prev_cursor = self._cursor(rows[0], 'prev') if has_more else None
+        return rows, next_cursor, prev_cursor
@@ -0,0 +1,73 @@
+"""
+RAWG list entries -> Game field dicts.
+
+Kept free of Django imports so that the replay mode of fetch_game_data
+can run it in worker processes (see games.archive).
+"""
+import gzip
+import json
+
+
+def parse_game(game_data):
+    """
+    Field dict of a Game (including id) for one /games list entry, or None
+    if the entry has no id. Malformed entries raise.
+    """
+    # 게임 ID 가져오기
+    game_id = game_data.get('id')
+    if not game_id:
+        return None
+
+    # genres에서 name만 추출, 기본값은 빈 문자열
+    genres = [genre.get('name', '') for genre in game_data.get('genres', [])]
+
+    # platforms에서 name만 추출, 기본값은 빈 문자열
+    platforms = [platform.get('platform', {}).get('name', '') for platform in game_data.get('platforms', [])]
+
+    # stores에서 name만 추출, 기본값은 빈 문자열
+    store_names = [store_data.get('store', {}).get('name', '') for store_data in game_data.get('stores', [])]
+
+    # short_screenshots에서 image만 추출, 기본값은 빈 문자열
+    screenshots = [screenshot.get('image', '') for screenshot in game_data.get('short_screenshots', [])]
+
+    # esrb_rating 처리: 없으면 빈 문자열로 설정
+    esrb_rating = game_data.get('esrb_rating')
+    esrb_rating = esrb_rating.get('name', '') if esrb_rating else ''
+
+    # Game 데이터 생성 (아직 저장하지 않음)
+    return {
+        'id': game_id,  # API에서 제공하는 ID 사용
+        'name': game_data.get('name', ''),
+        'released': game_data.get('released', ''),
+        'background_image': game_data.get('background_image', ''),
+        'rating': game_data.get('rating', 0),
+        'metacritic_score': game_data.get('metacritic', 0),
+        'playtime': game_data.get('playtime', 0),
+        'platforms': platforms,      # JSON 리스트로 저장
+        'genres': genres,            # JSON 리스트로 저장
+        'stores': store_names,       # JSON 리스트로 저장
+        'esrb_rating': esrb_rating,
+        'screenshots': screenshots   # JSON 리스트로 저장
+    }
+
+
+def parse_segment(path):
+    """
+    Decompress and parse one archive segment (run in a worker process).
+    Returns (pages, games, errors): pages read, Game field dicts in page
+    order, and entries that could not be parsed.
+    """
+    pages, games, errors = 0, [], 0
+    with gzip.open(path, 'rt', encoding='utf-8') as segment:
+        for line in segment:
+            record = json.loads(line)
+            pages += 1
+            for game_data in record['data'].get('results', []):
+                try:
+                    game = parse_game(game_data)
+                except Exception:
+                    errors += 1
+                    continue
+                if game:
+                    games.append(game)
+    return pages, games, errors
@@ -0,0 +1,491 @@
+"""
+Fetch -> parse -> write pipeline for paged RAWG imports.
+
+    fetch workers --(raw pages, bounded)--> parser --(games, bounded)--> writer
+
+Fetch workers take page numbers in order and stop once the parser has
+seen the last page worth reading (end of the list, or data that is
+already stored). With a page_count callback the first page is fetched
+alone and its answer (e.g. RAWG's `count`) sizes the job before the other
+pages are handed out, so no request goes past the end of the list;
+async requests for pages past the stop page are cancelled. The queues
+between the stages are bounded, so when the writer falls behind the
+parser blocks, then the fetch workers, instead of buffering pages
+without limit. The writer flushes a batch when it
+reaches batch_size games or when flush_interval seconds have passed since
+its oldest buffered game. Every stage records its busy time and the time
+it spent blocked on the next stage, reported as per-stage throughput,
+plus a histogram of its per-item time (fetch latency per page, parse
+time per page, write time per batch); a sampler thread records how full
+the two queues were. summary() returns all of it as a JSON-ready dict.
+
+The writer also tracks pages: a page is complete once every game parsed
+from it is stored, and failed if fetching, parsing or writing it failed.
+Both are reported through on_pages, from the writer thread, for callers
+that keep a page journal (see games.journal).
+
+When fetch_page is a coroutine function the fetch stage is a single
+thread running an event loop instead, with at most fetch_concurrency()
+pages in flight (see games.rawg_async).
+"""
+import asyncio
+import bisect
+import math
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.db import connection
+
+_DONE = object()
+
+# upper bounds of the timing histogram buckets, in milliseconds
+TIMING_BUCKETS_MS = (
+    1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750,
+    1000, 1500, 2000, 3000, 5000, 10000, 30000,
+)
+
+
+class Timings:
+    """Histogram of durations; percentiles are bucket upper bounds (capped at the maximum)"""
+
+    def __init__(self, buckets=TIMING_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is > buckets[-1]
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.minimum = ms if self.minimum is None else min(self.minimum, ms)
+        self.maximum = ms if self.maximum is None else max(self.maximum, ms)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * fraction))
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def as_dict(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count, 1),
+            'min_ms': round(self.minimum, 1),
+            'p50_ms': round(self.percentile(0.5), 1),
+            'p95_ms': round(self.percentile(0.95), 1),
+            'p99_ms': round(self.percentile(0.99), 1),
+            'max_ms': round(self.maximum, 1),
+            # [upper bound in ms (None = above the last one), count], empty buckets left out
+            'histogram': [
+                [bound, count] for bound, count in zip((*self.buckets, None), self.counts) if count
+            ],
+        }
+
+
+class QueueDepth:
+    """Sampled fill level of one bounded queue"""
+
+    def __init__(self, target):
+        self.target = target
+        self.samples = 0
+        self.total = 0
+        self.maximum = 0
+        self.full = 0
+
+    def sample(self):
+        depth = self.target.qsize()
+        self.samples += 1
+        self.total += depth
+        self.maximum = max(self.maximum, depth)
+        self.full += self.target.maxsize > 0 and depth >= self.target.maxsize
+
+    def as_dict(self):
+        return {
+            'capacity': self.target.maxsize,
+            'samples': self.samples,
+            'avg': round(self.total / self.samples, 2) if self.samples else 0.0,
+            'max': self.maximum,
+            'full_ratio': round(self.full / self.samples, 3) if self.samples else 0.0,
+        }
+
+
+class StageStats:
+    """
+    Counters of one stage; busy = time spent working, blocked = waiting on
+    the next stage, timings = busy time per `timed` item (page or batch)
+    """
+
+    def __init__(self, name, unit, timed):
+        self.name = name
+        self.unit = unit
+        self.timed = timed
+        self.timings = Timings()
+        self.items = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items=0, busy=0.0, blocked=0.0, errors=0, batches=0, timing=None):
+        with self._lock:
+            if timing is not None:
+                self.timings.add(timing)
+            self.items += items
+            self.busy += busy
+            self.blocked += blocked
+            self.errors += errors
+            self.batches += batches
+
+    def as_dict(self, wall_seconds):
+        return {
+            'stage': self.name,
+            'unit': self.unit,
+            'items': self.items,
+            'batches': self.batches,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy, 3),
+            'blocked_seconds': round(self.blocked, 3),
+            'per_second': round(self.items / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+            'timing_unit': self.timed,
+            'timings': self.timings.as_dict(),
+        }
+
+
+class PageFeeder:
+    """
+    Hands out the given page numbers in order, up to the stop page. With
+    probe_first, the first page goes out alone and the others wait for
+    release() (called once that page has been parsed).
+    """
+
+    def __init__(self, pages, probe_first=False):
+        self._pages = iter(sorted(pages))
+        self.planned = len(pages)
+        self.handed_out = 0
+        self.stop_page = None
+        self._released = threading.Event()
+        if not probe_first:
+            self._released.set()
+        self._lock = threading.Lock()
+
+    def next_page(self):
+        while True:
+            with self._lock:
+                if self.handed_out == 0 or self._released.is_set():
+                    page = next(self._pages, None)
+                    if page is None or (self.stop_page is not None and page > self.stop_page):
+                        self._pages = iter(())
+                        return None
+                    self.handed_out += 1
+                    return page
+            self._released.wait()
+
+    def release(self):
+        self._released.set()
+
+    def stop_at(self, page):
+        """No page after `page` is needed"""
+        with self._lock:
+            if self.stop_page is None or page < self.stop_page:
+                self.stop_page = page
+
+
+def _put(target, item, stats):
+    started = time.perf_counter()
+    target.put(item)
+    stats.add(blocked=time.perf_counter() - started)
+
+
+class FetchPipeline:
+    """
+    Runs the three stages over `pages` (page numbers) with callbacks:
+
+    fetch_page(page) -> page data or None on failure (called from `workers`
+        threads, or awaited when it is a coroutine function; then
+        fetch_concurrency() gives the current in-flight limit and
+        fetch_cleanup() is awaited when the stage ends)
+    parse_page(page, data) -> (games, last): games parsed from the page, and
+        whether no later page is needed
+    write_batch(games) -> True if the batch was stored
+    on_pages(done, failed) -> None: {page: games stored} of completed pages
+        and a list of failed pages (optional, called from the writer thread)
+    page_count(page, data) -> number of the last page, or None if unknown
+        (optional, called with the first page fetched)
+    """
+
+    def __init__(self, fetch_page, parse_page, write_batch, pages, workers=10, queue_size=20,
+                 batch_size=100, flush_interval=2.0, fetch_concurrency=None, fetch_cleanup=None, on_pages=None,
+                 page_count=None, sample_interval=0.1):
+        self.fetch_page = fetch_page
+        self.fetch_async = asyncio.iscoroutinefunction(fetch_page)
+        self.fetch_concurrency = fetch_concurrency or (lambda: workers)
+        self.fetch_cleanup = fetch_cleanup
+        self.parse_page = parse_page
+        self.write_batch = write_batch
+        self.on_pages = on_pages
+        self.page_count = page_count
+        self.feeder = PageFeeder(pages, probe_first=page_count is not None)
+        self.requested_pages = set()
+        self.cancelled = 0  # in-flight async requests dropped past the stop page
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.raw_pages = queue.Queue(maxsize=queue_size)
+        # measured in pages as well; enough to fill a couple of batches
+        self.parsed_pages = queue.Queue(maxsize=queue_size)
+        self.stats = {
+            'fetch': StageStats('fetch', 'pages', 'page'),
+            'parse': StageStats('parse', 'games', 'page'),
+            'write': StageStats('write', 'games', 'batch'),
+        }
+        self.depths = {'raw_pages': QueueDepth(self.raw_pages), 'parsed_pages': QueueDepth(self.parsed_pages)}
+        self.sample_interval = sample_interval
+        self._stopped = threading.Event()
+        self.failed_pages = set()  # fetched, parsed or written unsuccessfully
+        self.started = None
+        self.finished = None
+
+    def _fetch_worker(self):
+        stats = self.stats['fetch']
+        while True:
+            page = self.feeder.next_page()
+            if page is None:
+                return
+            self.requested_pages.add(page)
+            started = time.perf_counter()
+            try:
+                data = self.fetch_page(page)
+            except Exception:
+                data = None
+            elapsed = time.perf_counter() - started
+            stats.add(items=1, busy=elapsed, errors=data is None, timing=elapsed)
+            _put(self.raw_pages, (page, data), stats)
+
+    def _async_fetch_worker(self):
+        asyncio.run(self._async_fetch())
+
+    async def _async_fetch(self):
+        stats = self.stats['fetch']
+        loop = asyncio.get_running_loop()
+
+        async def fetch(page):
+            started = time.perf_counter()
+            try:
+                data = await self.fetch_page(page)
+            except Exception:
+                data = None
+            elapsed = time.perf_counter() - started
+            stats.add(items=1, busy=elapsed, errors=data is None, timing=elapsed)
+            started = time.perf_counter()
+            # a full queue parks this task (and its in-flight slot) until the parser catches up
+            await loop.run_in_executor(None, self.raw_pages.put, (page, data))
+            stats.add(blocked=time.perf_counter() - started)
+
+        pending = {}  # task -> page
+        try:
+            while True:
+                while len(pending) >= max(1, self.fetch_concurrency()):
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    self._drop_finished(pending)
+                # may wait for the first page to be parsed, so off the event loop
+                page = await loop.run_in_executor(None, self.feeder.next_page)
+                if page is None:
+                    break
+                self.requested_pages.add(page)
+                pending[asyncio.create_task(fetch(page))] = page
+            while pending:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                self._drop_finished(pending)
+        finally:
+            if self.fetch_cleanup:
+                await self.fetch_cleanup()
+
+    def _drop_finished(self, pending):
+        """Forget finished tasks and cancel the ones past the stop page"""
+        stop = self.feeder.stop_page
+        for task, page in list(pending.items()):
+            if task.done():
+                del pending[task]
+            elif stop is not None and page > stop:
+                task.cancel()
+                del pending[task]
+                self.cancelled += 1
+
+    def _parse_worker(self):
+        stats = self.stats['parse']
+        first = True  # the page fetched alone when page_count is set
+        while True:
+            item = self.raw_pages.get()
+            if item is _DONE:
+                _put(self.parsed_pages, _DONE, stats)
+                return
+            page, data = item
+            stop = self.feeder.stop_page
+            if stop is not None and page > stop:
+                continue  # requested before the stop page was known; not needed
+            games = None
+            if data is not None and self.page_count and first:
+                try:
+                    last_page = self.page_count(page, data)
+                except Exception:
+                    last_page = None
+                if last_page is not None:
+                    self.feeder.stop_at(max(page, last_page))
+            if data is not None:
+                started = time.perf_counter()
+                try:
+                    games, last = self.parse_page(page, data)
+                except Exception:
+                    stats.add(errors=1, busy=time.perf_counter() - started)
+                else:
+                    if last:
+                        self.feeder.stop_at(page)
+                    elapsed = time.perf_counter() - started
+                    stats.add(items=len(games), busy=elapsed, timing=elapsed)
+            first = False
+            self.feeder.release()
+            # failed pages (games None) and empty pages go to the writer too, for on_pages
+            _put(self.parsed_pages, (page, games), stats)
+
+    def _flush(self, entries, remaining, stored_per_page):
+        """Write (page, game) entries; returns ({page: games} completed, [page] failed)"""
+        stats = self.stats['write']
+        started = time.perf_counter()
+        stored = self.write_batch([game for _, game in entries])
+        elapsed = time.perf_counter() - started
+        stats.add(items=len(entries) if stored else 0, busy=elapsed, errors=not stored, batches=1, timing=elapsed)
+        done, failed = {}, []
+        for page, count in Counter(page for page, _ in entries).items():
+            if page not in remaining:
+                continue  # an earlier batch of this page already failed
+            if not stored:
+                del remaining[page]
+                stored_per_page.pop(page, None)
+                failed.append(page)
+                continue
+            remaining[page] -= count
+            stored_per_page[page] = stored_per_page.get(page, 0) + count
+            if not remaining[page]:
+                del remaining[page]
+                done[page] = stored_per_page.pop(page)
+        return done, failed
+
+    def _report(self, done, failed):
+        self.failed_pages.update(failed)
+        if self.on_pages and (done or failed):
+            self.on_pages(done, failed)
+
+    def _write_worker(self):
+        buffer = []  # (page, game)
+        remaining = {}  # page -> its games not yet stored
+        stored_per_page = {}
+        oldest = None
+        try:
+            while True:
+                timeout = None
+                if buffer:
+                    timeout = max(0.0, self.flush_interval - (time.monotonic() - oldest))
+                try:
+                    item = self.parsed_pages.get(timeout=timeout)
+                except queue.Empty:
+                    # time-based flush: the oldest buffered game has waited flush_interval
+                    self._report(*self._flush(buffer, remaining, stored_per_page))
+                    buffer, oldest = [], None
+                    continue
+                if item is _DONE:
+                    break
+                page, games = item
+                if games is None:
+                    self._report({}, [page])
+                    continue
+                if not games:
+                    self._report({page: 0}, [])
+                    continue
+                if not buffer:
+                    oldest = time.monotonic()
+                remaining[page] = len(games)
+                buffer.extend((page, game) for game in games)
+                while len(buffer) >= self.batch_size:
+                    self._report(*self._flush(buffer[:self.batch_size], remaining, stored_per_page))
+                    del buffer[:self.batch_size]
+                    oldest = time.monotonic() if buffer else None
+            if buffer:
+                self._report(*self._flush(buffer, remaining, stored_per_page))
+        finally:
+            connection.close()
+
+    def queue_depths(self):
+        return {'raw_pages': self.raw_pages.qsize(), 'parsed_pages': self.parsed_pages.qsize()}
+
+    def _sample_queues(self):
+        while not self._stopped.wait(self.sample_interval):
+            for depth in self.depths.values():
+                depth.sample()
+
+    def run(self, progress=None, progress_interval=5.0):
+        """Run all stages to completion; progress(pipeline) is called periodically"""
+        self.started = time.perf_counter()
+        if self.fetch_async:
+            fetchers = [threading.Thread(target=self._async_fetch_worker, name='fetch-async', daemon=True)]
+        else:
+            fetchers = [
+                threading.Thread(target=self._fetch_worker, name=f'fetch-{i + 1}', daemon=True)
+                for i in range(self.workers)
+            ]
+        parser = threading.Thread(target=self._parse_worker, name='parse', daemon=True)
+        writer = threading.Thread(target=self._write_worker, name='write', daemon=True)
+        sampler = threading.Thread(target=self._sample_queues, name='queue-sampler', daemon=True)
+        for thread in [*fetchers, parser, writer, sampler]:
+            thread.start()
+
+        for thread in fetchers:
+            while thread.is_alive():
+                thread.join(progress_interval)
+                if progress and thread.is_alive():
+                    progress(self)
+        self.raw_pages.put(_DONE)
+        parser.join()
+        writer.join()
+        self._stopped.set()
+        sampler.join()
+        self.finished = time.perf_counter()
+        return self.summary()
+
+    def missed_pages(self):
+        """Failed pages up to the stop page; pages past it were not needed"""
+        stop = self.feeder.stop_page
+        return {page for page in self.failed_pages if stop is None or page <= stop}
+
+    def page_stats(self):
+        """Pages planned, requested, and requests avoided by stopping early"""
+        stop = self.feeder.stop_page
+        return {
+            'planned': self.feeder.planned,
+            'requested': len(self.requested_pages),
+            'avoided': self.feeder.planned - len(self.requested_pages),
+            'past_stop': sum(1 for page in self.requested_pages if stop is not None and page > stop),
+            'cancelled': self.cancelled,
+        }
+
+    def summary(self):
+        wall = (self.finished or time.perf_counter()) - self.started
+        return {
+            'wall_seconds': round(wall, 3),
+            'pages': self.page_stats(),
+            'stages': [stats.as_dict(wall) for stats in self.stats.values()],
+            'queues': {name: depth.as_dict() for name, depth in self.depths.items()},
+        }
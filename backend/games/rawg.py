@@ -0,0 +1,220 @@
+"""
+Shared HTTP client for the RAWG API.
+
+One requests.Session per client keeps connections alive (the pool is
+sized to the caller's worker count), every call has a connect/read
+timeout, 429 and 5xx answers are retried with exponential backoff
+(honouring Retry-After), and a token bucket shared by all threads keeps
+the request rate under the configured limit. Per-call latency and retry
+counters are available from stats().
+
+The web process uses the get_client() singleton; management commands
+build their own client sized to their --workers. games.rawg_async has an
+asyncio counterpart with the same settings and stats.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 1000  # recent calls kept for percentiles
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` at once"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        if not self.rate:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds waited"""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class BaseRawgClient:
+    """Settings, retry policy and call statistics shared by the sync and async clients"""
+
+    def __init__(self, api_key=None, base_url=None, rate_limit=None,
+                 max_retries=None, backoff=0.5, timeout=None, connect_timeout=None):
+        self.api_key = os.getenv('RAWG_API_KEY', '') if api_key is None else api_key
+        self.base_url = (base_url or settings.RAWG_API_BASE_URL).rstrip('/')
+        self.max_retries = settings.RAWG_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff
+        self.timeout = (
+            settings.RAWG_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+            settings.RAWG_REQUEST_TIMEOUT if timeout is None else timeout,
+        )
+        self.bucket = TokenBucket(settings.RAWG_RATE_LIMIT if rate_limit is None else rate_limit)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+        self.statuses = Counter()
+
+    def url(self, path):
+        return path if path.startswith('http') else f"{self.base_url}/{path.lstrip('/')}"
+
+    def _retry_delay(self, attempt, response):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _record(self, latency, waited, status):
+        with self._lock:
+            self.calls += 1
+            self.throttled_seconds += waited
+            self._latencies.append(latency)
+            self.statuses[str(status)] += 1
+
+    def _record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def _record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls, retries, failures = self.calls, self.retries, self.failures
+            throttled, statuses = self.throttled_seconds, dict(self.statuses)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            'calls': calls,
+            'retries': retries,
+            'failures': failures,
+            'statuses': statuses,
+            'throttled_seconds': round(throttled, 3),
+            'latency_ms': {
+                'avg': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(latencies[-1] * 1000, 1) if latencies else None,
+            },
+        }
+
+
+class RawgClient(BaseRawgClient):
+    def __init__(self, api_key=None, base_url=None, pool_size=10, rate_limit=None,
+                 max_retries=None, backoff=0.5, timeout=None, connect_timeout=None):
+        super().__init__(api_key, base_url, rate_limit, max_retries, backoff, timeout, connect_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    # ---- requests --------------------------------------------------------
+
+    def get(self, path, params=None):
+        """
+        GET `path` under the base URL with retries; returns the final
+        response, or None if every attempt failed at the network level.
+        """
+        url = self.url(path)
+        params = {'key': self.api_key, **(params or {})}
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self._retry_delay(attempt - 1, response)
+                self._record_retry()
+                time.sleep(delay)
+
+            waited = self.bucket.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.warning("RAWG request failed (%s): %s", url, e)
+                response = None
+                self._record(time.monotonic() - start, waited, 'error')
+                continue
+            self._record(time.monotonic() - start, waited, response.status_code)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+
+        self._record_failure()
+        return response
+
+    def get_json(self, path, params=None):
+        """GET and decode a JSON body; returns None unless the answer is 200"""
+        response = self.get(path, params)
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else 'no response'
+            logger.warning("RAWG returned %s for %s", status, path)
+            return None
+        return response.json()
+
+    # ---- endpoints -----------------------------------------------------------
+
+    def games_page(self, page=1, **params):
+        """One page of the /games list (results, count, next)"""
+        if page > 1:
+            params['page'] = page
+        return self.get_json('games', params)
+
+    def game_details(self, game_id):
+        """Detail record of one game (with description)"""
+        return self.get_json(f'games/{game_id}')
+
+    def game_screenshots(self, game_id):
+        """Screenshot URLs of one game, or None on failure"""
+        data = self.get_json(f'games/{game_id}/screenshots')
+        if data is None:
+            return None
+        return [shot['image'] for shot in data.get('results', []) if shot.get('image')]
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client for the web process (pool sized to the backfill workers)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RawgClient(pool_size=getattr(settings, 'GAME_DESCRIPTION_BACKFILL_WORKERS', 2))
+        return _client
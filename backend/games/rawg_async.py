@@ -0,0 +1,163 @@
+"""
+asyncio client for the RAWG API, with adaptive concurrency.
+
+Used by `fetch_game_data --engine async`: one event loop keeps many list
+requests in flight over a single aiohttp connection pool instead of one
+blocked thread per request. How many requests are in flight follows an
+AIMD rule (AdaptiveConcurrency): every fast answer raises the limit by
+about one per round trip, while an error or 429/5xx answer halves it and
+a sustained latency rise trims it: a fast moving average of the latency
+has to stay well above a slow one (the baseline) for about a round trip,
+so a single slow answer does not count. The fetcher speeds up while RAWG
+keeps up and backs off as soon as it throttles. Retries,
+Retry-After handling, the token bucket and the call statistics are the
+same as RawgClient's.
+"""
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from .rawg import RETRY_STATUSES, BaseRawgClient
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests (additive increase, multiplicative decrease)"""
+
+    def __init__(self, initial=4, minimum=1, maximum=32, latency_tolerance=2.0,
+                 throttle_factor=0.5, latency_factor=0.9, baseline_alpha=0.02, recent_alpha=0.2):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.latency_tolerance = latency_tolerance  # slow = recent latency this many times the baseline
+        self.throttle_factor = throttle_factor
+        self.latency_factor = latency_factor
+        self.baseline_alpha = baseline_alpha
+        self.recent_alpha = recent_alpha
+        self.baseline = None  # slow EWMA of the latency
+        self.recent = None  # fast EWMA of the latency
+        self.peak = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self._slow_answers = 0
+        self._last_decrease = 0.0
+
+    @property
+    def current(self):
+        return max(self.minimum, int(self.limit))
+
+    def on_success(self, latency):
+        if self.baseline is None:
+            self.baseline = self.recent = latency
+        else:
+            self.baseline += self.baseline_alpha * (latency - self.baseline)
+            self.recent += self.recent_alpha * (latency - self.recent)
+        if self.recent > self.baseline * self.latency_tolerance and self.recent - self.baseline > 0.005:
+            # trim once the rise has lasted about one round trip (`limit` answers)
+            self._slow_answers += 1
+            if self._slow_answers >= max(3, self.current):
+                self._slow_answers = 0
+                self._decrease(self.latency_factor)
+            return
+        self._slow_answers = 0
+        # +1 per round trip: each of the `limit` answers of one round trip adds 1/limit
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.peak = max(self.peak, self.limit)
+        self.increases += 1
+
+    def on_throttled(self):
+        self._decrease(self.throttle_factor)
+
+    def _decrease(self, factor):
+        # the answers of one round trip all report the same congestion; react once
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 0.1):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * factor)
+        self.decreases += 1
+
+    def stats(self):
+        return {
+            'current': self.current,
+            'peak': int(self.peak),
+            'maximum': self.maximum,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'baseline_ms': round(self.baseline * 1000, 1) if self.baseline is not None else None,
+            'recent_ms': round(self.recent * 1000, 1) if self.recent is not None else None,
+        }
+
+
+class AsyncRawgClient(BaseRawgClient):
+    def __init__(self, api_key=None, base_url=None, concurrency=None, rate_limit=None,
+                 max_retries=None, backoff=0.5, timeout=None, connect_timeout=None):
+        super().__init__(api_key, base_url, rate_limit, max_retries, backoff, timeout, connect_timeout)
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self._session = None
+
+    def session(self):
+        # created on first use, inside the event loop that will run the requests
+        if self._session is None:
+            connect_timeout, read_timeout = self.timeout
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency.maximum),
+            )
+        return self._session
+
+    async def get_json(self, path, params=None):
+        """
+        GET and decode a JSON body with retries; returns None unless the
+        final answer is 200. Every attempt feeds the concurrency limit.
+        """
+        url = self.url(path)
+        params = {'key': self.api_key, **(params or {})}
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._record_retry()
+                await asyncio.sleep(self._retry_delay(attempt - 1, response))
+
+            waited = self.bucket.reserve()
+            if waited:
+                await asyncio.sleep(waited)
+            start = time.monotonic()
+            try:
+                async with self.session().get(url, params=params) as response:
+                    data = await response.json(content_type=None) if response.status == 200 else None
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning("RAWG request failed (%s): %s", url, e)
+                response = None
+                self._record(time.monotonic() - start, waited, 'error')
+                self.concurrency.on_throttled()
+                continue
+            latency = time.monotonic() - start
+            self._record(latency, waited, response.status)
+            if response.status in RETRY_STATUSES:
+                self.concurrency.on_throttled()
+                continue
+            self.concurrency.on_success(latency)
+            if response.status != 200:
+                logger.warning("RAWG returned %s for %s", response.status, path)
+            return data
+
+        self._record_failure()
+        return None
+
+    async def games_page(self, page=1, **params):
+        """One page of the /games list (results, count, next)"""
+        if page > 1:
+            params['page'] = page
+        return await self.get_json('games', params)
+
+    def stats(self):
+        return {**super().stats(), 'concurrency': self.concurrency.stats()}
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,220 @@
+"""
+Local stand-in for the RAWG API, for exercising the RAWG commands offline.
+
+Serves deterministic fake data for the endpoints the commands use, with
+optional latency, error injection and a concurrency limit answered with
+429 like RAWG's throttling:
+
+    GET /api/games?page=&page_size=   paginated game list, optionally
+        &updated=YYYY-MM-DD,YYYY-MM-DD   filtered by update date and
+        &ordering=updated|-updated       ordered by update time
+    GET /api/games/<id>               detail record (with description)
+    GET /api/games/<id>/screenshots   screenshot list
+
+Start it with `python manage.py run_rawg_stub` and point the commands at
+it with RAWG_API_BASE_URL=http://127.0.0.1:8001/api.
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+LIST_PATH = re.compile(r'^/api/games/?$')
+DETAIL_PATH = re.compile(r'^/api/games/(\d+)/?$')
+SCREENSHOTS_PATH = re.compile(r'^/api/games/(\d+)/screenshots/?$')
+SCREENSHOTS_PER_GAME = 4
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 40
+# game n was last updated UPDATED_STEP after game n - 1, so newer ids are fresher
+UPDATED_EPOCH = datetime(2024, 1, 1)
+UPDATED_STEP = timedelta(minutes=7)
+UPDATED_CYCLE = 1_000_000  # ids past this wrap around (benchmark ids are far out of date range)
+
+GENRES = ['Action', 'Adventure', 'RPG', 'Shooter', 'Puzzle', 'Indie', 'Strategy', 'Racing']
+PLATFORMS = ['PC', 'PlayStation 5', 'PlayStation 4', 'Xbox One', 'Xbox Series S/X', 'Nintendo Switch']
+STORES = ['Steam', 'GOG', 'Epic Games', 'PlayStation Store', 'Xbox Store', 'Nintendo Store']
+ESRB_RATINGS = [None, 'Everyone', 'Everyone 10+', 'Teen', 'Mature']
+
+
+def updated_at(game_id):
+    return UPDATED_EPOCH + UPDATED_STEP * (game_id % UPDATED_CYCLE)
+
+
+def list_game(game_id):
+    """A /games list entry shaped like RAWG's, derived from the id"""
+    pick = random.Random(game_id)
+    esrb = pick.choice(ESRB_RATINGS)
+    return {
+        'id': game_id,
+        'name': f'Stub Game {game_id}',
+        'released': f'{2000 + game_id % 25}-{1 + game_id % 12:02d}-{1 + game_id % 28:02d}',
+        'background_image': f'https://media.example.com/games/{game_id}.jpg',
+        'rating': round(pick.uniform(0, 5), 2),
+        'metacritic': pick.choice([None, pick.randint(40, 99)]),
+        'playtime': pick.randint(0, 100),
+        'genres': [{'name': name} for name in pick.sample(GENRES, 2)],
+        'platforms': [{'platform': {'name': name}} for name in pick.sample(PLATFORMS, 2)],
+        'stores': [{'store': {'name': name}} for name in pick.sample(STORES, 2)],
+        'esrb_rating': {'name': esrb} if esrb else None,
+        'updated': updated_at(game_id).isoformat(),
+        'short_screenshots': [
+            {'image': f'https://media.example.com/screenshots/{game_id}/{i}.jpg'} for i in range(2)
+        ],
+    }
+
+
+def games_page(base_url, page, page_size, catalog_size, updated=None, ordering=None, first_id=1):
+    """
+    One page of the list endpoint, or None past the last page. ids run
+    first_id..first_id + catalog_size - 1; `updated` is RAWG's inclusive
+    "from,to" date range.
+    """
+    ids = range(first_id, first_id + catalog_size)
+    if updated:
+        first, last = (date.fromisoformat(value) for value in updated.split(','))
+        ids = [game_id for game_id in ids if first <= updated_at(game_id).date() <= last]
+    if ordering == '-updated':
+        ids = ids[::-1]
+    start = (page - 1) * page_size
+    if start and start >= len(ids):
+        return None
+
+    def page_url(number):
+        params = {'page': number, 'page_size': page_size, 'updated': updated, 'ordering': ordering}
+        return f'{base_url}/games?' + urlencode({key: value for key, value in params.items() if value})
+    return {
+        'count': len(ids),
+        'next': page_url(page + 1) if start + page_size < len(ids) else None,
+        'previous': page_url(page - 1) if page > 1 else None,
+        'results': [list_game(game_id) for game_id in ids[start:start + page_size]],
+    }
+
+
+def game_detail(game_id):
+    return {
+        'id': game_id,
+        'name': f'Stub Game {game_id}',
+        'description': f'<p>Stub description for game {game_id}.</p>',
+        'description_raw': f'Stub description for game {game_id}.',
+    }
+
+
+def game_screenshots(game_id):
+    results = [
+        {'id': game_id * 100 + i, 'image': f'https://media.example.com/screenshots/{game_id}/{i}.jpg'}
+        for i in range(SCREENSHOTS_PER_GAME)
+    ]
+    return {'count': len(results), 'next': None, 'previous': None, 'results': results}
+
+
+class RawgStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # listen backlog; the default of 5 resets connections under a burst of concurrent fetches
+    request_queue_size = 128
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, error_status=503, catalog_size=10000, seed=None,
+                 max_concurrency=0, first_id=1):
+        super().__init__(address, RawgStubHandler)
+        self.max_concurrency = max_concurrency  # 0 = unlimited
+        self.in_flight = 0
+        self.throttled_count = 0
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.catalog_size = catalog_size
+        self.first_id = first_id
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api'
+
+    def enter(self):
+        """Count a request in; False if it exceeds max_concurrency and must be throttled"""
+        with self.lock:
+            self.in_flight += 1
+            if self.max_concurrency and self.in_flight > self.max_concurrency:
+                self.throttled_count += 1
+                return False
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def should_fail(self):
+        with self.lock:
+            self.request_count += 1
+            fail = self.error_rate and self.random.random() < self.error_rate
+            if fail:
+                self.error_count += 1
+            return fail
+
+
+class RawgStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if not self.server.enter():
+            self.server.leave()
+            return self.send_json(429, {'detail': 'Too many requests.'}, {'Retry-After': '1'})
+        try:
+            self.handle_get()
+        finally:
+            self.server.leave()
+
+    def handle_get(self):
+        url = urlsplit(self.path)
+        path, query = url.path, parse_qs(url.query)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.should_fail():
+            return self.send_json(self.server.error_status, {'error': 'Injected failure'})
+
+        if LIST_PATH.match(path):
+            try:
+                page = max(1, int(query.get('page', ['1'])[0]))
+                page_size = min(MAX_PAGE_SIZE, max(1, int(query.get('page_size', [DEFAULT_PAGE_SIZE])[0])))
+                data = games_page(self.server.base_url, page, page_size, self.server.catalog_size,
+                                  updated=query.get('updated', [None])[0],
+                                  ordering=query.get('ordering', [None])[0],
+                                  first_id=self.server.first_id)
+            except ValueError:
+                return self.send_json(400, {'error': 'Invalid page'})
+            if data is None:
+                return self.send_json(404, {'detail': 'Invalid page.'})
+            return self.send_json(200, data)
+
+        match = SCREENSHOTS_PATH.match(path)
+        if match:
+            return self.send_json(200, game_screenshots(int(match.group(1))))
+        match = DETAIL_PATH.match(path)
+        if match:
+            return self.send_json(200, game_detail(int(match.group(1))))
+        self.send_json(404, {'detail': 'Not found.'})
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start a stub server on a background thread and return it (port 0 = any free port)"""
+    server = RawgStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='rawg-stub', daemon=True).start()
+    return server
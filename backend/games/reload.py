@@ -0,0 +1,251 @@
+"""
+Full catalog reload through a staging table (fetch_game_data --full-reload).
+
+A full fetch written straight into games_game keeps write transactions
+open on the live table while users browse, and they see a catalog that
+is half old and half new until the run ends. Instead the games are
+loaded into games_game_staging, a copy of games_game without its
+secondary indexes; then the indexes and a staging FTS table are built,
+and one short transaction swaps both tables in with ALTER TABLE RENAME.
+
+The swap runs with foreign key enforcement off and legacy_alter_table
+on, so renaming games_game away does not rewrite the REFERENCES clauses
+of reviews_review, wishlist_wishlist, the tag tables or SimilarGame:
+they keep pointing at "games_game", which is the new table once the
+staging table takes its name. Before committing, games still referenced
+by other apps (reviews, wishlists) that the new load does not contain
+are carried over, rows of the games' own derived tables that point at
+dropped games are deleted, and PRAGMA foreign_key_check on the other
+apps' tables must come back empty, otherwise the swap rolls back and the
+live catalog is untouched. Tag links of new games and of games whose
+genres, platforms or stores changed are rebuilt in the same transaction,
+so readers never see the new games with the old tag links.
+
+SQLite index names are unique per database, so the staging indexes are
+built under temporary names and recreated under the model's names once
+the old table is gone. Only SQLite is supported: PostgreSQL binds
+foreign keys to the table itself, not its name.
+"""
+import time
+
+from django.apps.registry import Apps
+from django.db import NotSupportedError, connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search
+from .models import Game, SimilarGame
+from .tags import TAG_FIELDS, sync_game_tags
+
+STAGING_TABLE = 'games_game_staging'
+OLD_TABLE = 'games_game_old'
+STAGING_INDEX_SUFFIX = '_staged'
+TAG_SYNC_BATCH_SIZE = 500
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def staging_model():
+    """An unregistered copy of Game (columns only) stored in the staging table"""
+    attrs = {
+        '__module__': Game.__module__,
+        'Meta': type('Meta', (), {'app_label': Game._meta.app_label, 'db_table': STAGING_TABLE, 'apps': Apps()}),
+    }
+    for field in Game._meta.local_concrete_fields:
+        attrs[field.name] = field.clone()
+    return type('StagingGame', (models.Model,), attrs)
+
+
+def staged_index(index):
+    staged = index.clone()
+    staged.name = f'{index.name}{STAGING_INDEX_SUFFIX}'
+    return staged
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _columns():
+    return ', '.join(_quote(field.column) for field in Game._meta.local_concrete_fields)
+
+
+def _referencing_tables():
+    """(table, column) of foreign keys to Game from other apps, whose rows must keep their game"""
+    return [
+        (relation.related_model._meta.db_table, relation.field.column)
+        for relation in Game._meta.related_objects
+        if relation.related_model._meta.app_label != Game._meta.app_label
+        and relation.field.db_constraint
+    ]
+
+
+class StagingCatalog:
+    """
+    One full reload: create() -> load() batches -> prepare() -> swap() ->
+    cleanup(); drop() abandons it and leaves the live catalog as it was.
+    """
+
+    def __init__(self):
+        self.model = staging_model()
+        self.fts_staging = f'{search.FTS_TABLE}_staging'
+        self.fts_old = f'{search.FTS_TABLE}_old'
+        self.changed_ids = []
+        self.stats = {}
+
+    def _drop_tables(self):
+        with connection.cursor() as cursor:
+            for table in (STAGING_TABLE, self.fts_staging, OLD_TABLE, self.fts_old):
+                cursor.execute(f'DROP TABLE IF EXISTS {_quote(table)}')
+
+    def create(self):
+        """Create an empty staging table (leftovers of an interrupted reload are dropped first)"""
+        self._drop_tables()
+        with connection.schema_editor() as editor:
+            editor.create_model(self.model)
+
+    def load(self, games_data):
+        """Insert game dicts into the staging table; returns (inserted, updated) there"""
+        by_id = {data['id']: data for data in games_data if data}
+        if not by_id:
+            return 0, 0
+        now = timezone.now()
+        rows = [self.model(**data, updated_at=now) for data in by_id.values()]
+        with transaction.atomic():
+            existing = set(self.model.objects.filter(id__in=by_id).values_list('id', flat=True))
+            self.model.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=[field.name for field in self.model._meta.local_concrete_fields if not field.primary_key],
+            )
+        return len(rows) - len(existing), len(existing)
+
+    def prepare(self):
+        """
+        Finish the staging side before the swap: keep the details the list
+        endpoint does not carry, remember which games need their tag links
+        rebuilt, build the indexes and the staging search table.
+        """
+        started = time.perf_counter()
+        staging, live = _quote(STAGING_TABLE), _quote(Game._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # description and the full screenshot list come from enrich_game_details,
+            # which an upsert would not overwrite either
+            cursor.execute(
+                f'UPDATE {staging} SET description = live.description, screenshots = live.screenshots '
+                f'FROM {live} AS live WHERE live.id = {staging}.id'
+            )
+            cursor.execute(
+                f'SELECT id FROM {staging} AS s WHERE NOT EXISTS ('
+                f'SELECT 1 FROM {live} AS live WHERE live.id = s.id'
+                f' AND live.genres IS s.genres AND live.platforms IS s.platforms AND live.stores IS s.stores)'
+            )
+            self.changed_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f'SELECT COUNT(*) FROM {staging}')
+            loaded = cursor.fetchone()[0]
+            cursor.execute(f'SELECT COUNT(*) FROM {staging} AS s WHERE NOT EXISTS (SELECT 1 FROM {live} AS live WHERE live.id = s.id)')
+            new = cursor.fetchone()[0]
+
+        with connection.schema_editor() as editor:
+            for index in Game._meta.indexes:
+                editor.add_index(self.model, staged_index(index))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT sql FROM sqlite_master WHERE name = %s', [search.FTS_TABLE])
+            definition = cursor.fetchone()[0]
+            cursor.execute(definition.replace(search.FTS_TABLE, self.fts_staging, 1))
+            cursor.execute(f'INSERT INTO {self.fts_staging}(rowid, name) SELECT id, name FROM {staging}')
+            cursor.execute(f"INSERT INTO {self.fts_staging}({self.fts_staging}) VALUES ('optimize')")
+
+        self.stats.update(loaded=loaded, new=new, tags_changed=len(self.changed_ids),
+                          prepare_seconds=round(time.perf_counter() - started, 3))
+        return self.stats
+
+    def swap(self):
+        """Put the staging tables in place of the live ones in one transaction"""
+        started = time.perf_counter()
+        staging, live = _quote(STAGING_TABLE), _quote(Game._meta.db_table)
+        if not connection.disable_constraint_checking():
+            raise NotSupportedError('The catalog swap cannot run inside a transaction')
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA legacy_alter_table = ON')
+            with transaction.atomic(), connection.cursor() as cursor:
+                # games other apps still point to stay, even if RAWG no longer lists them
+                referenced = ' OR '.join(
+                    f'live.id IN (SELECT {_quote(column)} FROM {_quote(table)})'
+                    for table, column in _referencing_tables()
+                ) or '0'
+                cursor.execute(
+                    f'SELECT id FROM {live} AS live WHERE ({referenced}) '
+                    f'AND NOT EXISTS (SELECT 1 FROM {staging} AS s WHERE s.id = live.id)'
+                )
+                carried = [row[0] for row in cursor.fetchall()]
+                for start in range(0, len(carried), search.INDEX_BATCH_SIZE):
+                    batch = carried[start:start + search.INDEX_BATCH_SIZE]
+                    placeholders = ', '.join(['%s'] * len(batch))
+                    cursor.execute(
+                        f'INSERT INTO {staging} ({_columns()}) SELECT {_columns()} FROM {live} WHERE id IN ({placeholders})',
+                        batch,
+                    )
+                    cursor.execute(
+                        f'INSERT INTO {self.fts_staging}(rowid, name) SELECT id, name FROM {live} WHERE id IN ({placeholders})',
+                        batch,
+                    )
+                cursor.execute(
+                    f'SELECT id FROM {live} AS live WHERE NOT EXISTS (SELECT 1 FROM {staging} AS s WHERE s.id = live.id)'
+                )
+                removed = [row[0] for row in cursor.fetchall()]
+
+                cursor.execute(f'ALTER TABLE {live} RENAME TO {_quote(OLD_TABLE)}')
+                cursor.execute(f'ALTER TABLE {staging} RENAME TO {live}')
+                cursor.execute(f'ALTER TABLE {search.FTS_TABLE} RENAME TO {self.fts_old}')
+                cursor.execute(f'ALTER TABLE {self.fts_staging} RENAME TO {search.FTS_TABLE}')
+
+                # derived rows of games that are gone (tag links, similar games)
+                for start in range(0, len(removed), search.INDEX_BATCH_SIZE):
+                    batch = removed[start:start + search.INDEX_BATCH_SIZE]
+                    for field_name, _, _ in TAG_FIELDS:
+                        getattr(Game, field_name).through.objects.filter(game_id__in=batch).delete()
+                    SimilarGame.objects.filter(Q(game_id__in=batch) | Q(similar_id__in=batch)).delete()
+
+                # tag links of new games and games whose genres, platforms or stores changed
+                # (Game now reads the swapped-in table)
+                for start in range(0, len(self.changed_ids), TAG_SYNC_BATCH_SIZE):
+                    batch = self.changed_ids[start:start + TAG_SYNC_BATCH_SIZE]
+                    sync_game_tags(Game.objects.filter(id__in=batch).only('id', 'genres', 'platforms', 'stores'))
+
+                # raises IntegrityError (and rolls the swap back) if a review or wishlist
+                # entry still points at a missing game
+                connection.check_constraints(table_names=[table for table, _ in _referencing_tables()])
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA legacy_alter_table = OFF')
+            connection.enable_constraint_checking()
+
+        self.stats.update(carried_over=len(carried), removed=len(removed),
+                          swap_seconds=round(time.perf_counter() - started, 3))
+        return self.stats
+
+    def cleanup(self):
+        """Drop the replaced tables and give the new table's indexes the model's names"""
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {_quote(OLD_TABLE)}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.fts_old}')
+        for index in Game._meta.indexes:
+            # one short transaction per index; the staged copy serves queries meanwhile
+            with connection.schema_editor() as editor:
+                editor.add_index(Game, index)
+            with connection.schema_editor() as editor:
+                editor.remove_index(Game, staged_index(index))
+        self.stats['cleanup_seconds'] = round(time.perf_counter() - started, 3)
+
+    def drop(self):
+        """Abandon the reload; the live tables are not touched"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {_quote(STAGING_TABLE)}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.fts_staging}')
@@ -0,0 +1,112 @@
+"""
+Full-text search over Game.name.
+
+SQLite keeps a separate FTS5 table (games_game_fts, rowid = Game.id, mapped
+read-only as GameSearchEntry) that is updated through games.signals and
+fetch_game_data. PostgreSQL uses a GIN expression index on
+to_tsvector('simple', name), which the database keeps up to date by
+itself. Other backends fall back to a case-insensitive scan.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'games_game_fts'
+PG_INDEX = 'game_name_fts_idx'
+PG_VECTOR = "to_tsvector('simple', name)"
+PG_QUALIFIED_VECTOR = """to_tsvector('simple', "games_game"."name")"""
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+INDEX_BATCH_SIZE = 500
+
+
+def is_supported():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def tokenize(query):
+    """Split a user query into lowercase word tokens (punctuation is dropped)"""
+    return TOKEN_PATTERN.findall((query or '').lower())
+
+
+def search_games(queryset, query):
+    """
+    Filter a Game queryset to names matching every term of `query`
+    (each term prefix-matched) and annotate it with `search_rank`,
+    where a higher rank means a better match.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'sqlite':
+        # "dark sou" -> "dark"* "sou"*  (implicit AND, prefix match)
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(search_entry__name__match=match).annotate(
+            # FTS5 rank is bm25(), lower-is-better, so negate it
+            search_rank=-F('search_entry__rank')
+        )
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT id FROM games_game WHERE {PG_VECTOR} "
+                f"@@ to_tsquery('simple', %s)",
+                [tsquery],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({PG_QUALIFIED_VECTOR}, "
+                f"to_tsquery('simple', %s))",
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+    for token in tokens:
+        queryset = queryset.filter(name__icontains=token)
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_games(games):
+    """Insert or refresh the search entries of the given Game instances"""
+    if connection.vendor != 'sqlite':
+        return
+    rows = [(game.id, game.name or '') for game in games]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), INDEX_BATCH_SIZE):
+            batch = rows[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                [game_id for game_id, _ in batch],
+            )
+            cursor.executemany(f'INSERT INTO {FTS_TABLE}(rowid, name) VALUES (%s, %s)', batch)
+
+
+def remove_games(game_ids):
+    """Drop the search entries of the given game IDs"""
+    if connection.vendor != 'sqlite':
+        return
+    game_ids = list(game_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(game_ids), INDEX_BATCH_SIZE):
+            batch = game_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', batch)
+
+
+def rebuild_index():
+    """Rebuild the whole search index from games_game and return the row count"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, name) SELECT id, name FROM games_game')
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'REINDEX INDEX {PG_INDEX}')
+        cursor.execute('SELECT COUNT(*) FROM games_game')
+        return cursor.fetchone()[0]
@@ -4,4 +4,22 @@ from .models import Game
 class GameSerializer(serializers.ModelSerializer):
     class Meta:
         model = Game
-        fields = '__all__'  # 모든 필드를 JSON으로 반환
\ No newline at end of file
+        # 모든 필드를 JSON으로 반환 (정규화된 태그 M2M은 genres/platforms/stores와 중복이므로 제외)
+        exclude = ['genre_tags', 'platform_tags', 'store_tags']
+
+
+class GameListSerializer(serializers.ModelSerializer):
+    """게임 목록 카드용 경량 시리얼라이저 (description, screenshots 제외)"""
+    genres = serializers.ListField(child=serializers.CharField(), source='get_genres', read_only=True)
+    platforms = serializers.ListField(child=serializers.CharField(), source='get_platforms', read_only=True)
+
+    class Meta:
+        model = Game
+        fields = [
+            'id', 'name', 'released', 'background_image', 'rating',
+            'metacritic_score', 'playtime', 'genres', 'platforms', 'esrb_rating',
+        ]
+
+
+# 목록 조회 시 .only()로 불러올 컬럼
+GAME_LIST_FIELDS = GameListSerializer.Meta.fields
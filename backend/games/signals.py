@@ -0,0 +1,73 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog_index, search
+from .models import Game
+from .tags import sync_game_tags
+from .versioning import bump_catalog_version
+
+# Columns that never affect catalog listing/filtering; saves touching only
+# these (e.g. the description backfill) leave the catalog version alone
+NON_CATALOG_FIELDS = {'description', 'screenshots', 'updated_at'}
+# JSON list columns mirrored in the tag tables (games.tags)
+TAG_COLUMNS = {'genres', 'platforms', 'stores'}
+
+
+@receiver(post_save, sender=Game)
+def index_game_on_save(sender, instance, update_fields=None, **kwargs):
+    """Keep the full-text search entry in sync with the game name"""
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    search.index_games([instance])
+
+
+@receiver(post_save, sender=Game)
+def sync_tags_on_save(sender, instance, update_fields=None, **kwargs):
+    """Keep the genre/platform/store link tables (the SQL filter path) in sync with the JSON columns"""
+    if update_fields is not None and not set(update_fields) & TAG_COLUMNS:
+        return
+    sync_game_tags([instance])
+
+
+class CatalogChanges(threading.local):
+    """
+    Games saved or deleted by this thread's open transaction. Every change
+    registers an on_commit callback; the first one to run after the commit
+    takes the whole batch, so a bulk save or delete bumps the catalog
+    version once. A rolled-back transaction drops its callbacks and leaves
+    its ids here for the next flush, which re-reads the games.
+    """
+
+    def __init__(self):
+        self.game_ids = set()
+
+    def add(self, game_id, using):
+        self.game_ids.add(game_id)
+        transaction.on_commit(self.flush, using=using)
+
+    def flush(self):
+        if not self.game_ids:
+            return
+        game_ids, self.game_ids = self.game_ids, set()
+        version = bump_catalog_version()
+        catalog_index.games_changed(game_ids, version)
+
+
+catalog_changes = CatalogChanges()
+
+
+@receiver(post_save, sender=Game)
+def bump_catalog_on_save(sender, instance, using, update_fields=None, **kwargs):
+    """Bump the catalog version and update this process's catalog index once the save commits"""
+    if update_fields is not None and set(update_fields) <= NON_CATALOG_FIELDS:
+        return
+    catalog_changes.add(instance.pk, using)
+
+
+@receiver(post_delete, sender=Game)
+def unindex_game_on_delete(sender, instance, using, **kwargs):
+    search.remove_games([instance.pk])
+    catalog_changes.add(instance.pk, using)
@@ -0,0 +1,216 @@
+"""
+Offline "similar games" computation.
+
+Every game becomes a sparse row vector over its genre, platform and store
+tags (one column per tag, weighted per facet) and is L2-normalised, so a
+dot product is the cosine similarity. Games with the same tags share one
+"profile" row, and only distinct profiles are scored: profiles are
+processed in blocks, each block multiplied against the whole catalog
+(sparse tag matrix x the block's densified profiles, so nothing of size
+features x games is ever dense) into a dense block x catalog score
+matrix whose size is bounded by the block size, and the top K columns of
+every row are picked with argpartition. All rankings are computed before
+the write transaction, which only replaces the SimilarGame table; the
+similar games endpoint reads it with one indexed lookup.
+"""
+import logging
+import time
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+
+from .models import Game, SimilarGame
+
+logger = logging.getLogger(__name__)
+
+# facet -> (Game link table, tag column, weight)
+FACET_WEIGHTS = {
+    'genres': (Game.genre_tags.through, 'genre_id', 1.0),
+    'platforms': (Game.platform_tags.through, 'platform_id', 0.5),
+    'stores': (Game.store_tags.through, 'store_id', 0.25),
+}
+DEFAULT_TOP_K = 10
+DEFAULT_MEMORY_MB = 256  # budget for one score block
+WRITE_BATCH_SIZE = 5000
+TIEBREAK_WEIGHT = 1e-6  # among equal scores, prefer higher-rated games
+BLOCK_ROW_BYTES = 16  # per profile and game: float32 product, its transposed copy, tie-broken ranking, slack
+
+
+class MemoryBudgetError(ValueError):
+    pass
+
+
+def build_feature_matrix():
+    """
+    Return (game_ids, X, popularity): game ids in row order, the
+    L2-normalised CSR tag matrix and each game's rating scaled to 0..1.
+    """
+    game_ids, ratings = [], []
+    for game_id, rating in Game.objects.order_by('id').values_list('id', 'rating').iterator(chunk_size=10000):
+        game_ids.append(game_id)
+        ratings.append(rating or 0.0)
+    game_ids = np.array(game_ids, dtype=np.int64)
+
+    rows, cols, data = [], [], []
+    offset = 0
+    for through, column, weight in FACET_WEIGHTS.values():
+        links = np.array(list(through.objects.values_list('game_id', column)), dtype=np.int64).reshape(-1, 2)
+        if not len(links):
+            continue
+        tag_ids, tag_cols = np.unique(links[:, 1], return_inverse=True)
+        rows.append(np.searchsorted(game_ids, links[:, 0]))
+        cols.append(tag_cols + offset)
+        data.append(np.full(len(links), weight, dtype=np.float32))
+        offset += len(tag_ids)
+
+    if not rows:
+        X = sparse.csr_matrix((len(game_ids), 0), dtype=np.float32)
+    else:
+        X = sparse.csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(game_ids), offset),
+            dtype=np.float32,
+        )
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    X = sparse.diags(1.0 / norms).astype(np.float32) @ X
+    popularity = np.clip(np.array(ratings, dtype=np.float32) / 5.0, 0.0, 1.0)
+    return game_ids, X.tocsr(), popularity
+
+
+def unique_profiles(X):
+    """
+    Return (P, inverse): the distinct rows of X, and for every game the
+    index of its row in P. A row is determined by its tag columns, since
+    the weights follow from the columns.
+    """
+    X.sort_indices()
+    index_of = {}
+    first_rows = []
+    inverse = np.empty(X.shape[0], dtype=np.int64)
+    indptr, indices = X.indptr, X.indices
+    for row in range(X.shape[0]):
+        key = indices[indptr[row]:indptr[row + 1]].tobytes()
+        profile = index_of.get(key)
+        if profile is None:
+            profile = index_of[key] = len(first_rows)
+            first_rows.append(row)
+        inverse[row] = profile
+    return X[first_rows], inverse
+
+
+def block_size_for(n_games, memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Profiles per block so that one block's scores (the catalog x block
+    product, its transpose and the tie-broken ranking) fit in memory_mb.
+    Raises MemoryBudgetError if not even one profile does.
+    """
+    row_bytes = BLOCK_ROW_BYTES * max(n_games, 1)
+    block_size = int(memory_mb * 1024 * 1024 // row_bytes)
+    if block_size < 1:
+        raise MemoryBudgetError(
+            f'A score row of {n_games} games needs {row_bytes / 1024 / 1024:.3g} MB, '
+            f'more than the {memory_mb} MB memory budget'
+        )
+    return block_size
+
+
+def top_k_blocks(P, X, popularity, top_k=DEFAULT_TOP_K, block_size=None):
+    """
+    Yield (profile_start, neighbours, scores) per block of profile rows:
+    neighbours holds the game (row of X) indices of each profile's top K,
+    best first, -1 where fewer than K games have a positive score.
+    """
+    n = X.shape[0]
+    k = min(top_k, n)
+    if k <= 0 or not P.shape[0]:
+        return
+    block_size = block_size or block_size_for(n)
+    bias = popularity * TIEBREAK_WEIGHT
+
+    for start in range(0, P.shape[0], block_size):
+        end = min(start + block_size, P.shape[0])
+        scores = np.ascontiguousarray((X @ P[start:end].T.toarray()).T)
+        ranked = scores + bias
+
+        top = np.argpartition(-ranked, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(ranked, top, axis=1), axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top[top_scores <= 0] = -1
+        yield start, top, top_scores
+
+
+def similar_rows(game_ids, P, X, popularity, inverse, top_k=DEFAULT_TOP_K, block_size=None, progress=None):
+    """
+    Rank every game's neighbours; returns (game_id, similar_id, rank,
+    score) column arrays, ready to be written.
+    """
+    # profile -> its games, so each profile's ranking is expanded once per member
+    members = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[members], np.arange(P.shape[0] + 1))
+
+    columns = ([], [], [], [])
+    # one extra neighbour per profile: the game itself is dropped from its own list
+    for start, neighbours, scores in top_k_blocks(P, X, popularity, top_k + 1, block_size):
+        block = ([], [], [], [])
+        for offset, (row, row_scores) in enumerate(zip(neighbours, scores)):
+            profile = start + offset
+            ranked = [(col, score) for col, score in zip(row, row_scores) if col >= 0]
+            for game_row in members[bounds[profile]:bounds[profile + 1]]:
+                rank = 0
+                for col, score in ranked:
+                    if col == game_row:
+                        continue
+                    rank += 1
+                    if rank > top_k:
+                        break
+                    for values, value in zip(block, (game_row, col, rank, score)):
+                        values.append(value)
+        for values, block_values in zip(columns, block):
+            values.append(np.array(block_values))
+        if progress:
+            progress(int(bounds[min(start + len(neighbours), P.shape[0])]), len(game_ids))
+
+    if not columns[0]:
+        return tuple(np.empty(0) for _ in columns)
+    game_rows, neighbour_rows, ranks, scores = (np.concatenate(values) for values in columns)
+    return (game_ids[game_rows.astype(np.int64)], game_ids[neighbour_rows.astype(np.int64)],
+            ranks.astype(np.int32), scores.astype(np.float32))
+
+
+def rebuild_similar_games(top_k=DEFAULT_TOP_K, block_size=None, memory_mb=DEFAULT_MEMORY_MB, progress=None):
+    """Recompute the SimilarGame table; returns a dict of counts and timings"""
+    started = time.time()
+    game_ids, X, popularity = build_feature_matrix()
+    P, inverse = unique_profiles(X)
+    built = time.time()
+    block_size = block_size or block_size_for(len(game_ids), memory_mb)
+    rows = similar_rows(game_ids, P, X, popularity, inverse, top_k, block_size, progress)
+    computed = time.time()
+
+    # the scoring runs before the transaction, which only swaps the rows
+    written = 0
+    with transaction.atomic():
+        SimilarGame.objects.all().delete()
+        for start in range(0, len(rows[0]), WRITE_BATCH_SIZE):
+            batch = [
+                SimilarGame(game_id=int(game_id), similar_id=int(similar_id), rank=int(rank),
+                            score=round(float(score), 6))
+                for game_id, similar_id, rank, score in zip(*(column[start:start + WRITE_BATCH_SIZE] for column in rows))
+            ]
+            SimilarGame.objects.bulk_create(batch)
+            written += len(batch)
+
+    return {
+        'games': len(game_ids),
+        'profiles': P.shape[0],
+        'features': X.shape[1],
+        'rows': written,
+        'block_size': block_size,
+        'feature_seconds': round(built - started, 2),
+        'score_seconds': round(computed - built, 2),
+        'write_seconds': round(time.time() - computed, 2),
+        'total_seconds': round(time.time() - started, 2),
+    }
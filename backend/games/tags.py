@@ -0,0 +1,79 @@
+from django.db import connection
+from django.db.models import Q
+
+from .models import Game, Genre, Platform, Store
+
+
+# (M2M field on Game, tag model, Game accessor returning the names)
+TAG_FIELDS = [
+    ('genre_tags', Genre, 'get_genres'),
+    ('platform_tags', Platform, 'get_platforms'),
+    ('store_tags', Store, 'get_stores'),
+]
+
+# JSON list column -> tag name lookup, for backends without JSON containment
+TAG_LOOKUPS = {
+    'genres': 'genre_tags__name',
+    'platforms': 'platform_tags__name',
+    'stores': 'store_tags__name',
+}
+
+
+def contains_any(field, names):
+    """
+    Q matching games whose `field` list contains any of `names`. Uses JSON
+    containment where the backend supports it (PostgreSQL, MySQL) and the
+    normalized tag tables otherwise (SQLite).
+    """
+    names = [name for name in names if name]
+    if not names:
+        return Q()
+    if connection.features.supports_json_field_contains:
+        condition = Q()
+        for name in names:
+            condition |= Q(**{f'{field}__contains': [name]})
+        return condition
+    return Q(id__in=Game.objects.filter(**{f'{TAG_LOOKUPS[field]}__in': names}).values('id'))
+
+
+def get_tag_ids(model, names):
+    """Return {name: id} for the given names, creating missing tag rows in bulk"""
+    names = set(names)
+    if not names:
+        return {}
+    ids = dict(model.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = names - ids.keys()
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(model.objects.filter(name__in=missing).values_list('name', 'id'))
+    return ids
+
+
+def sync_game_tags(games):
+    """
+    Rebuild the genre/platform/store links of the given Game instances
+    from their JSON list columns, using a fixed number of queries per batch.
+    """
+    games = list(games)
+    if not games:
+        return
+    game_ids = [game.id for game in games]
+
+    for field_name, model, getter in TAG_FIELDS:
+        through = getattr(Game, field_name).through
+        column = f'{model._meta.model_name}_id'
+        names_by_game = {
+            game.id: {name for name in getattr(game, getter)() if name}
+            for game in games
+        }
+        ids = get_tag_ids(model, {name for names in names_by_game.values() for name in names})
+
+        through.objects.filter(game_id__in=game_ids).delete()
+        through.objects.bulk_create(
+            [
+                through(game_id=game_id, **{column: ids[name]})
+                for game_id, names in names_by_game.items()
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
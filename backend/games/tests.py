@@ -1,3 +1,1234 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Review
+from wishlist.models import Wishlist
+
+import numpy as np
+
+from . import catalog_index, journal, reload, search, similarity
+from .cache import ResponseCache, game_list_cache
+from .archive import find_segments
+from .catalog_index import CatalogIndex
+from .checkpoints import get_checkpoint, parse_updated
+from .enrichment import DescriptionBackfill
+from .facets import count_facets
+from .ingest import upsert_games
+from .models import FetchRun, Game, RawgLookupMiss, SimilarGame
+from .negative_cache import is_blocked, purge_resolved, record_miss
+from .pagination import encode_cursor
+from .parsing import parse_game
+from .pipeline import FetchPipeline
+from .rawg import RawgClient, TokenBucket
+from .rawg_async import AdaptiveConcurrency
+from .rawg_stub import DEFAULT_PAGE_SIZE, list_game, start_stub_server
+from .search import search_games
+from .serializers import GAME_LIST_FIELDS
+from .tags import sync_game_tags
+from .versioning import get_catalog_version
+from .views import ORDERINGS, GameListView
+
+# The list endpoint without the catalog index (its background build runs on
+# another connection) and without the throttled catalog version read
+API_SETTINGS = {'GAME_CATALOG_INDEX_ENABLED': False, 'GAME_CATALOG_VERSION_CHECK_INTERVAL': 0}
+
+
+def create_stub_games(first_id, count):
+    """Store the games the RAWG stub serves for these ids, with their tag links and search entries"""
+    games = Game.objects.bulk_create(
+        [Game(**parse_game(list_game(game_id))) for game_id in range(first_id, first_id + count)]
+    )
+    sync_game_tags(games)
+    search.index_games(games)
+    return games
+
+
+class StubServerMixin:
+    """Start a RAWG stub per test and point the RAWG clients at it"""
+
+    stub_options = {}
+
+    def start_stub(self, **options):
+        server = start_stub_server(**{**self.stub_options, **options})
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings_override = override_settings(RAWG_API_BASE_URL=server.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def stub_client(self, api_key='test-key', **options):
+        """A client of the stub standing in for the web process's get_client()"""
+        client = RawgClient(api_key=api_key, rate_limit=0, backoff=0, **options)
+        self.addCleanup(client.close)
+        return client
+
+    def fetch(self, **options):
+        out = io.StringIO()
+        call_command('fetch_game_data', stdout=out, **{'rate_limit': 0, 'workers': 2, 'retry_rounds': 0, **options})
+        return out.getvalue()
+
+
+@override_settings(**API_SETTINGS)
+class GameListTestCase(TestCase):
+    games_count = 120
+
+    def setUp(self):
+        game_list_cache.clear()
+        cache.clear()
+        create_stub_games(1, self.games_count)
+        self.client = APIClient()
+
+    def list_games(self, headers=None, **data):
+        return self.client.post('/games/', data, format='json', **(headers or {}))
+
+
+class GameListFilterTests(GameListTestCase):
+    def listed_ids(self, **filters):
+        response = self.list_games(items_per_page=100, ordering='-rating', **filters)
+        self.assertEqual(response.status_code, 200)
+        ids = [game['id'] for game in response.data['games']]
+        if response.data['total_pages'] > 1:
+            ids += [game['id'] for game in self.list_games(items_per_page=100, ordering='-rating', page=2,
+                                                           **filters).data['games']]
+        self.assertEqual(len(ids), response.data['total_items'])
+        return set(ids)
+
+    def test_tag_filters_match_the_json_columns(self):
+        cases = [
+            ({'genres': 'Action'}, lambda game: 'Action' in game.genres),
+            ({'genres': 'FPS'}, lambda game: 'Shooter' in game.genres),
+            ({'platforms': 'PS5'}, lambda game: 'PlayStation 5' in game.platforms),
+            # a value matches every name containing it, as the old substring test did
+            ({'platforms': 'PlayStation'}, lambda game: any('PlayStation' in name for name in game.platforms)),
+            ({'stores': 'Steam', 'esrb_rating': 'Mature'},
+             lambda game: 'Steam' in game.stores and game.esrb_rating == 'Mature'),
+        ]
+        for filters, selects in cases:
+            with self.subTest(filters=filters):
+                expected = {game.id for game in Game.objects.all() if selects(game)}
+                self.assertTrue(expected)
+                self.assertEqual(self.listed_ids(**filters), expected)
+
+    def test_all_values_do_not_filter(self):
+        self.assertEqual(len(self.listed_ids(genres='All Genres', platforms='All Platforms')), self.games_count)
+
+    def test_pages_are_counted_and_sliced(self):
+        response = self.list_games(items_per_page=50, page=3)
+        self.assertEqual(response.data['total_items'], self.games_count)
+        self.assertEqual(response.data['total_pages'], 3)
+        self.assertEqual(len(response.data['games']), 20)
+
+    @override_settings(GAME_LIST_MAX_PAGE_SIZE=30)
+    def test_paging_parameters_are_validated(self):
+        self.assertEqual(self.list_games(items_per_page='ten').status_code, 400)
+        self.assertEqual(self.list_games(page=[2]).status_code, 400)
+
+        response = self.list_games(page=-1, items_per_page=0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['current_page'], 1)
+        self.assertEqual(len(response.data['games']), 1)
+        self.assertEqual(len(self.list_games(items_per_page=10000).data['games']), 30)
+
+    def test_saving_a_game_updates_its_tags(self):
+        game = Game.objects.get(id=4)
+        game.genres = ['Puzzle', 'Casual']
+        game.save()
+        self.assertEqual(set(game.genre_tags.values_list('name', flat=True)), {'Puzzle', 'Casual'})
+        self.assertIn(4, self.listed_ids(genres='Casual'))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'the MATCH lookup is backed by the SQLite FTS5 table')
+class GameSearchTests(GameListTestCase):
+    def search_ids(self, query):
+        response = self.list_games(search=query, items_per_page=100)
+        self.assertEqual(response.status_code, 200)
+        return [game['id'] for game in response.data['games']]
+
+    def test_every_term_is_prefix_matched(self):
+        self.assertEqual(set(self.search_ids('stub game 7')), {7, *range(70, 80)})
+        # punctuation is dropped instead of reaching the MATCH syntax
+        self.assertEqual(set(self.search_ids('Stub-Game: "12!')), {12, 120})
+        self.assertEqual(Game.objects.filter(search_entry__name__match='"stu"*').count(), self.games_count)
+
+    def test_better_matches_rank_first(self):
+        Game.objects.create(id=1001, name='Portal Knights: Gold Throne Collector Edition')
+        Game.objects.create(id=1002, name='Portal')
+        self.assertEqual(self.search_ids('portal'), [1002, 1001])
+
+    def test_saves_and_deletes_update_the_index(self):
+        game = Game.objects.get(id=5)
+        game.name = 'Hollow Knight'
+        game.save()
+        Game.objects.filter(id=6).delete()
+
+        self.assertEqual(self.search_ids('hollow kn'), [5])
+        self.assertNotIn(5, self.search_ids('stub game'))
+        self.assertFalse(search_games(Game.objects.all(), 'stub game 6').filter(id=6).exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.FTS_TABLE} WHERE rowid = 6')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_rebuild_command_restores_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+        self.assertFalse(search_games(Game.objects.all(), 'stub game 42').exists())
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(list(search_games(Game.objects.all(), 'stub game 42').values_list('id', flat=True)), [42])
+
+
+class CursorPaginationTests(GameListTestCase):
+    def walk(self, ordering, **filters):
+        ids, cursor = [], None
+        for _ in range(self.games_count):
+            response = self.list_games(pagination='cursor', ordering=ordering, items_per_page=7,
+                                       cursor=cursor, **filters)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(game['id'] for game in response.data['games'])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids
+        self.fail('cursor pagination did not reach the end')
+
+    def test_every_game_once_in_sql_order(self):
+        for ordering in ('-metacritic_score', 'metacritic_score', '-rating', 'released', '-name'):
+            with self.subTest(ordering=ordering):
+                ids = self.walk(ordering)
+                tiebreaker = '-id' if ordering.startswith('-') else 'id'
+                expected = list(Game.objects.order_by(ordering, tiebreaker).values_list('id', flat=True))
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(ids, expected)
+
+    def test_filtered_walk(self):
+        ids = self.walk('-metacritic_score', genres='Action', platforms='PS5')
+        expected = {game.id for game in Game.objects.all()
+                    if 'Action' in game.genres and 'PlayStation 5' in game.platforms}
+        self.assertTrue(expected)
+        self.assertEqual(len(ids), len(expected))
+        self.assertEqual(set(ids), expected)
+
+    def test_prev_cursor_returns_the_previous_page(self):
+        first = self.list_games(pagination='cursor', items_per_page=10)
+        second = self.list_games(pagination='cursor', items_per_page=10, cursor=first.data['next_cursor'])
+        back = self.list_games(pagination='cursor', items_per_page=10, cursor=second.data['prev_cursor'])
+        self.assertEqual(back.data['games'], first.data['games'])
+
+    def test_cursor_of_another_ordering_is_rejected(self):
+        first = self.list_games(pagination='cursor', ordering='-rating', items_per_page=10)
+        response = self.list_games(pagination='cursor', ordering='rating', cursor=first.data['next_cursor'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_forged_cursors_are_rejected(self):
+        forged = [
+            ('-metacritic_score', 'not base64 !'),
+            ('-metacritic_score', encode_cursor(['next'])),
+            ('-metacritic_score', encode_cursor({'o': '-metacritic_score', 'd': 'next', 'id': 'abc', 'v': 80})),
+            ('-metacritic_score', encode_cursor({'o': '-metacritic_score', 'd': 'next', 'id': True, 'v': 80})),
+            ('-metacritic_score', encode_cursor({'o': '-metacritic_score', 'd': 'next', 'id': 5, 'v': 'high'})),
+            ('-rating', encode_cursor({'o': '-rating', 'd': 'next', 'id': 5, 'v': [4.5]})),
+            ('released', encode_cursor({'o': 'released', 'd': 'next', 'id': 5, 'v': 'yesterday'})),
+            ('name', encode_cursor({'o': 'name', 'd': 'prev', 'id': 5, 'v': 42})),
+        ]
+        for ordering, cursor in forged:
+            with self.subTest(ordering=ordering, cursor=cursor):
+                response = self.list_games(pagination='cursor', ordering=ordering, cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+
+        # a NULL sort value is a valid position
+        cursor = encode_cursor({'o': '-metacritic_score', 'd': 'next', 'id': 5, 'v': None})
+        self.assertEqual(self.list_games(pagination='cursor', cursor=cursor).status_code, 200)
+
+
+class CatalogIndexTests(GameListTestCase):
+    FILTERS = [
+        {},
+        {'genres': 'Action'},
+        {'genres': 'FPS'},
+        {'platforms': 'PlayStation'},
+        {'platforms': 'PS5'},
+        {'platforms': 'Switch'},
+        {'platforms': 'Xbox Series X'},
+        {'stores': 'Steam'},
+        {'esrb_rating': 'Mature'},
+        {'genres': 'RPG', 'platforms': 'PC', 'stores': 'GOG'},
+        {'genres': 'No Such Genre'},
+    ]
+    ORDERINGS = ['-metacritic_score', 'metacritic_score', '-rating', 'rating']
+
+    def setUp(self):
+        super().setUp()
+        self.index = CatalogIndex.build(version=get_catalog_version())
+        # a deleted, an updated and a new game exercise the tombstone and upsert paths
+        Game.objects.filter(id=5).delete()
+        self.index.remove(5)
+        game = Game.objects.get(id=6)
+        game.metacritic_score = None
+        game.genres = ['Action', 'Puzzle']
+        game.save()
+        self.index.upsert(game)
+        (game,) = create_stub_games(self.games_count + 1, 1)
+        self.index.upsert(game)
+
+    def sql_ids(self, filters, ordering):
+        games = GameListView().filtered_queryset({'search': '', 'filters': filters})
+        tiebreaker = '-id' if ordering.startswith('-') else 'id'
+        return list(games.order_by(ordering, tiebreaker).values_list('id', flat=True))
+
+    def test_query_matches_sql(self):
+        for filters in self.FILTERS:
+            for ordering in self.ORDERINGS:
+                with self.subTest(filters=filters, ordering=ordering):
+                    expected = self.sql_ids(filters, ordering)
+                    self.assertEqual(self.index.query(filters, ordering, 0, 2 * self.games_count),
+                                     (expected, len(expected)))
+                    self.assertEqual(self.index.query(filters, ordering, 10, 15),
+                                     (expected[10:25], len(expected)))
+
+    def test_unindexed_ordering_falls_back(self):
+        self.assertIsNone(self.index.query({}, 'released', 0, 10))
+
+    def test_committed_changes_reach_the_index(self):
+        version = self.index.version = get_catalog_version()
+        with mock.patch.object(catalog_index, '_index', self.index):
+            with self.captureOnCommitCallbacks(execute=True):
+                game = Game.objects.get(id=7)
+                game.metacritic_score = 100
+                game.genres = ['Puzzle']
+                game.save()
+                Game.objects.filter(id__in=[8, 9, 10]).delete()
+
+        # one version bump for the whole transaction, which the index follows
+        self.assertEqual(get_catalog_version(), version + 1)
+        self.assertEqual(self.index.version, version + 1)
+        self.assertEqual(self.index.query({}, '-metacritic_score', 0, 1)[0], [7])
+        self.assertNotIn(7, self.index.query({'genres': 'Action'}, 'rating', 0, 200)[0])
+        for ordering in self.ORDERINGS:
+            self.assertEqual(self.index.query({}, ordering, 0, 200)[0], self.sql_ids({}, ordering))
+
+    def test_rolled_back_changes_leave_the_index_alone(self):
+        before = self.index.query({}, '-rating', 0, 200)
+        with mock.patch.object(catalog_index, '_index', self.index):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    Game.objects.filter(id=7).delete()
+                    raise RuntimeError('rolled back')
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.index.query({}, '-rating', 0, 200), before)
+
+    @override_settings(GAME_CATALOG_INDEX_ENABLED=True, GAME_CATALOG_INDEX_MIN_TOMBSTONES=5)
+    def test_tombstones_trigger_a_compacting_rebuild(self):
+        self.index.version = get_catalog_version()
+        # past both the setting and a tenth of the games
+        for game_id in range(10, 30):
+            self.index.remove(game_id)
+        self.assertTrue(self.index.needs_compaction())
+
+        with mock.patch.object(catalog_index, '_index', self.index), \
+                mock.patch.object(catalog_index, '_start_build') as start_build:
+            # the current index keeps answering while its replacement is built
+            self.assertIs(catalog_index.get_catalog_index(), self.index)
+        start_build.assert_called_once_with(self.index.version)
+
+        compacted = CatalogIndex.build(self.index.version)
+        self.assertEqual(compacted.dead_count, 0)
+        self.assertFalse(compacted.needs_compaction())
+
+
+class FacetCountTests(GameListTestCase):
+    def expected_counts(self, games):
+        counts = {facet: Counter() for facet in ('genres', 'platforms', 'stores', 'esrb_rating')}
+        for game in games:
+            for facet in ('genres', 'platforms', 'stores'):
+                counts[facet].update(getattr(game, facet))
+            if game.esrb_rating:
+                counts['esrb_rating'][game.esrb_rating] += 1
+        return {facet: dict(counter) for facet, counter in counts.items()}
+
+    def test_facets_count_the_filtered_games(self):
+        response = self.list_games(include_facets=True, genres='Action', items_per_page=5)
+        facets = response.data['facets']
+        self.assertEqual(facets, self.expected_counts(game for game in Game.objects.all() if 'Action' in game.genres))
+        self.assertEqual(facets['genres']['Action'], response.data['total_items'])
+        # largest count first
+        for counts in facets.values():
+            self.assertEqual(list(counts.values()), sorted(counts.values(), reverse=True))
+
+    def test_facets_only_on_request(self):
+        self.assertNotIn('facets', self.list_games().data)
+        self.assertIn('facets', self.list_games(pagination='cursor', include_facets=True).data)
+
+    def test_index_counts_match_sql(self):
+        index = CatalogIndex.build(version=get_catalog_version())
+        for filters in CatalogIndexTests.FILTERS:
+            with self.subTest(filters=filters):
+                games = GameListView().filtered_queryset({'search': '', 'filters': filters})
+                self.assertEqual(index.facet_counts(filters), count_facets(games))
+
+
+class ResponseCacheTests(GameListTestCase):
+    games_count = 20
+
+    def test_normalized_requests_share_an_entry(self):
+        self.assertEqual(self.list_games(genres='Action', search='stub ')['X-Cache'], 'MISS')
+        self.assertEqual(self.list_games(genres='Action', search='stub')['X-Cache'], 'HIT')
+        # "all" values, defaults and unused pagination fields do not change the key
+        response = self.list_games(search=' stub', platforms='All Platforms', page=1, cursor='ignored', genres='Action')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(self.list_games(genres='Action', search='stub', page=2)['X-Cache'], 'MISS')
+
+    def test_catalog_changes_invalidate(self):
+        self.list_games()
+        with self.captureOnCommitCallbacks(execute=True):
+            game = Game.objects.get(id=3)
+            game.description = '<p>Described</p>'
+            game.save(update_fields=['description', 'updated_at'])
+        self.assertEqual(self.list_games()['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            game.name = 'Renamed'
+            game.save()
+        response = self.list_games()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Renamed', [item['name'] for item in response.data['games']])
+
+    def test_search_index_rebuild_invalidates(self):
+        self.list_games(search='stub game 7')
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.list_games(search='stub game 7')['X-Cache'], 'MISS')
+
+    def test_lru_eviction_and_expiry(self):
+        lru = ResponseCache(max_entries=2, ttl=60)
+        lru.set(1, 'a', 'A')
+        lru.set(1, 'b', 'B')
+        lru.get(1, 'a')
+        lru.set(1, 'c', 'C')
+        self.assertEqual((lru.get(1, 'a'), lru.get(1, 'b'), lru.get(1, 'c')), ('A', None, 'C'))
+        self.assertEqual(lru.get(2, 'a'), None)  # a new catalog version empties the cache
+
+        expired = ResponseCache(ttl=0)
+        expired.set(1, 'a', 'A')
+        self.assertIsNone(expired.get(1, 'a'))
+        self.assertEqual(expired.stats()['expirations'], 1)
+
+
+class ListProjectionTests(GameListTestCase):
+    games_count = 10
+
+    def setUp(self):
+        super().setUp()
+        Game.objects.update(description='<p>' + 'long text ' * 500 + '</p>', screenshots=['a.jpg', 'b.jpg'])
+
+    def test_list_cards_leave_out_details(self):
+        for data in ({}, {'pagination': 'cursor'}, {'search': 'stub'}):
+            with self.subTest(**data):
+                game_list_cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.list_games(**data)
+                self.assertEqual(set(response.data['games'][0]), set(GAME_LIST_FIELDS))
+                self.assertIsInstance(response.data['games'][0]['genres'], list)
+                game_queries = [query['sql'] for query in queries if 'FROM "games_game"' in query['sql']]
+                self.assertTrue(game_queries)
+                for sql in game_queries:
+                    self.assertNotIn('"description"', sql)
+                    self.assertNotIn('"screenshots"', sql)
+
+    def test_detail_keeps_every_field(self):
+        data = self.client.get('/games/3/').data
+        self.assertTrue(data['description'].startswith('<p>long text'))
+        self.assertEqual(data['screenshots'], ['a.jpg', 'b.jpg'])
+
+
+class JsonColumnsMigrationTests(TransactionTestCase):
+    before = [('games', '0006_catalogversion')]
+    after = [('games', '0007_game_json_fields')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_text_columns_become_json_lists(self):
+        apps = self.migrate(self.before)
+        OldGame = apps.get_model('games', 'Game')
+        OldGame.objects.create(id=1, name='Listed', genres='["Action", "RPG"]', platforms='["PC"]',
+                               stores='Steam,GOG', screenshots='["a.jpg"]')
+        OldGame.objects.create(id=2, name='Blank', genres='', platforms='not json', stores='', screenshots=None)
+
+        apps = self.migrate(self.after)
+        NewGame = apps.get_model('games', 'Game')
+        listed, blank = NewGame.objects.get(id=1), NewGame.objects.get(id=2)
+        self.assertEqual((listed.genres, listed.platforms, listed.stores, listed.screenshots),
+                         (['Action', 'RPG'], ['PC'], ['Steam', 'GOG'], ['a.jpg']))
+        self.assertEqual((blank.genres, blank.platforms, blank.stores, blank.screenshots), (None, None, None, None))
+
+        # and back: stores is a comma-separated string again
+        apps = self.migrate(self.before)
+        self.assertEqual(apps.get_model('games', 'Game').objects.get(id=1).stores, 'Steam,GOG')
+
+
+class SortOrderTests(GameListTestCase):
+    games_count = 60
+
+    def test_pages_follow_every_ordering(self):
+        for ordering in sorted(ORDERINGS):
+            with self.subTest(ordering=ordering):
+                ids = []
+                for page in (1, 2, 3):
+                    response = self.list_games(ordering=ordering, items_per_page=25, page=page)
+                    self.assertEqual(response.status_code, 200)
+                    ids.extend(game['id'] for game in response.data['games'])
+                tiebreaker = '-id' if ordering.startswith('-') else 'id'
+                self.assertEqual(ids, list(Game.objects.order_by(ordering, tiebreaker).values_list('id', flat=True)))
+
+    def test_unsupported_ordering_is_rejected(self):
+        for ordering in ('description', '-updated_at', 'name; DROP TABLE games_game'):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.list_games(ordering=ordering).status_code, 400)
+
+    @skipUnless(connection.vendor == 'sqlite', 'reads the SQLite query plan')
+    def test_orderings_use_their_index(self):
+        for index in Game._meta.indexes:
+            field = index.fields[0]
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    tiebreaker = '-id' if ordering.startswith('-') else 'id'
+                    plan = Game.objects.order_by(ordering, tiebreaker)[:20].explain()
+                    self.assertIn(index.name, plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+
+class GameBatchTests(GameListTestCase):
+    games_count = 10
+
+    def test_games_in_request_order_with_missing_ids(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/games/batch/?ids=7, 3,999,7,1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['games']), [7, 3, 1])
+        self.assertEqual(response.data['games'][3]['name'], 'Stub Game 3')
+        self.assertIn('description', response.data['games'][3])
+        self.assertEqual(response.data['missing'], [999])
+
+    @override_settings(GAME_BATCH_MAX_IDS=3)
+    def test_invalid_ids_are_rejected(self):
+        for query in ('', '?ids=', '?ids=1,two', '?ids=1,2,3,4'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/games/batch/{query}').status_code, 400)
+        self.assertEqual(self.client.get('/games/batch/?ids=1,2,3,3,2').status_code, 200)
+
+
+class DescriptionBackfillTests(StubServerMixin, GameListTestCase):
+    games_count = 5
+
+    def test_detail_answers_locally_and_queues_a_backfill(self):
+        server = self.start_stub()
+        with mock.patch('games.views.get_client', return_value=self.stub_client()), \
+                mock.patch('games.views.description_backfill') as backfill:
+            response = self.client.get('/games/3/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['description_status'], 'pending')
+        backfill.enqueue.assert_called_once_with(3)
+        self.assertEqual(server.request_count, 0)
+
+        with mock.patch('games.views.get_client', return_value=self.stub_client(api_key='')):
+            self.assertEqual(self.client.get('/games/3/').data['description_status'], 'unavailable')
+
+    def test_backfill_stores_the_description(self):
+        server = self.start_stub()
+        with mock.patch('games.enrichment.get_client', return_value=self.stub_client()):
+            self.assertTrue(DescriptionBackfill().backfill(3))
+            # a game that has one is not overwritten
+            self.assertFalse(DescriptionBackfill().backfill(3))
+        self.assertEqual(Game.objects.get(id=3).description, '<p>Stub description for game 3.</p>')
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(self.client.get('/games/3/').data['description_status'], 'ready')
+
+    def test_concurrent_requests_share_one_backfill(self):
+        backfill = DescriptionBackfill()
+        executor = mock.Mock()
+        with mock.patch.object(backfill, '_get_executor', return_value=executor):
+            self.assertTrue(backfill.enqueue(3))
+            self.assertFalse(backfill.enqueue(3))
+            self.assertTrue(backfill.enqueue(4))
+        self.assertEqual(executor.submit.call_count, 2)
+        self.assertEqual(backfill.stats()['pending'], 2)
+
+
+@mock.patch.dict(os.environ, {'RAWG_API_KEY': 'test-key'})
+class EnrichGameDetailsTests(StubServerMixin, TestCase):
+    def setUp(self):
+        create_stub_games(1, 12)
+        Game.objects.filter(id__in=[2, 4]).update(screenshots=None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'enrich.json')
+
+    def enrich(self, **options):
+        call_command('enrich_game_details', rate_limit=0, workers=2, batch_size=5, stdout=io.StringIO(), **options)
+        with open(self.checkpoint) as f:
+            return json.load(f)
+
+    def test_resumes_after_the_checkpoint(self):
+        server = self.start_stub()
+        checkpoint = self.enrich(checkpoint=self.checkpoint, limit=5)
+        self.assertEqual((checkpoint['last_id'], checkpoint['processed']), (5, 5))
+        self.assertEqual(Game.objects.filter(description__isnull=False).count(), 5)
+
+        checkpoint = self.enrich(checkpoint=self.checkpoint)
+        self.assertEqual((checkpoint['last_id'], checkpoint['processed'], checkpoint['failed_ids']), (12, 12, []))
+        self.assertFalse(Game.objects.filter(description__isnull=True).exists())
+        self.assertEqual(server.request_count, 12)  # no game was asked for twice
+
+    def test_screenshots_fill_only_empty_lists(self):
+        self.start_stub()
+        with override_settings(GAME_ENRICH_CHECKPOINT=self.checkpoint):
+            self.enrich(screenshots=True)  # the checkpoint defaults to the setting
+        self.assertEqual(len(Game.objects.get(id=2).screenshots), 4)
+        self.assertEqual(len(Game.objects.get(id=3).screenshots), 2)  # the list endpoint's short set stays
+
+
+class RawgClientTests(StubServerMixin, TestCase):
+    def test_game_details(self):
+        self.start_stub()
+        client = self.stub_client()
+
+        self.assertEqual(client.game_details(7)['description'], '<p>Stub description for game 7.</p>')
+        self.assertEqual(len(client.games_page(2)['results']), DEFAULT_PAGE_SIZE)
+        self.assertEqual(len(client.game_screenshots(7)), 4)
+        stats = client.stats()
+        self.assertEqual((stats['calls'], stats['retries'], stats['statuses']), (3, 0, {'200': 3}))
+
+    def test_failures_are_retried_then_given_up(self):
+        server = self.start_stub(error_rate=1.0)
+        client = self.stub_client(max_retries=2)
+
+        self.assertIsNone(client.game_details(7))
+        self.assertEqual(server.request_count, 3)
+        self.assertEqual(client.stats()['retries'], 2)
+        self.assertEqual(client.stats()['failures'], 1)
+
+    def test_token_bucket_spaces_requests(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.01)
+        self.assertAlmostEqual(waits[3], 0.2, delta=0.01)
+        self.assertEqual(TokenBucket(rate=0).reserve(), 0.0)  # no limit
+
+
+@override_settings(RAWG_MISS_EMPTY_TTL=3600, RAWG_MISS_ERROR_TTL=60, RAWG_MISS_MAX_TTL=200)
+class NegativeCacheTests(StubServerMixin, GameListTestCase):
+    games_count = 5
+
+    def retry_in(self, game_id):
+        miss = RawgLookupMiss.objects.get(game_id=game_id)
+        return round((miss.retry_after - miss.updated_at).total_seconds())
+
+    def test_failed_lookup_blocks_further_calls(self):
+        server = self.start_stub(error_rate=1.0)
+        client = self.stub_client(max_retries=0)
+        with mock.patch('games.enrichment.get_client', return_value=client):
+            self.assertFalse(DescriptionBackfill().backfill(3))
+        self.assertTrue(is_blocked(3))
+        self.assertEqual(RawgLookupMiss.objects.get(game_id=3).reason, RawgLookupMiss.REASON_ERROR)
+
+        with mock.patch('games.views.get_client', return_value=client), \
+                mock.patch('games.views.description_backfill') as backfill:
+            self.assertEqual(self.client.get('/games/3/').data['description_status'], 'unavailable')
+            self.assertEqual(self.client.get('/games/4/').data['description_status'], 'pending')
+        backfill.enqueue.assert_called_once_with(4)
+        self.assertEqual(server.request_count, 1)
+
+    def test_failures_back_off_and_empty_answers_wait_longer(self):
+        for expected in (60, 120, 200, 200):
+            record_miss(3, RawgLookupMiss.REASON_ERROR)
+            self.assertEqual(self.retry_in(3), expected)
+        empty = mock.Mock(api_key='test-key', game_details=mock.Mock(return_value={'description': ''}))
+        with mock.patch('games.enrichment.get_client', return_value=empty):
+            DescriptionBackfill().backfill(4)
+        self.assertEqual(self.retry_in(4), 3600)
+
+    def test_success_and_described_games_clear_misses(self):
+        self.start_stub()
+        record_miss(3, RawgLookupMiss.REASON_ERROR)
+        record_miss(4, RawgLookupMiss.REASON_EMPTY)
+        RawgLookupMiss.objects.filter(game_id=3).update(retry_after=RawgLookupMiss.objects.get(game_id=3).updated_at)
+        with mock.patch('games.enrichment.get_client', return_value=self.stub_client()):
+            self.assertTrue(DescriptionBackfill().backfill(3))
+        self.assertFalse(RawgLookupMiss.objects.filter(game_id=3).exists())
+
+        Game.objects.filter(id=4).update(description='<p>From a sync</p>')
+        self.assertEqual(purge_resolved(), 1)
+        self.assertFalse(RawgLookupMiss.objects.exists())
+
+
+class ConditionalRequestTests(GameListTestCase):
+    games_count = 20
+
+    def test_list_not_modified_until_a_game_is_saved(self):
+        response = self.list_games(genres='Action')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.list_games(genres='Action', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        game = Game.objects.get(id=3)
+        game.rating = 4.9
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save()
+        response = self.list_games(genres='Action', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_description_only_save_keeps_the_list_etag(self):
+        etag = self.list_games()['ETag']
+        game = Game.objects.get(id=3)
+        game.description = '<p>Filled in later</p>'
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save(update_fields=['description', 'updated_at'])
+        self.assertEqual(self.list_games(headers={'HTTP_IF_NONE_MATCH': etag}).status_code, 304)
+
+    def test_detail_not_modified_until_the_game_is_saved(self):
+        Game.objects.filter(id=3).update(description='<p>Stored description</p>')
+        response = self.client.get('/games/3/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['description_status'], 'ready')
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get('/games/3/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        game = Game.objects.get(id=3)
+        game.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save()
+        response = self.client.get('/games/3/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Renamed')
+
+
+class SimilarGamesTests(GameListTestCase):
+    games_count = 80
+    top_k = 5
+
+    def brute_force_scores(self):
+        """Cosine similarity of every pair of games over their weighted JSON tag lists"""
+        games = list(Game.objects.order_by('id'))
+        facets = [(facet, weight) for facet, (_, _, weight) in similarity.FACET_WEIGHTS.items()]
+        features = sorted({(facet, name) for game in games for facet, _ in facets for name in getattr(game, facet)})
+        column = {feature: i for i, feature in enumerate(features)}
+        vectors = np.zeros((len(games), len(features)))
+        for row, game in enumerate(games):
+            for facet, weight in facets:
+                for name in getattr(game, facet):
+                    vectors[row, column[facet, name]] = weight
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return [game.id for game in games], vectors @ vectors.T
+
+    def test_rebuild_matches_brute_force_top_k(self):
+        # a block size below the profile count so the rows come from several blocks
+        stats = similarity.rebuild_similar_games(top_k=self.top_k, block_size=7)
+        self.assertGreater(stats['profiles'], 7)
+        ids, scores = self.brute_force_scores()
+        position = {game_id: i for i, game_id in enumerate(ids)}
+
+        stored = {}
+        for entry in SimilarGame.objects.order_by('game_id', 'rank'):
+            stored.setdefault(entry.game_id, []).append(entry)
+        self.assertEqual(stats['rows'], sum(len(entries) for entries in stored.values()))
+        for game_id in ids:
+            row = scores[position[game_id]]
+            expected = sorted((row[i] for i, other in enumerate(ids) if other != game_id and row[i] > 0), reverse=True)
+            entries = stored.get(game_id, [])
+            self.assertEqual([entry.rank for entry in entries], list(range(1, len(entries) + 1)))
+            self.assertNotIn(game_id, [entry.similar_id for entry in entries])
+            # same top-K scores, and every stored neighbour really has its stored score
+            np.testing.assert_allclose([entry.score for entry in entries], expected[:self.top_k], atol=1e-5)
+            np.testing.assert_allclose(
+                [row[position[entry.similar_id]] for entry in entries], [entry.score for entry in entries], atol=1e-5
+            )
+
+    def test_endpoint_serves_ranked_neighbours(self):
+        similarity.rebuild_similar_games(top_k=self.top_k)
+        response = self.client.get('/games/3/similar/', {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        expected = SimilarGame.objects.filter(game_id=3).order_by('rank')[:3]
+        self.assertEqual([game['id'] for game in response.data['similar']], [entry.similar_id for entry in expected])
+        self.assertEqual([game['score'] for game in response.data['similar']], [entry.score for entry in expected])
+
+        self.assertEqual(self.client.get('/games/3/similar/', {'limit': 0}).status_code, 400)
+        self.assertEqual(self.client.get('/games/999/similar/').status_code, 404)
+
+    def test_memory_budget_too_small_for_one_row(self):
+        with self.assertRaises(similarity.MemoryBudgetError):
+            similarity.block_size_for(100000, memory_mb=1)
+        with self.assertRaises(CommandError):
+            call_command('build_similar_games', memory_mb=0, stdout=io.StringIO())
+        self.assertFalse(SimilarGame.objects.exists())
+
+
+class UpsertGamesTests(GameListTestCase):
+    games_count = 3
+
+    def test_inserts_new_games_and_refreshes_stored_ones(self):
+        Game.objects.filter(id=2).update(
+            rating=0.1, description='<p>Enriched</p>', screenshots=['full-1.jpg', 'full-2.jpg'],
+        )
+        refreshed = {**parse_game(list_game(2)), 'name': 'Renamed Game', 'genres': ['Strategy']}
+        games_data = [parse_game(list_game(2)), refreshed] + [parse_game(list_game(game_id)) for game_id in (4, 5)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(upsert_games(games_data), (2, 1))
+
+        self.assertEqual(Game.objects.count(), 5)
+        game = Game.objects.get(id=2)
+        # the last copy of a game wins; list fields are refreshed, enrichment is kept
+        self.assertEqual(game.name, 'Renamed Game')
+        self.assertEqual(game.rating, list_game(2)['rating'])
+        self.assertEqual(game.description, '<p>Enriched</p>')
+        self.assertEqual(game.screenshots, ['full-1.jpg', 'full-2.jpg'])
+        self.assertEqual(list(game.genre_tags.values_list('name', flat=True)), ['Strategy'])
+        self.assertEqual(self.list_games(genres='Strategy').data['total_items'], 1)
+        self.assertEqual(list(search_games(Game.objects.all(), 'renamed').values_list('id', flat=True)), [2])
+        self.assertEqual(upsert_games([]), (0, 0))
+
+
+@override_settings(**API_SETTINGS)
+class FetchUpsertTests(StubServerMixin, TransactionTestCase):
+    def test_fetch_refreshes_stored_games_with_one_version_bump(self):
+        self.start_stub(catalog_size=2 * DEFAULT_PAGE_SIZE)
+        create_stub_games(1, 3)
+        Game.objects.filter(id=2).update(rating=0.1)
+        version = get_catalog_version()
+        output = self.fetch(max_pages=5)
+
+        self.assertIn(f'새 게임 {2 * DEFAULT_PAGE_SIZE - 3}개, 갱신된 게임 3개', output)
+        self.assertEqual(Game.objects.count(), 2 * DEFAULT_PAGE_SIZE)
+        self.assertEqual(Game.objects.get(id=2).rating, list_game(2)['rating'])
+        self.assertEqual(get_catalog_version(), version + 1)
+
+
+class IncrementalSyncTests(StubServerMixin, TransactionTestCase):
+    def updated(self, game_id):
+        return parse_updated(list_game(game_id)['updated'])
+
+    def test_incremental_needs_a_checkpoint(self):
+        self.start_stub()
+        with self.assertRaises(CommandError):
+            self.fetch(incremental=True)
+
+    def test_sync_stops_at_seen_games_and_advances_the_checkpoint(self):
+        # the stub serves newest first, so with 100 games page 2 (ids 80..61) reaches game 70
+        server = self.start_stub(catalog_size=5 * DEFAULT_PAGE_SIZE)
+        self.fetch(since=self.updated(70).isoformat())
+        self.assertEqual(set(Game.objects.values_list('id', flat=True)), set(range(71, 101)))
+        self.assertEqual(get_checkpoint('fetch_game_data').last_updated, self.updated(100))
+
+        server.catalog_size = 110
+        requests_before = server.request_count
+        self.fetch(incremental=True, workers=1)
+        self.assertEqual(server.request_count - requests_before, 1)
+        self.assertEqual(set(Game.objects.values_list('id', flat=True)), set(range(71, 111)))
+        self.assertEqual(get_checkpoint('fetch_game_data').last_updated, self.updated(110))
+
+    def test_incomplete_sync_keeps_the_checkpoint(self):
+        server = self.start_stub(catalog_size=5 * DEFAULT_PAGE_SIZE)
+        self.fetch(since=self.updated(90).isoformat())
+        server.catalog_size = 150
+        server.error_rate = 1.0
+        with override_settings(RAWG_MAX_RETRIES=0):
+            self.fetch(incremental=True, max_pages=5)
+        self.assertEqual(get_checkpoint('fetch_game_data').last_updated, self.updated(100))
+
+
+class FetchPipelineTests(SimpleTestCase):
+    games_per_page = 3
+
+    def run_pipeline(self, pages=10, fetch_page=None, write_batch=None, **options):
+        self.batches, self.done, self.failed = [], {}, []
+
+        def default_fetch(page):
+            return [(page, i) for i in range(self.games_per_page)]
+
+        def default_write(games):
+            self.batches.append(games)
+            return True
+
+        def on_pages(done, failed):
+            self.done.update(done)
+            self.failed.extend(failed)
+
+        self.pipeline = FetchPipeline(
+            fetch_page=fetch_page or default_fetch,
+            parse_page=lambda page, data: (list(data), False),
+            write_batch=write_batch or default_write,
+            pages=range(1, pages + 1),
+            on_pages=on_pages,
+            **{'workers': 2, 'queue_size': 2, 'batch_size': 4, 'sample_interval': 0.01, **options},
+        )
+        return self.pipeline.run()
+
+    def test_every_page_is_written_and_reported(self):
+        summary = self.run_pipeline()
+        written = [game for batch in self.batches for game in batch]
+        self.assertEqual(sorted(written), [(page, i) for page in range(1, 11) for i in range(self.games_per_page)])
+        self.assertTrue(all(len(batch) <= 4 for batch in self.batches))
+        self.assertEqual(self.done, {page: self.games_per_page for page in range(1, 11)})
+        self.assertEqual(self.failed, [])
+        stages = {stage['stage']: stage for stage in summary['stages']}
+        self.assertEqual((stages['fetch']['items'], stages['parse']['items'], stages['write']['items']), (10, 30, 30))
+
+    def test_failed_fetch_and_failed_write_mark_their_pages(self):
+        def fetch_page(page):
+            if page == 3:
+                raise ConnectionError('page 3')
+            return [(page, i) for i in range(self.games_per_page)]
+
+        def write_batch(games):
+            self.batches.append(games)
+            return not any(page == 7 for page, _ in games)
+
+        self.run_pipeline(fetch_page=fetch_page, write_batch=write_batch, workers=1)
+        failed_batches = [batch for batch in self.batches if any(page == 7 for page, _ in batch)]
+        # every page sharing a batch with page 7 failed too, unless an earlier batch already completed it
+        expected_failed = {3} | {page for batch in failed_batches for page, _ in batch} - set(self.done)
+        self.assertEqual(set(self.failed), expected_failed)
+        self.assertEqual(self.pipeline.missed_pages(), expected_failed)
+        self.assertEqual(set(self.done) | set(self.failed), set(range(1, 11)))
+
+    def test_slow_writer_bounds_the_pages_in_flight(self):
+        in_flight = []
+
+        def write_batch(games):
+            in_flight.append(len(self.pipeline.requested_pages) - len(self.done))
+            time.sleep(0.02)
+            return True
+
+        summary = self.run_pipeline(pages=30, write_batch=write_batch, workers=2, queue_size=2)
+        # two full queues, one page per fetch worker, one in the parser and the writer's buffer (batch of 4)
+        self.assertLessEqual(max(in_flight), 2 + 2 + 2 + 1 + 2)
+        self.assertEqual(len(self.done), 30)
+        stages = {stage['stage']: stage for stage in summary['stages']}
+        self.assertGreater(stages['fetch']['blocked_seconds'], 0)
+        for depth in summary['queues'].values():
+            self.assertLessEqual(depth['max'], depth['capacity'])
+            self.assertGreater(depth['full_ratio'], 0)
+
+    def test_flush_interval_writes_partial_batches(self):
+        release = threading.Event()
+
+        def fetch_page(page):
+            if page == 2:
+                release.wait(5)
+            return [(page, i) for i in range(self.games_per_page)]
+
+        def write_batch(games):
+            self.batches.append(games)
+            release.set()
+            return True
+
+        self.run_pipeline(pages=2, fetch_page=fetch_page, write_batch=write_batch,
+                          workers=2, batch_size=100, flush_interval=0.05)
+        # page 2 only arrives after page 1's three games were flushed on their own
+        self.assertEqual([len(batch) for batch in self.batches], [3, 3])
+        self.assertEqual(self.done, {1: 3, 2: 3})
+
+
+class AdaptiveConcurrencyTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('games.rawg_async.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_steady_answers_add_one_per_round_trip(self):
+        concurrency = AdaptiveConcurrency(initial=4, maximum=6)
+        for _ in range(4):
+            concurrency.on_success(0.01)
+        self.assertEqual(concurrency.current, 4)
+        concurrency.on_success(0.01)
+        self.assertEqual(concurrency.current, 5)
+        for _ in range(100):
+            concurrency.on_success(0.01)
+        self.assertEqual(concurrency.current, 6)
+
+    def test_throttling_halves_once_per_round_trip(self):
+        concurrency = AdaptiveConcurrency(initial=16)
+        concurrency.on_success(0.05)
+        concurrency.on_throttled()
+        concurrency.on_throttled()  # same round trip
+        self.assertEqual(concurrency.current, 8)
+        self.now += 0.06
+        concurrency.on_throttled()
+        self.assertEqual(concurrency.current, 4)
+        self.assertEqual(concurrency.stats()['decreases'], 2)
+
+    def test_rising_latency_trims_the_limit(self):
+        concurrency = AdaptiveConcurrency(initial=4, maximum=4)
+        for _ in range(50):
+            concurrency.on_success(0.01)
+        for _ in range(10):
+            concurrency.on_success(0.2)
+        self.assertLess(concurrency.limit, 4)
+        self.assertEqual(concurrency.current, 3)
+
+
+class AsyncEngineTests(StubServerMixin, TransactionTestCase):
+    @override_settings(RAWG_MAX_RETRIES=5)
+    def test_async_fetch_backs_off_when_throttled(self):
+        server = self.start_stub(catalog_size=6 * DEFAULT_PAGE_SIZE, latency=0.02, max_concurrency=2)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        metrics_path = os.path.join(directory.name, 'metrics.json')
+        self.fetch(engine='async', workers=6, metrics_json=metrics_path)
+
+        self.assertEqual(Game.objects.count(), 6 * DEFAULT_PAGE_SIZE)
+        self.assertGreater(server.throttled_count, 0)
+        with open(metrics_path) as f:
+            concurrency = json.load(f)['rawg']['concurrency']
+        self.assertGreater(concurrency['decreases'], 0)
+        self.assertLessEqual(concurrency['peak'], 6)
+
+
+class FetchResumeTests(StubServerMixin, TransactionTestCase):
+    def test_resume_fetches_only_unjournaled_pages(self):
+        server = self.start_stub(catalog_size=5 * DEFAULT_PAGE_SIZE)
+        run = journal.start_run(1, 5)
+        journal.record_pages(run, {1: DEFAULT_PAGE_SIZE, 2: DEFAULT_PAGE_SIZE}, [4])
+
+        self.fetch(resume=run.id)
+
+        self.assertEqual(server.request_count, 3)
+        stored = set(Game.objects.values_list('id', flat=True))
+        self.assertEqual(stored, set(range(2 * DEFAULT_PAGE_SIZE + 1, 5 * DEFAULT_PAGE_SIZE + 1)))
+        run.refresh_from_db()
+        self.assertEqual(run.status, FetchRun.STATUS_COMPLETED)
+        self.assertEqual(journal.needed_pages(run), [])
+
+    def test_interrupted_run_resumes_its_failed_pages(self):
+        # with this seed the stub fails the first request, page 1 (fetched alone to size the run)
+        server = self.start_stub(catalog_size=3 * DEFAULT_PAGE_SIZE, error_rate=0.5, seed=1)
+        with override_settings(RAWG_MAX_RETRIES=0):
+            self.fetch(max_pages=3)
+        run = FetchRun.objects.get()
+        self.assertEqual(run.status, FetchRun.STATUS_INCOMPLETE)
+        missing = journal.needed_pages(run)
+        self.assertTrue(missing)
+
+        server.error_rate = 0
+        requests_before = server.request_count
+        self.fetch(resume=run.id)
+        self.assertEqual(server.request_count - requests_before, len(missing))
+        self.assertEqual(Game.objects.count(), 3 * DEFAULT_PAGE_SIZE)
+        run.refresh_from_db()
+        self.assertEqual(run.status, FetchRun.STATUS_COMPLETED)
+
+    def test_unknown_run_is_rejected(self):
+        self.start_stub()
+        with self.assertRaises(CommandError):
+            self.fetch(resume=999)
+
+
+class EarlyStopTests(StubServerMixin, TransactionTestCase):
+    def test_first_page_sizes_the_run(self):
+        server = self.start_stub(catalog_size=3 * DEFAULT_PAGE_SIZE - 5)
+        self.fetch(max_pages=50, workers=4)
+        self.assertEqual(server.request_count, 3)
+        self.fetch(max_pages=50, workers=4, engine='async')
+        self.assertEqual(server.request_count, 6)
+        self.assertEqual(Game.objects.count(), 3 * DEFAULT_PAGE_SIZE - 5)
+        self.assertEqual(FetchRun.objects.filter(status=FetchRun.STATUS_COMPLETED, stop_page=3).count(), 2)
+
+    def test_async_requests_past_the_last_page_are_cancelled(self):
+        delays = {1: 0.05, 2: 0.05, 3: 0.2}
+        written = []
+
+        async def fetch_page(page):
+            await asyncio.sleep(delays.get(page, 10))
+            return {'results': [(page, i) for i in range(3)], 'next': None if page == 2 else f'page={page + 1}'}
+
+        def write_batch(games):
+            written.extend(games)
+            return True
+
+        pipeline = FetchPipeline(
+            fetch_page=fetch_page,
+            parse_page=lambda page, data: (data['results'], data['next'] is None),
+            write_batch=write_batch,
+            pages=range(1, 21),
+            fetch_concurrency=lambda: 5,
+            flush_interval=0.01,
+        )
+        started = time.monotonic()
+        summary = pipeline.run()
+
+        # pages 4 and 5 were in flight at 10 seconds each when page 3 came back
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(pipeline.feeder.stop_page, 2)
+        self.assertGreaterEqual(summary['pages']['cancelled'], 2)
+        self.assertGreaterEqual(summary['pages']['past_stop'], 3)
+        self.assertEqual(pipeline.missed_pages(), set())
+        self.assertEqual(sorted({page for page, _ in written}), [1, 2])
+
+
+class ArchiveReplayTests(StubServerMixin, TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def snapshot(self):
+        return {
+            game['id']: game
+            for game in Game.objects.values('id', 'name', 'rating', 'genres', 'platforms', 'stores', 'screenshots')
+        }
+
+    def test_replay_restores_the_fetched_catalog_without_requests(self):
+        server = self.start_stub(catalog_size=5 * DEFAULT_PAGE_SIZE)
+        self.fetch(max_pages=10, archive=self.directory, archive_segment_pages=2)
+        self.assertEqual(len(find_segments(self.directory)), 3)
+        fetched = self.snapshot()
+        self.assertEqual(len(fetched), 5 * DEFAULT_PAGE_SIZE)
+
+        Game.objects.all().delete()
+        requests_before = server.request_count
+        self.fetch(replay=self.directory)
+
+        self.assertEqual(server.request_count, requests_before)
+        self.assertEqual(self.snapshot(), fetched)
+        game = Game.objects.get(id=7)
+        self.assertEqual(sorted(game.genre_tags.values_list('name', flat=True)), sorted(game.genres))
+        self.assertEqual(list(search_games(Game.objects.all(), 'stub game 42').values_list('id', flat=True)), [42])
+
+    def test_replay_needs_archived_segments(self):
+        with self.assertRaises(CommandError):
+            self.fetch(replay=self.directory)
+
+
+class MetricsJsonTests(StubServerMixin, TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def metrics(self, name, **options):
+        path = os.path.join(self.directory, name)
+        self.fetch(metrics_json=path, **options)
+        with open(path) as f:
+            return json.load(f)
+
+    def assert_run_shape(self, metrics, engine, stages):
+        self.assertEqual(metrics['status'], FetchRun.STATUS_COMPLETED)
+        self.assertEqual(metrics['engine'], engine)
+        self.assertEqual(metrics['games']['saved'], 3 * DEFAULT_PAGE_SIZE)
+        self.assertGreater(metrics['games']['per_second'], 0)
+        self.assertEqual(metrics['pages']['missing'], 0)
+        for round_metrics in metrics['rounds']:
+            self.assertEqual(set(round_metrics), {'wall_seconds', 'pages', 'stages', 'queues'})
+        first_round = {stage['stage']: stage for stage in metrics['rounds'][0]['stages']}
+        self.assertEqual(list(first_round), stages)
+        self.assertEqual(first_round['write']['items'], 3 * DEFAULT_PAGE_SIZE)
+        self.assertGreaterEqual(first_round['write']['batches'], 1)
+        self.assertEqual(first_round['write']['timings']['count'], first_round['write']['batches'])
+
+    def test_fetch_and_replay_write_the_same_document(self):
+        server = self.start_stub(catalog_size=3 * DEFAULT_PAGE_SIZE)
+        fetched = self.metrics('fetch.json', max_pages=10, archive=self.directory)
+        self.assert_run_shape(fetched, 'threads', ['fetch', 'parse', 'write'])
+        self.assertEqual(fetched['run'], FetchRun.objects.get().id)
+        self.assertEqual((fetched['pages']['fetched'], fetched['pages']['requested']), (3, 3))
+        self.assertEqual(fetched['games']['inserted'], 3 * DEFAULT_PAGE_SIZE)
+        self.assertEqual(fetched['rawg']['calls'], server.request_count)
+        self.assertEqual(set(fetched['rounds'][0]['queues']), {'raw_pages', 'parsed_pages'})
+
+        replayed = self.metrics('replay.json', replay=self.directory)
+        self.assert_run_shape(replayed, 'replay', ['parse', 'write'])
+        self.assertEqual(set(replayed), set(fetched) | {'replay', 'segments'})
+        self.assertEqual(replayed['pages'], {'fetched': 0, 'missing': 0, 'replayed': 3, 'parse_errors': 0})
+        self.assertEqual(replayed['games']['updated'], 3 * DEFAULT_PAGE_SIZE)
+        self.assertIsNone(replayed['rawg'])
+
+
+@skipUnless(reload.is_supported(), 'the catalog swap is SQLite only')
+@override_settings(**API_SETTINGS)
+class FullReloadTests(StubServerMixin, TransactionTestCase):
+    def setUp(self):
+        create_stub_games(1, 60)
+        user = get_user_model().objects.create_user(username='reviewer', password='x')
+        self.review = Review.objects.create(user=user, game_id=50, rating=4, review='Keep me')
+        self.wishlist = Wishlist.objects.create(user=user, game_id=55)
+        Game.objects.filter(id=2).update(description='<p>From the detail endpoint</p>')
+        # tags edited locally are put back to what RAWG lists
+        game = Game.objects.get(id=3)
+        game.genres = ['Local Genre']
+        game.save()
+
+    def tag_names(self, game):
+        return {
+            'genres': set(game.genre_tags.values_list('name', flat=True)),
+            'platforms': set(game.platform_tags.values_list('name', flat=True)),
+            'stores': set(game.store_tags.values_list('name', flat=True)),
+        }
+
+    def listed_count(self):
+        return APIClient().post('/games/', {}, format='json').data['total_items']
+
+    def test_swap_keeps_references_details_and_tags(self):
+        self.start_stub(catalog_size=2 * DEFAULT_PAGE_SIZE)
+        self.assertEqual(self.listed_count(), 60)
+        version = get_catalog_version()
+        self.fetch(full_reload=True, max_pages=10)
+
+        # one bump, right after the swap; cached list responses of the old catalog are not served
+        self.assertEqual(get_catalog_version(), version + 1)
+        self.assertEqual(self.listed_count(), 2 * DEFAULT_PAGE_SIZE + 2)
+
+        # the new list, plus the games reviews and wishlists still point at
+        self.assertEqual(set(Game.objects.values_list('id', flat=True)),
+                         set(range(1, 2 * DEFAULT_PAGE_SIZE + 1)) | {50, 55})
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.game.id, 50)
+        self.assertTrue(Wishlist.objects.filter(pk=self.wishlist.pk, game_id=55).exists())
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA foreign_key_check')
+            self.assertEqual(cursor.fetchall(), [])
+
+        self.assertEqual(Game.objects.get(id=2).description, '<p>From the detail endpoint</p>')
+        for game in Game.objects.filter(id__in=[1, 3, 50]):
+            with self.subTest(game=game.id):
+                self.assertEqual(self.tag_names(game), {
+                    'genres': set(game.genres), 'platforms': set(game.platforms), 'stores': set(game.stores),
+                })
+        self.assertNotIn('Local Genre', Game.objects.get(id=3).genres)
+        self.assertFalse(Game.genre_tags.through.objects.filter(game_id=45).exists())
+        self.assertEqual(list(search_games(Game.objects.all(), 'Stub Game 7').values_list('id', flat=True)), [7])
+
+    def test_incomplete_reload_keeps_the_live_catalog(self):
+        self.start_stub(catalog_size=2 * DEFAULT_PAGE_SIZE)
+        self.fetch(full_reload=True, max_pages=1)
+
+        self.assertEqual(Game.objects.count(), 60)
+        self.assertEqual(Game.objects.get(id=3).genres, ['Local Genre'])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE '%%staging%%'")
+            self.assertEqual(cursor.fetchall(), [])
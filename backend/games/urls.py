@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import GameListView, GameDetailView
+from .views import GameListView, GameDetailView, GameBatchView, SimilarGamesView, CatalogStatsView
 
 app_name = "games"
 urlpatterns = [
     path('', GameListView.as_view(), name='games'),
     path('<int:game_id>/', GameDetailView.as_view(), name='game_detail'),
+    path('<int:game_id>/similar/', SimilarGamesView.as_view(), name='similar_games'),
+    path('batch/', GameBatchView.as_view(), name='game_batch'),
+    path('stats/', CatalogStatsView.as_view(), name='catalog_stats'),
 ]
@@ -0,0 +1,64 @@
+"""
+Global catalog version shared by all processes.
+
+Writers (Game saves, fetch_game_data) bump the counter; per-process
+structures such as the catalog index compare it against the version they
+were built from. Reads are throttled so a request costs at most one small
+query every GAME_CATALOG_VERSION_CHECK_INTERVAL seconds.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CatalogVersion
+
+_lock = threading.Lock()
+_cached_state = None  # (version, updated_at)
+_checked_at = 0.0
+
+
+def _check_interval():
+    return getattr(settings, 'GAME_CATALOG_VERSION_CHECK_INTERVAL', 2.0)
+
+
+def _remember(state):
+    global _cached_state, _checked_at
+    with _lock:
+        _cached_state = state
+        _checked_at = time.monotonic()
+
+
+def bump_catalog_version():
+    """Increment the shared catalog version and return the new value"""
+    updated = CatalogVersion.objects.filter(pk=1).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        _, created = CatalogVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+        if not created:  # another process created the row first
+            CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+    state = CatalogVersion.objects.values_list('version', 'updated_at').get(pk=1)
+    _remember(state)
+    return state[0]
+
+
+def get_catalog_state():
+    """
+    (version, updated_at) of the catalog; (0, None) if it was never
+    bumped. updated_at is when the catalog last changed, which serves as
+    Last-Modified for list responses.
+    """
+    with _lock:
+        if _cached_state is not None and time.monotonic() - _checked_at < _check_interval():
+            return _cached_state
+    state = CatalogVersion.objects.filter(pk=1).values_list('version', 'updated_at').first() or (0, None)
+    _remember(state)
+    return state
+
+
+def get_catalog_version():
+    """Current catalog version (0 if the catalog was never bumped)"""
+    return get_catalog_state()[0]
@@ -1,91 +1,319 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Game
-from .serializers import GameSerializer
+from rest_framework.permissions import IsAdminUser
+from .models import Game, SimilarGame
+from .serializers import GameSerializer, GameListSerializer, GAME_LIST_FIELDS
+from .search import search_games
+from .pagination import KeysetPaginator, InvalidCursor, cached_count
+from .catalog_index import get_catalog_index
+from .facets import TAG_FACETS, count_facets, tag_names
+from .cache import game_list_cache, make_cache_key
+from .versioning import get_catalog_version, get_catalog_state
+from .conditional import make_etag, not_modified, not_modified_response, set_validators
+from .enrichment import description_backfill
+from .rawg import get_client
+from .negative_cache import is_blocked, stats as negative_cache_stats
 import math
-import requests
-import os
 from django.conf import settings
 
+# 패싯 필터 파라미터 -> ORM 조회 경로
+FACET_LOOKUPS = {
+    'genres': 'genre_tags__name',
+    'platforms': 'platform_tags__name',
+    'stores': 'store_tags__name',
+    'esrb_rating': 'esrb_rating',
+}
+# 프론트엔드의 "전체" 선택 값 (필터 없음)
+ALL_FILTER_VALUES = {'All Genres', 'All Platforms', 'All Stores', 'All Ratings'}
+# 허용된 정렬 기준 (모두 (필드, id) 인덱스가 있음, id가 보조 정렬 키)
+SORT_FIELDS = ('metacritic_score', 'rating', 'released', 'playtime', 'name')
+ORDERINGS = {prefix + field for field in SORT_FIELDS for prefix in ('', '-')}
+DEFAULT_ORDERING = '-metacritic_score'
+
+
+def positive_int(data, name, default, maximum=None):
+    """정수 파라미터 파싱 (1 이상, maximum 이하로 제한), 정수가 아니면 ValueError"""
+    value = data.get(name)
+    if value is None:
+        value = default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    value = max(value, 1)
+    return min(value, maximum) if maximum else value
+
+
 class GameListView(APIView):    
     # 필터링 및 페이지네이션 적용
     def post(self, request):
-        # 필터 파라미터 가져오기
-        genre_filter = request.data.get('genres', None)
-        platform_filter = request.data.get('platforms', None)
-        search_query = request.data.get('search', '')
-        
-        # 페이지네이션 파라미터 가져오기
-        page = int(request.data.get('page', 1))
-        items_per_page = int(request.data.get('items_per_page', 50))
-        
-        # 기본 쿼리셋
-        games = Game.objects.all().order_by('-metacritic_score')
+        try:
+            params = self.get_params(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if params['ordering'] not in ORDERINGS:
+            return Response(
+                {"error": f"Unsupported ordering. Choose one of: {', '.join(sorted(ORDERINGS))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 정규화된 요청 + 카탈로그 버전 기준 응답 캐시 조회
+        version, last_modified = get_catalog_state()
+        cache_key = make_cache_key(params)
 
-        # 검색어 필터링 (제목에 검색어가 포함된 게임만 필터링)
-        if search_query:
-            games = [game for game in games if search_query.lower() in game.name.lower()]
+        # 카탈로그가 바뀌지 않았으면 본문 없이 304 응답 (ETag = 카탈로그 버전 + 요청 파라미터)
+        etag = make_etag('games', version, cache_key[:16])
+        if not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
 
-        # 장르 필터링 (SQLite에서 __contains는 지원되지 않으므로 Python에서 처리)
-        if genre_filter and genre_filter != "All Genres":
-            games = [game for game in games if genre_filter in game.genres]
+        response_data = game_list_cache.get(version, cache_key)
+        if response_data is not None:
+            return set_validators(Response(response_data, headers={'X-Cache': 'HIT'}), etag, last_modified)
 
+        try:
+            if params['pagination'] == 'cursor':
+                response_data = self.cursor_page(params)
+            else:
+                response_data = self.numbered_page(params)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 플랫폼 필터링
-        if platform_filter and platform_filter != "All Platforms":
-            games = [game for game in games if platform_filter in game.platforms]
+        game_list_cache.set(version, cache_key, response_data)
+        return set_validators(Response(response_data, headers={'X-Cache': 'MISS'}), etag, last_modified)
 
-        # 전체 게임 수와 페이지 수 계산
-        total_items = len(games)
-        total_pages = math.ceil(total_items / items_per_page)
-        
-        # 페이지네이션 적용
+    def get_params(self, data):
+        """요청 본문 정규화 (같은 조회는 같은 캐시 키를 갖도록)"""
+        # 필터 파라미터 가져오기 (장르, 플랫폼, 스토어, ESRB 등급)
+        facet_filters = {}
+        for facet in FACET_LOOKUPS:
+            value = data.get(facet, None)
+            if value and value not in ALL_FILTER_VALUES:
+                facet_filters[facet] = value
+
+        params = {
+            'search': (data.get('search') or '').strip(),
+            'ordering': data.get('ordering') or DEFAULT_ORDERING,
+            'filters': facet_filters,
+            'items_per_page': positive_int(data, 'items_per_page', 50, getattr(settings, 'GAME_LIST_MAX_PAGE_SIZE', 100)),
+            'include_facets': bool(data.get('include_facets')),
+            'pagination': 'cursor' if data.get('pagination') == 'cursor' else 'page',
+        }
+        # 페이지네이션 파라미터 가져오기 (모드에 해당하는 값만 키에 포함)
+        if params['pagination'] == 'cursor':
+            params['cursor'] = data.get('cursor') or None
+            params['include_total'] = bool(data.get('include_total'))
+        else:
+            params['page'] = positive_int(data, 'page', 1)
+        return params
+
+    def filtered_queryset(self, params):
+        """DB 필터링 쿼리셋 (검색 + 패싯 필터, 카드에 필요한 컬럼만 조회)"""
+        games = Game.objects.only(*GAME_LIST_FIELDS)
+
+        # 검색어 필터링 (전문 검색 인덱스, 단어별 접두어 일치)
+        if params['search']:
+            games = search_games(games, params['search'])
+
+        # 패싯 필터링 (정규화된 Genre/Platform/Store 테이블 조인)
+        # 태그는 값을 포함하는 이름과 프론트엔드 라벨의 RAWG 이름으로 확장 (예: Switch -> Nintendo Switch)
+        for facet, value in params['filters'].items():
+            if facet in TAG_FACETS:
+                matches = Game.objects.filter(**{f'{FACET_LOOKUPS[facet]}__in': tag_names(facet, value)})
+                games = games.filter(id__in=matches.values('id'))
+            else:
+                games = games.filter(**{FACET_LOOKUPS[facet]: value})
+        return games
+
+    def numbered_page(self, params):
+        """페이지 번호 기반 응답 데이터"""
+        page = params['page']
+        items_per_page = params['items_per_page']
         start_index = (page - 1) * items_per_page
-        end_index = start_index + items_per_page
-        paginated_games = games[start_index:end_index]
-        
-        # 필터링된 결과 직렬화
-        serializer = GameSerializer(paginated_games, many=True)
+
+        # 인메모리 카탈로그 인덱스로 필터/정렬/페이지/카운트 처리 (검색 제외)
+        index = None if params['search'] else get_catalog_index()
+        result = index.query(params['filters'], params['ordering'], start_index, items_per_page) if index else None
+        if result is not None:
+            page_ids, total_items = result
+            games_by_id = Game.objects.only(*GAME_LIST_FIELDS).in_bulk(page_ids)
+            paginated_games = [games_by_id[game_id] for game_id in page_ids if game_id in games_by_id]
+            facets = index.facet_counts(params['filters']) if params['include_facets'] else None
+        else:
+            # 기본 쿼리셋 (필터, 카운트, 페이지네이션 모두 DB에서 처리)
+            games = self.filtered_queryset(params)
+
+            # id를 보조 정렬 키로 사용해 페이지 간 순서를 고정 (검색 시 관련도 우선)
+            ordering = params['ordering']
+            tiebreaker = '-id' if ordering.startswith('-') else 'id'
+            if params['search']:
+                games = games.order_by('-search_rank', ordering, tiebreaker)
+            else:
+                games = games.order_by(ordering, tiebreaker)
+
+            # 전체 게임 수 (캐시된 COUNT)
+            total_items = cached_count(games, {'search': params['search'], **params['filters']})
+
+            # 페이지네이션 적용 (LIMIT/OFFSET 쿼리)
+            end_index = start_index + items_per_page
+            paginated_games = games[start_index:end_index]
+            facets = count_facets(games) if params['include_facets'] else None
+
+        # 필터링된 결과 직렬화 (목록용 경량 표현)
+        serializer = GameListSerializer(paginated_games, many=True)
         
         # 응답 데이터 구성 (게임 목록 + 페이지네이션 정보)
         response_data = {
             'games': serializer.data,
             'total_items': total_items,
-            'total_pages': total_pages,
+            'total_pages': math.ceil(total_items / items_per_page),
             'current_page': page
         }
-        
-        return Response(response_data)
+        # 필터 사이드바용 패싯별 게임 수 (요청 시에만)
+        if facets is not None:
+            response_data['facets'] = facets
+        return response_data
+
+    def cursor_page(self, params):
+        """커서 기반 응답 데이터 (무한 스크롤용, 요청당 O(페이지 크기))"""
+        games = self.filtered_queryset(params)
+        items_per_page = params['items_per_page']
+
+        # (정렬 필드, id) 키셋 페이지네이션
+        ordering = params['ordering']
+        paginator = KeysetPaginator(ordering.lstrip('-'), descending=ordering.startswith('-'), page_size=items_per_page)
+        page_games, next_cursor, prev_cursor = paginator.paginate(games, params['cursor'])
+
+        # 전체 개수는 요청한 경우에만 (캐시된 COUNT) 계산
+        total_items = None
+        if params['include_total']:
+            total_items = cached_count(games, {'search': params['search'], **params['filters']})
+
+        serializer = GameListSerializer(page_games, many=True)
+        response_data = {
+            'games': serializer.data,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'total_items': total_items,
+            'items_per_page': items_per_page
+        }
+        if params['include_facets']:
+            response_data['facets'] = count_facets(games)
+        return response_data
+
+
+class CatalogStatsView(APIView):
+    """프로세스별 목록 캐시 / 카탈로그 인덱스 / description 백필 / RAWG 클라이언트 상태 (관리자 전용)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        index = get_catalog_index()
+        return Response({
+            'catalog_version': get_catalog_version(),
+            'list_cache': game_list_cache.stats(),
+            'catalog_index': index.stats() if index else None,
+            'description_backfill': description_backfill.stats(),
+            'rawg_client': get_client().stats(),
+            'rawg_negative_cache': negative_cache_stats(),
+        })
+
+class GameBatchView(APIView):
+    """여러 게임 상세 정보를 한 번에 조회 (GET /games/batch/?ids=1,2,3)"""
+
+    def get(self, request):
+        # ids 파라미터 파싱 (쉼표 구분, 중복 제거, 요청 순서 유지)
+        raw_ids = request.query_params.get('ids', '')
+        try:
+            game_ids = list(dict.fromkeys(int(value) for value in raw_ids.split(',') if value.strip()))
+        except ValueError:
+            return Response(
+                {"error": "ids must be a comma-separated list of integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not game_ids:
+            return Response(
+                {"error": "ids parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        max_ids = getattr(settings, 'GAME_BATCH_MAX_IDS', 100)
+        if len(game_ids) > max_ids:
+            return Response(
+                {"error": f"Too many ids (maximum {max_ids})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 단일 id__in 쿼리로 조회 (RAWG API 호출 없음)
+        games_by_id = Game.objects.in_bulk(game_ids)
+        serializer = GameSerializer([games_by_id[game_id] for game_id in game_ids if game_id in games_by_id], many=True)
+        return Response({
+            'games': {game['id']: game for game in serializer.data},
+            'missing': [game_id for game_id in game_ids if game_id not in games_by_id],
+        })
+
+
+class SimilarGamesView(APIView):
+    """미리 계산된 유사 게임 목록 (GET /games/<id>/similar/, build_similar_games 명령으로 갱신)"""
+
+    def get(self, request, game_id):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response(
+                {"error": "limit must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # (game_id, rank) 인덱스 한 번 조회 + 유사 게임 조인
+        entries = list(
+            SimilarGame.objects.filter(game_id=game_id)
+            .select_related('similar')
+            .only('score', 'rank', 'game_id', *(f'similar__{field}' for field in GAME_LIST_FIELDS))
+            .order_by('rank')[:limit]
+        )
+        if not entries and not Game.objects.filter(id=game_id).exists():
+            return Response(
+                {"error": "Game not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        games = GameListSerializer([entry.similar for entry in entries], many=True).data
+        for game, entry in zip(games, entries):
+            game['score'] = entry.score
+        return Response({'game_id': game_id, 'similar': games})
+
 
 class GameDetailView(APIView):
     def get(self, request, game_id):
         try:
             # 특정 ID를 가진 게임 찾기
             game = Game.objects.get(id=game_id)
-            
-            # description이 없는 경우 RAWG API에서 가져오기
-            if not game.description:
-                # RAWG API 키 가져오기
-                api_key = os.environ.get('RAWG_API_KEY', '')
-                
-                if api_key:
-                    # RAWG API 요청
-                    api_url = f"https://api.rawg.io/api/games/{game_id}?key={api_key}"
-                    response = requests.get(api_url)
-                    
-                    # 요청이 성공적이고 응답에 description이 있으면 저장
-                    if response.status_code == 200:
-                        data = response.json()
-                        if 'description' in data:
-                            game.description = data['description']
-                            game.save()
-            
-            # 게임 데이터 직렬화
-            serializer = GameSerializer(game)
-            return Response(serializer.data)
         except Game.DoesNotExist:
             return Response(
                 {"error": "Game not found"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+
+        # description이 없는 경우 백그라운드에서 RAWG API로 채움 (중복 요청은 하나로 합침)
+        # 최근 조회에 실패했거나 RAWG에 설명이 없던 게임은 retry_after 전까지 다시 요청하지 않음
+        if game.description:
+            description_status = 'ready'
+        elif get_client().api_key and not is_blocked(game.id):
+            description_backfill.enqueue(game.id)
+            description_status = 'pending'
+        else:
+            description_status = 'unavailable'
+
+        # 변경이 없으면 직렬화 없이 304 응답 (pending 상태는 updated_at과 무관하게 바뀌므로 ETag로만 검증)
+        etag = make_etag(game.id, int(game.updated_at.timestamp() * 1_000_000), description_status)
+        last_modified = game.updated_at if description_status != 'pending' else None
+        if not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        # 게임 데이터 직렬화 (로컬 데이터로 즉시 응답)
+        data = GameSerializer(game).data
+        data['description_status'] = description_status
+        return set_validators(Response(data), etag, last_modified)
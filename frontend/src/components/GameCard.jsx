@@ -2,24 +2,15 @@ import React from 'react';
 import { Link } from 'react-router-dom';
 import '../styles/GameCard.css';
 
-function GameCard({ id, name, rating, tags, imageUrl }) {
-  // Extract and process genre and platform arrays from string
-  const formatList = (str) => {
-    try {
-      // Parse string to array
-      const array = JSON.parse(str.replace(/'/g, '"'));
-      // Select up to 3 items and join with commas
-      return array.slice(0, 3).join(', ') + (array.length > 3 ? ' ...' : '');
-    } catch (e) {
-      // Return original string if parsing fails
-      return str;
-    }
+function GameCard({ id, name, rating, genres: genreList, platforms: platformList, imageUrl }) {
+  // Show up to 3 items joined with commas
+  const formatList = (list) => {
+    if (!Array.isArray(list) || list.length === 0) return '';
+    return list.slice(0, 3).join(', ') + (list.length > 3 ? ' ...' : '');
   };
 
-  // Separate genres and platforms from tags string (e.g., "[Action, RPG] • [PC, PS5]")
-  const [genresStr, platformsStr] = (tags || '[] • []').split('•').map(item => item.trim());
-  const genres = formatList(genresStr);
-  const platforms = formatList(platformsStr);
+  const genres = formatList(genreList);
+  const platforms = formatList(platformList);
   
   // Convert rating to number for styling
   const numericRating = parseFloat(rating) || 0;
@@ -5,6 +5,10 @@ import Footer from '../../components/Footer';
 import { useAuth } from '../../contexts/AuthContext';
 import '../../styles/GameDetailPage.css';
 
+// description 백필 폴링 설정
+const DESCRIPTION_POLL_INTERVAL = 2000; // ms
+const DESCRIPTION_POLL_ATTEMPTS = 5;
+
 function GameDetailPage() {
   // Get game ID parameter from URL
   const { id } = useParams();
@@ -41,6 +45,29 @@ function GameDetailPage() {
   const [userReviewId, setUserReviewId] = useState(null);
 
   useEffect(() => {
+    let pollTimer = null;
+    let cancelled = false;
+
+    // description이 백그라운드에서 채워지는 중이면 잠시 후 다시 조회
+    const pollDescription = (attempt) => {
+      if (attempt > DESCRIPTION_POLL_ATTEMPTS) return;
+      pollTimer = setTimeout(async () => {
+        try {
+          const response = await fetch(`http://127.0.0.1:8000/games/${id}/`);
+          if (!response.ok || cancelled) return;
+          const data = await response.json();
+          if (cancelled) return;
+          if (data.description_status === 'pending') {
+            pollDescription(attempt + 1);
+          } else {
+            setGameData(data);
+          }
+        } catch (err) {
+          // 폴링 실패는 무시 (기존 데이터 유지)
+        }
+      }, DESCRIPTION_POLL_INTERVAL);
+    };
+
     // Fetch game data from API
     const fetchGameDetails = async () => {
       try {
@@ -54,6 +81,9 @@ function GameDetailPage() {
         const data = await response.json();
         setGameData(data);
         setError(null);
+        if (data.description_status === 'pending') {
+          pollDescription(1);
+        }
       } catch (err) {
         setError(err.message || 'Failed to load game details');
       } finally {
@@ -62,6 +92,10 @@ function GameDetailPage() {
     };
     
     fetchGameDetails();
+    return () => {
+      cancelled = true;
+      clearTimeout(pollTimer);
+    };
   }, [id]);
 
   // 위시리스트 상태 확인
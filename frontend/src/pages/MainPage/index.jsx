@@ -256,7 +256,8 @@ function MainPage() {
                 id={game.id}
                 name={game.name}
                 rating={game.metacritic_score || "N/A"}
-                tags={`${game.genres || ""} • ${game.platforms || ""}`}
+                genres={game.genres}
+                platforms={game.platforms}
                 imageUrl={game.background_image}
               />
             </div>
@@ -118,7 +118,7 @@ const ProfilePage = () => {
         const formattedWishlist = data.map(item => ({
           id: item.id,
           title: item.game_details.name,
-          genre: item.game_details.genres ? JSON.parse(item.game_details.genres)[0] : '미분류',
+          genre: item.game_details.genres?.length ? item.game_details.genres[0] : '미분류',
           image: item.game_details.background_image || DEFAULT_GAME_IMAGE,
           gameId: item.game_details.id
         }));